@@ -61,7 +61,7 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
 }
 
 REST_AUTH = {
@@ -105,6 +105,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # 테스트 DB 도 파일로: 메모리 DB(shared cache)는 다른 스레드가 쓰는 중인 테이블을 읽지 못해서
+        # 수집 중 동시 조회 테스트(stocks.tests)를 돌릴 수 없음
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -120,6 +123,22 @@ TIME_ZONE = "UTC"
 USE_I18N = True
 USE_TZ = True
 
+# 캐시: 외부 서비스 없이 파일 기반 (gunicorn 워커끼리 공유). 로컬 개발은 DJANGO_CACHE=locmem 가능
+if os.getenv('DJANGO_CACHE') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('DJANGO_CACHE_DIR', str(BASE_DIR / '.cache' / 'django')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -164,4 +183,12 @@ TOSS_CLIENT_KEY = os.getenv('TOSS_CLIENT_KEY', '')
 TOSS_SECRET_KEY = os.getenv('TOSS_SECRET_KEY', '')
 
 # 금융감독원 API 키
-FSS_API_KEY = os.getenv('FSS_API_KEY', '')
\ No newline at end of file
+FSS_API_KEY = os.getenv('FSS_API_KEY', '')
+
+# FinanceDataReader 다운로드 캐시 (Parquet, TTL + 용량 기준 LRU 삭제)
+FDR_CACHE_DIR = os.getenv('FDR_CACHE_DIR', str(BASE_DIR / '.cache' / 'fdr'))
+FDR_CACHE_TTL = int(os.getenv('FDR_CACHE_TTL', 60 * 60 * 6))
+FDR_CACHE_MAX_BYTES = int(os.getenv('FDR_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# 상관계수 배치 작업용 수익률 행렬 (float32 memmap) 저장 위치
+MATRIX_CACHE_DIR = os.getenv('MATRIX_CACHE_DIR', str(BASE_DIR / '.cache' / 'matrix'))
@@ -0,0 +1,115 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db.models import Max
+
+from .matrix import fill_gaps, load_close_frame
+from .models import Stock
+
+# 포트폴리오 백테스트 (종가 행렬을 한 번 읽고 날짜 반복 없이 배열 연산으로 계산)
+# - 리밸런싱일 종가 기준으로 목표 비중을 다시 맞추고, 다음 리밸런싱일까지는 그대로 보유
+# - 리밸런싱 구간마다 (종가 / 구간 시작 종가) @ 비중 = 구간 내 성장률,
+#   구간 끝 성장률을 누적곱해서 구간 시작 평가액을 이어 붙인다.
+# - 계산은 수 ms 이고 대부분의 시간은 종가 조회이므로, 조회한 종가 행렬을 차트 워터마크 기준으로 캐시
+
+TRADING_DAYS_PER_YEAR = 252
+
+# 리밸런싱 주기 (pandas Period 주기, none = 매수 후 보유)
+REBALANCE_PERIODS = {'none': None, 'M': 'M', 'Q': 'Q', 'Y': 'Y'}
+
+# 종가 행렬 캐시 유지 시간 (차트 워터마크가 바뀌면 키가 달라짐)
+CLOSES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def parse_weights(expression, tickers):
+    """
+    '005930:2,000660:1' → tickers 순서의 비중 배열 (합 1, 적지 않은 종목은 0). 비어 있으면 동일 비중.
+    """
+    if not expression:
+        return np.full(len(tickers), 1 / len(tickers))
+
+    given = {}
+    for pair in expression.split(','):
+        ticker, _, value = pair.partition(':')
+        ticker = ticker.strip()
+        if ticker not in tickers:
+            raise ValueError(f'unknown ticker in weights: {ticker}')
+        try:
+            given[ticker] = float(value)
+        except ValueError:
+            raise ValueError(f'invalid weight: {pair}')
+
+    weights = np.array([given.get(ticker, 0.0) for ticker in tickers])
+    if not np.all(np.isfinite(weights)) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError('weights must be non-negative and not all zero')
+    return weights / weights.sum()
+
+
+def load_backtest_closes(tickers, start, end):
+    """
+    종목들의 종가 행렬 (날짜 × 종목). 모든 종목의 시세가 있는 첫날부터 시작하고 중간 공백은 직전 종가로 채운다.
+    반환값: (종가 DataFrame, 시세가 없어 빠진 종목 목록)
+    """
+    watermark = Stock.objects.filter(ticker__in=tickers).aggregate(latest=Max('chart_updated_at'))['latest']
+    version = watermark.isoformat() if watermark else '0'
+    digest = hashlib.md5(','.join(tickers).encode()).hexdigest()
+    key = f'backtest:closes:{digest}:{start}:{end}:{version}'
+
+    frame = cache.get(key)
+    if frame is None:
+        frame = load_close_frame(start, end, tickers)
+        if not frame.empty:
+            frame = fill_gaps(frame[[ticker for ticker in tickers if ticker in frame.columns]])
+            first = frame.apply(pd.Series.first_valid_index).max()
+            frame = frame.loc[first:]
+        cache.set(key, frame, CLOSES_CACHE_TIMEOUT)
+
+    missing = [ticker for ticker in tickers if ticker not in frame.columns]
+    return frame, missing
+
+
+def rebalance_rows(dates, period):
+    """리밸런싱하는 행 위치 (첫날 + 각 주기의 첫 거래일)"""
+    if period is None or not len(dates):
+        return np.array([0])
+    periods = pd.PeriodIndex(pd.DatetimeIndex(dates), freq=period)
+    starts = np.flatnonzero(periods[1:] != periods[:-1]) + 1
+    return np.concatenate(([0], starts))
+
+
+def run_backtest(closes, weights, rebalance_at, risk_free=0.0):
+    """
+    closes: (T × N) 종가 배열, weights: 합이 1인 (N,) 비중, rebalance_at: 리밸런싱 행 위치 (0 포함)
+    반환값: 평가액(시작 1.0), 낙폭, 성과 지표
+    """
+    n_days = len(closes)
+    rows = np.arange(n_days)
+
+    # 각 날짜가 속한 리밸런싱 구간: 리밸런싱 당일 종가까지는 이전 구간 (당일 종가로 비중을 다시 맞춤)
+    segment = np.maximum(np.searchsorted(rebalance_at, rows, side='left') - 1, 0)
+    base = closes[rebalance_at][segment]
+    growth = (closes / base) @ weights
+
+    # 구간 시작 평가액 = 이전 구간들의 끝 성장률 누적곱
+    segment_start = np.cumprod(np.concatenate(([1.0], growth[rebalance_at[1:]])))
+    equity = segment_start[segment] * growth
+
+    peak = np.maximum.accumulate(equity)
+    drawdown = equity / peak - 1
+
+    returns = equity[1:] / equity[:-1] - 1
+    years = n_days / TRADING_DAYS_PER_YEAR
+    volatility = returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR) if len(returns) > 1 else 0.0
+    excess = returns.mean() * TRADING_DAYS_PER_YEAR - risk_free if len(returns) else 0.0
+
+    metrics = {
+        'total_return': float(equity[-1] - 1),
+        'cagr': float(equity[-1] ** (1 / years) - 1) if years > 0 else 0.0,
+        'volatility': float(volatility),
+        'sharpe': float(excess / volatility) if volatility > 0 else None,
+        'max_drawdown': float(drawdown.min()),
+        'rebalances': int(len(rebalance_at) - 1),
+    }
+    return equity, drawdown, metrics
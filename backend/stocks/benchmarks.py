@@ -0,0 +1,363 @@
+import gzip
+import re
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.renderers import JSONRenderer
+
+from .backtest import rebalance_rows, run_backtest
+from .news import NEWS_DISPLAY, cache_key, get_news, normalize_items
+from .matrix import fill_gaps, load_close_frame
+from .models import Stock, DailyPrice, Chartprice
+from .search import StockSearchIndex
+from .services import BULK_BATCH_SIZE, chart_rows_from_frame, clean_float, clean_int, save_data
+from .utils import encode_columnar, pack_columnar
+
+# 성능 개선 전후 비교용 벤치마크 (python manage.py benchmark 로 실행)
+# - 벤치마크마다 이전 구현(legacy_*)과 현재 구현을 같은 합성 데이터로 돌려서 걸린 시간을 비교
+# - DB 에 쓰는 벤치마크는 트랜잭션 안에서 돌리고 끝나면 롤백 (합성 종목코드는 'B' 로 시작)
+
+BENCHMARKS = {}
+
+# 하루치 수집 (KOSPI + KOSDAQ + ETF) 종목 수
+SAVE_DATA_ROWS = 3500
+BENCH_DATE = date(2000, 1, 4)
+
+# 차트 변환: 10년치 일봉
+CHART_YEARS = 10
+
+# 백테스트: 종목 수 (기간은 CHART_YEARS)
+BACKTEST_TICKERS = 50
+
+# 뉴스: 캐시 적중 요청 수 / 응답 한 번(NEWS_DISPLAY 건)을 반복 정리하는 횟수
+NEWS_REQUESTS = 1000
+NEWS_BATCHES = 1000
+
+# 종목 검색: 조회 횟수 / 검색어 (종목코드, 종목명 일부, 초성)
+SEARCH_LOOKUPS = 10000
+SEARCH_QUERIES = ['삼성', '전자', 'B001', '카카오', '바이오', 'ㅎㄷ', 'ㅅㅅㅈ', '00', '에너지', 'B0123', '한화솔', 'ㅋㅋ']
+
+
+def benchmark(name, description):
+    """BENCHMARKS 에 등록. 함수는 repeat 를 받아 [(항목, 이전 구현 초, 현재 구현 초, 비고)] 를 돌려준다."""
+    def register(func):
+        BENCHMARKS[name] = (description, func)
+        return func
+    return register
+
+
+def best_time(func, repeat=1):
+    """func 를 repeat 번 실행한 가장 짧은 시간(초)과 마지막 결과"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+@contextmanager
+def rolled_back():
+    """블록 안에서 쓴 내용을 끝나면 되돌림"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+# 1. KRX 일별 시세 저장: 종목마다 update_or_create 두 번 vs bulk upsert
+
+def synthetic_krx_items(rows=SAVE_DATA_ROWS, close=10000):
+    """KRX OutBlock_1 형식의 합성 응답"""
+    return [
+        {
+            'ISU_CD': f'B{i:05d}', 'ISU_NM': f'벤치마크{i}', 'MKT_NM': 'KOSPI' if i % 2 else 'KOSDAQ',
+            'MKTCAP': f'{(close + i) * 1000:,}', 'LIST_SHRS': '1,000',
+            'TDD_CLSPRC': f'{close + i:,}', 'TDD_OPNPRC': f'{close:,}',
+            'TDD_HGPRC': f'{close + i + 100:,}', 'TDD_LWPRC': f'{close - 100:,}',
+            'ACC_TRDVOL': '12,345', 'FLUC_RT': '1.23', 'ACC_TRDVAL': '123,450,000', 'CMPPREVDD_PRC': str(i),
+        }
+        for i in range(rows)
+    ]
+
+
+def legacy_save_data(items, date_obj, asset_type, explicit_market_type=None):
+    """이전 save_data: 종목마다 Stock / DailyPrice 를 update_or_create"""
+    count = 0
+    for item in items:
+        ticker = item.get("ISU_CD")
+        mkt_nm = "ETF" if asset_type == 'ETF' else item.get("MKT_NM", explicit_market_type)
+        stock, _ = Stock.objects.update_or_create(
+            ticker=ticker,
+            defaults={
+                'name': item.get("ISU_NM"),
+                'asset_type': asset_type,
+                'market_type': mkt_nm,
+                'market_cap': clean_int(item.get("MKTCAP")),
+                'total_shares': clean_int(item.get("LIST_SHRS")),
+            },
+        )
+        DailyPrice.objects.update_or_create(
+            stock=stock,
+            date=date_obj,
+            defaults={
+                'close_price': clean_int(item.get("TDD_CLSPRC")),
+                'open_price': clean_int(item.get("TDD_OPNPRC")),
+                'high_price': clean_int(item.get("TDD_HGPRC")),
+                'low_price': clean_int(item.get("TDD_LWPRC")),
+                'volume': clean_int(item.get("ACC_TRDVOL")),
+                'fluctuation_rate': clean_float(item.get("FLUC_RT")),
+                'trading_value': clean_int(item.get("ACC_TRDVAL")),
+                'change': clean_int(item.get("CMPPREVDD_PRC")),
+                'nav': clean_float(item.get("NAV")) if asset_type == 'ETF' else None,
+            },
+        )
+        count += 1
+    return count
+
+
+@benchmark('save_data', f'KRX 하루치 {SAVE_DATA_ROWS}종목 저장: 종목별 update_or_create vs bulk upsert')
+def bench_save_data(repeat):
+    items = synthetic_krx_items()
+    revised = synthetic_krx_items(close=11000)
+
+    def fresh(save):
+        def run():
+            with rolled_back():
+                save(items, BENCH_DATE, 'STOCK')
+        return best_time(run, repeat)[0]
+
+    def reingest(save):
+        # 같은 날짜를 한 번 저장해 둔 상태에서 바뀐 시세로 다시 저장하는 시간만 잼
+        def run():
+            with rolled_back():
+                save(items, BENCH_DATE, 'STOCK')
+                return best_time(lambda: save(revised, BENCH_DATE, 'STOCK'))[0]
+        return min(run() for _ in range(repeat))
+
+    return [
+        ('신규 날짜', fresh(legacy_save_data), fresh(save_data), ''),
+        ('같은 날짜 재수집', reingest(legacy_save_data), reingest(save_data), ''),
+    ]
+
+
+# 2. FDR DataFrame → 차트 행 변환: iterrows 반복 vs 컬럼 벡터 연산
+
+def synthetic_fdr_frame(years=CHART_YEARS, seed=7):
+    """FinanceDataReader(NAVER) 일봉 형식의 합성 DataFrame (NaN / 0 종가 일부 포함)"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2026-10-16', periods=252 * years, name='Date')
+    close = np.maximum(50000 + np.cumsum(rng.normal(0, 500, len(index))), 1000).round()
+    close[rng.choice(len(index), 20, replace=False)] = np.nan
+    close[rng.choice(len(index), 5, replace=False)] = 0
+    return pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(1000, 100000, len(index)), 'Change': 0.0,
+    }, index=index)
+
+
+def legacy_chart_rows(df):
+    """이전 update_chart_data 의 변환 반복문"""
+    df = df.dropna(subset=['Close'])
+    rows = []
+    for date, row in df.iterrows():
+        close_val = row['Close']
+        if pd.isna(close_val) or close_val == 0:
+            continue
+        rows.append((date.date(), int(float(close_val))))
+    return rows
+
+
+@benchmark('chart_rows', f'{CHART_YEARS}년치 일봉 DataFrame → 차트 행 변환: iterrows vs 벡터 연산')
+def bench_chart_rows(repeat):
+    df = synthetic_fdr_frame()
+    before, expected = best_time(lambda: legacy_chart_rows(df), repeat)
+    after, rows = best_time(lambda: chart_rows_from_frame(df), repeat)
+    if rows != expected:
+        raise AssertionError('chart_rows_from_frame 결과가 이전 구현과 다름')
+    return [(f'{len(df)}행', before, after, f'{len(rows)}행 변환')]
+
+
+# 3. 종목 검색: icontains 쿼리 vs 메모리 n-gram 인덱스
+
+def synthetic_stocks(rows=SAVE_DATA_ROWS):
+    groups = ['삼성', '현대', '엘지', '에스케이', '카카오', '네이버', '한화', '롯데', '포스코', '셀트리온']
+    kinds = ['전자', '화학', '바이오', '증권', '건설', '제약', '중공업', '에너지', '솔루션', '홀딩스']
+    return [
+        Stock(
+            ticker=f'B{i:05d}', name=f'{groups[i % 10]}{kinds[i // 10 % 10]}{i // 100 or ""}',
+            market_type='KOSPI', market_cap=(rows - i) * 10 ** 8,
+        )
+        for i in range(rows)
+    ]
+
+
+def legacy_search(query, limit=10):
+    """이전 stock_search 의 DB 조회"""
+    return list(
+        Stock.objects.filter(Q(name__icontains=query) | Q(ticker__icontains=query))
+        .values_list('ticker', flat=True)[:limit]
+    )
+
+
+@benchmark('search', f'종목 검색 {SEARCH_LOOKUPS:,}회: icontains 쿼리 vs 메모리 인덱스')
+def bench_search(repeat):
+    queries = [SEARCH_QUERIES[i % len(SEARCH_QUERIES)] for i in range(SEARCH_LOOKUPS)]
+    with rolled_back():
+        Stock.objects.bulk_create(synthetic_stocks())
+        # 전역 인덱스(stock_index)는 건드리지 않도록 따로 만듦
+        index = StockSearchIndex()
+        index.sync(force=True)
+
+        before, _ = best_time(lambda: [legacy_search(query) for query in queries], repeat)
+        after, _ = best_time(lambda: [index.search(query) for query in queries], repeat)
+    return [(f'{len(index.entries)}종목', before, after, f'1회 평균 {after / SEARCH_LOOKUPS * 1e6:.1f}µs')]
+
+
+# 4. 차트 응답 인코딩: 객체 배열 JSON vs 열 단위 JSON / Int32 바이너리
+
+def payload_size(body):
+    """본문 크기 / gzip 후 크기 (바이트)"""
+    return f'{len(body):,}B (gzip {len(gzip.compress(body)):,}B)'
+
+
+@benchmark('chart_payload', f'{CHART_YEARS}년치 차트 응답 인코딩 시간/크기: JSON 객체 배열 vs columnar / binary')
+def bench_chart_payload(repeat):
+    rows = chart_rows_from_frame(synthetic_fdr_frame())
+    dates = [row[0] for row in rows]
+    closes = [row[1] for row in rows]
+    render = JSONRenderer().render
+
+    def as_json():
+        return render([{'date': date, 'close_price': close_price} for date, close_price in rows])
+
+    before, body = best_time(as_json, repeat)
+    results = []
+    for label, encode in (
+        ('columnar', lambda: render(encode_columnar(dates, closes))),
+        ('binary', lambda: pack_columnar(dates, closes)),
+    ):
+        after, encoded = best_time(encode, repeat)
+        results.append((f'{len(rows)}행 {label}', before, after, f'{payload_size(body)} → {payload_size(encoded)}'))
+    return results
+
+
+# 5. 포트폴리오 백테스트: 날짜별 반복 vs 배열 연산
+
+def legacy_backtest(closes, weights, rebalance_at):
+    """날짜마다 보유 수량으로 평가액을 계산하고 리밸런싱일에 수량을 다시 맞추는 반복문"""
+    rebalance = set(rebalance_at.tolist())
+    value, shares, peak = 1.0, None, 1.0
+    equity, drawdown = [], []
+    for t in range(len(closes)):
+        if shares is not None:
+            value = float(np.dot(shares, closes[t]))
+        if t in rebalance:
+            shares = value * weights / closes[t]
+        peak = max(peak, value)
+        equity.append(value)
+        drawdown.append(value / peak - 1)
+    return np.array(equity), np.array(drawdown)
+
+
+@benchmark('backtest', f'{BACKTEST_TICKERS}종목 {CHART_YEARS}년 월간 리밸런싱 백테스트: 날짜별 반복 vs 배열 연산')
+def bench_backtest(repeat):
+    dates = pd.bdate_range(end='2026-10-16', periods=252 * CHART_YEARS).date
+    rng = np.random.default_rng(23)
+    walk = np.cumsum(rng.normal(0.0003, 0.02, (len(dates), BACKTEST_TICKERS)), axis=0)
+    closes = np.maximum(10000 * np.exp(walk), 100).round()
+    weights = np.full(BACKTEST_TICKERS, 1 / BACKTEST_TICKERS)
+    rebalance_at = rebalance_rows(dates, 'M')
+
+    before, (expected, _) = best_time(lambda: legacy_backtest(closes, weights, rebalance_at), repeat)
+    after, (equity, _, _) = best_time(lambda: run_backtest(closes, weights, rebalance_rows(dates, 'M')), repeat)
+    if not np.allclose(equity, expected):
+        raise AssertionError('run_backtest 결과가 이전 구현과 다름')
+
+    # 종가 조회(load_close_frame)부터 계산까지 (캐시 미스일 때 응답 시간의 대부분)
+    tickers = [f'B{i:05d}' for i in range(BACKTEST_TICKERS)]
+    with rolled_back():
+        Stock.objects.bulk_create(Stock(ticker=ticker, name=ticker, market_type='KOSPI') for ticker in tickers)
+        Chartprice.objects.bulk_create(
+            (
+                Chartprice(stock_id=ticker, date=date, close_price=int(close))
+                for date, row in zip(dates, closes) for ticker, close in zip(tickers, row)
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        def from_db():
+            frame = fill_gaps(load_close_frame(dates[0], dates[-1], tickers))
+            return run_backtest(frame.to_numpy(), weights, rebalance_rows(frame.index, 'M'))
+
+        total, _ = best_time(from_db, repeat)
+    return [(f'{len(dates)}일 × {BACKTEST_TICKERS}종목', before, after, f'DB 종가 조회 포함 {total * 1000:.0f}ms')]
+
+
+# 6. 뉴스 item 정리: 이전 stock_news 반복문 vs normalize_items
+
+def synthetic_news_items(count=NEWS_DISPLAY):
+    """네이버 뉴스 검색 응답 items 형식 (태그/엔티티가 섞인 제목)"""
+    titles = [
+        '<b>삼성전자</b>, 3분기 영업이익 &quot;10조&quot; 회복&#39;…&lt;HBM&gt; 견인',
+        'SK하이닉스 &amp; <b>삼성전자</b> HBM 경쟁 본격화',
+        '코스피 2,600선 &middot; 외국인 <b>삼성전자</b> 순매수',
+        '[속보] 한국은행 기준금리 동결',
+    ]
+    return [
+        {
+            'title': titles[i % len(titles)],
+            'link': f'https://n.news.naver.com/article/{i}',
+            'pubDate': f'Fri, {i % 28 + 1:02d} Oct 2026 09:{i % 60:02d}:00 +0900',
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_normalize_items(items):
+    """이전 stock_news 반복문 그대로 (&quot;/&amp; 만 복원, striptime 오타로 날짜는 항상 원문)"""
+    news_list = []
+    for item in items:
+        title = re.sub('<[^<]+?>', '', item['title'])
+        title = title.replace('&quot;', '"').replace('&amp;', '&')
+        try:
+            raw_date = item['pubDate']
+            dt = datetime.striptime(raw_date, '%a, %d %b %Y %H:%M:%S +0900')
+            formatted_date = dt.strfttime('%m.%d %H:%M')
+        except:
+            formatted_date = item['pubDate']
+        news_list.append({'title': title, 'link': item['link'], 'date': formatted_date, 'publisher': '네이버뉴스'})
+    return news_list
+
+
+@benchmark('news', f'뉴스 캐시 적중 요청 {NEWS_REQUESTS:,}회: 매 요청 원본 정리 vs 정리된 값 캐시 (+ 업스트림 호출당 정리 비용)')
+def bench_news(repeat):
+    items = synthetic_news_items()
+    ticker = 'B000000'
+    legacy_key = f'{cache_key(ticker)}:legacy'
+
+    # 이전: 캐시에는 원본 items 만 있고 요청마다 stock_news 반복문으로 정리
+    # 현재: 업스트림 호출 때 한 번 정리해서 원본과 함께 저장, 요청은 정리된 값을 그대로 반환
+    cache.set(legacy_key, items)
+    cache.set(cache_key(ticker), {'items': items, 'news': normalize_items(items), 'fetched_at': time.time()})
+    try:
+        request_before, _ = best_time(
+            lambda: [legacy_normalize_items(cache.get(legacy_key)) for _ in range(NEWS_REQUESTS)], repeat,
+        )
+        request_after, _ = best_time(lambda: [get_news(ticker, '삼성전자') for _ in range(NEWS_REQUESTS)], repeat)
+    finally:
+        cache.delete_many([legacy_key, cache_key(ticker)])
+
+    batch_before, _ = best_time(lambda: [legacy_normalize_items(items) for _ in range(NEWS_BATCHES)], repeat)
+    batch_after, news = best_time(lambda: [normalize_items(items) for _ in range(NEWS_BATCHES)], repeat)
+    return [
+        (f'캐시 적중 요청 × {NEWS_REQUESTS:,}', request_before, request_after, ''),
+        # 이전 구현은 일부 엔티티만 복원하고 날짜를 변환하지 못하므로 같은 일을 하는 비교가 아님 (업스트림 호출당 한 번)
+        (f'정리 {NEWS_DISPLAY}건 × {NEWS_BATCHES:,}', batch_before, batch_after,
+         f'전체 엔티티 복원 + 날짜 변환 추가 비용, 예: {news[0][0]["title"]} / {news[0][0]["date"]}'),
+    ]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# KRX 양력 고정 휴장일 (월, 일)
+# - 설날/추석 등 음력 휴장일과 대체공휴일은 여기서 알 수 없으므로
+#   API 응답이 비어 있는 날을 휴장일로 기록한다. (KrxIngestCheckpoint 참고)
+KRX_FIXED_HOLIDAYS = {
+    (1, 1),    # 신정
+    (3, 1),    # 삼일절
+    (5, 1),    # 근로자의 날
+    (5, 5),    # 어린이날
+    (6, 6),    # 현충일
+    (8, 15),   # 광복절
+    (10, 3),   # 개천절
+    (10, 9),   # 한글날
+    (12, 25),  # 성탄절
+    (12, 31),  # 연말 휴장
+}
+
+# KRX 기준 시간대 (서버 TIME_ZONE 은 UTC)
+KRX_TIMEZONE = ZoneInfo('Asia/Seoul')
+
+# 시장 랭킹(상승/하락/거래대금 상위) 응답 캐시 키 (date: 'YYYY-MM-DD' 또는 'latest')
+MOVERS_CACHE_KEY = 'movers:{date}'
+
+
+def is_trading_day(day):
+    """주말과 양력 고정 휴장일을 제외한 날이면 True"""
+    if day.weekday() >= 5:
+        return False
+    return (day.month, day.day) not in KRX_FIXED_HOLIDAYS
+
+
+def trading_days(start, end):
+    """start ~ end (양끝 포함) 사이의 거래일 목록"""
+    days = []
+    day = start
+    while day <= end:
+        if is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def last_published_day():
+    """KRX 일별 시세가 공개됐다고 볼 수 있는 마지막 날 (한국 시간 기준 어제)"""
+    return datetime.now(KRX_TIMEZONE).date() - timedelta(days=1)
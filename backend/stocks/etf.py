@@ -0,0 +1,51 @@
+import numpy as np
+
+# ETF 괴리율 / 추적오차 분석 (전 ETF 를 (날짜 × ETF) 행렬로 맞춰 한 번에 계산)
+# - 괴리율(premium): 종가 / NAV - 1 (양수면 할증, 음수면 할인)
+# - 추적오차(tracking error): ETF 일간 수익률 - NAV 일간 수익률 의 표준편차 (연율화)
+# - 괴리율 z-score: 마지막 날 괴리율이 직전 구간 평균에서 표준편차 몇 배만큼 벗어났는지
+
+# 계산 구간 (거래일)
+ETF_WINDOW = 60
+
+# 추적오차 / z-score 를 내는 최소 관측일 수
+ETF_MIN_DAYS = 20
+
+# |z| 가 이 값 이상이면 이상 괴리로 표시
+ETF_ANOMALY_Z = 3.0
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def etf_analytics(closes, navs, min_days=ETF_MIN_DAYS):
+    """
+    closes, navs: (날짜 × ETF) float 배열 (없는 날은 NaN, 마지막 행이 기준일)
+    반환값: ETF 별 배열 dict (premium, premium_avg, premium_z, tracking_error)
+    관측일이 min_days 보다 적은 ETF 의 추적오차 / z-score 는 NaN
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        navs = np.where(navs > 0, navs, np.nan)
+        premium = closes / navs - 1
+
+        # 추적오차: 수익률 차이의 표본 표준편차
+        gap = (closes[1:] / closes[:-1]) - (navs[1:] / navs[:-1])
+        gap_days = np.sum(~np.isnan(gap), axis=0)
+        gap_mean = np.nansum(gap, axis=0) / gap_days
+        gap_var = np.nansum((gap - gap_mean) ** 2, axis=0) / (gap_days - 1)
+        tracking_error = np.sqrt(gap_var * TRADING_DAYS_PER_YEAR)
+
+        # z-score: 기준일을 뺀 직전 구간을 기준 분포로 사용 (당일 급변이 자기 기준을 흐리지 않도록)
+        history = premium[:-1]
+        days = np.sum(~np.isnan(history), axis=0)
+        mean = np.nansum(history, axis=0) / days
+        std = np.sqrt(np.nansum((history - mean) ** 2, axis=0) / (days - 1))
+        z = (premium[-1] - mean) / np.where(std > 0, std, np.nan)
+
+    tracking_error[gap_days < min_days] = np.nan
+    z[days < min_days] = np.nan
+    return {
+        'premium': premium[-1],
+        'premium_avg': mean,
+        'premium_z': z,
+        'tracking_error': tracking_error,
+    }
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+import FinanceDataReader as fdr
+import pandas as pd
+from django.conf import settings
+
+# FinanceDataReader 다운로드 결과를 Parquet 파일로 저장해두는 로컬 캐시
+# - 키: (source, ticker, start, end) 의 해시 → 같은 요청은 TTL 동안 네트워크 없이 재사용
+#   (차트 갱신은 날짜가 고정된 전체 기간 조회에만 캐시를 씀: services.update_chart_data)
+# - 파일 mtime = 저장 시각(TTL 기준), atime = 마지막 사용 시각(LRU 기준)
+# - 전체 크기가 FDR_CACHE_MAX_BYTES 를 넘으면 가장 오래 안 쓴 파일부터 삭제
+#   (저장할 때마다 디렉터리를 훑지 않도록, 프로세스 안에서 누적 크기를 세다가 상한을 넘을 수 있을 때만 훑음)
+
+# 정리할 때 상한의 이 비율까지 줄여서, 가득 찬 상태에서 저장할 때마다 다시 훑지 않도록 함
+FDR_CACHE_EVICT_RATIO = 0.9
+
+# 누적 크기와 상관없이 실제 크기를 다시 재는 간격 (초): 다른 프로세스가 쓴 파일은 누적 크기에 빠지므로
+FDR_CACHE_RESCAN_INTERVAL = 60 * 10
+
+# 이 프로세스가 추정하는 캐시 전체 크기 (None: 아직 모름 → 다음 저장 때 한 번 훑음)
+# 같은 키 덮어쓰기는 두 번 세므로 실제보다 크게 잡힘 → 상한을 넘는다고 나오면 실제로 다시 잼
+_estimated_bytes = None
+_scanned_at = 0.0
+_estimate_lock = threading.Lock()
+
+
+def cache_key(source, ticker, start, end):
+    raw = f'{source}|{ticker}|{start}|{end}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_path(key):
+    return os.path.join(settings.FDR_CACHE_DIR, f'{key}.parquet')
+
+
+def read_cached(key):
+    path = cache_path(key)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    now = time.time()
+    if now - stat.st_mtime > settings.FDR_CACHE_TTL:
+        remove_quietly(path)
+        return None
+
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # 깨진 파일은 지우고 다시 받음
+        remove_quietly(path)
+        return None
+
+    # 저장 시각(mtime)은 유지하고 사용 시각(atime)만 갱신
+    os.utime(path, (now, stat.st_mtime))
+    return df
+
+
+def write_cached(key, df):
+    os.makedirs(settings.FDR_CACHE_DIR, exist_ok=True)
+
+    # 임시 파일에 쓴 뒤 교체해서 동시에 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 함
+    fd, tmp_path = tempfile.mkstemp(dir=settings.FDR_CACHE_DIR, suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path)
+        size = os.stat(tmp_path).st_size
+        os.replace(tmp_path, cache_path(key))
+    except Exception:
+        remove_quietly(tmp_path)
+        raise
+
+    track_write(size)
+
+
+def track_write(size):
+    """저장한 파일 크기를 누적하고, 상한을 넘었을 수 있을 때(또는 마지막으로 잰 지 오래됐을 때)만 evict 로 디렉터리를 훑는다."""
+    global _estimated_bytes, _scanned_at
+    with _estimate_lock:
+        now = time.monotonic()
+        if _estimated_bytes is not None and now - _scanned_at < FDR_CACHE_RESCAN_INTERVAL:
+            _estimated_bytes += size
+            if _estimated_bytes <= settings.FDR_CACHE_MAX_BYTES:
+                return
+        _estimated_bytes = evict()
+        _scanned_at = now
+
+
+def evict():
+    """
+    캐시 크기가 상한을 넘으면 마지막 사용 시각이 오래된 파일부터 상한의 FDR_CACHE_EVICT_RATIO 까지 삭제
+    반환값: 정리 후 캐시 전체 크기
+    """
+    entries = []
+    total = 0
+    with os.scandir(settings.FDR_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith('.parquet'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # 다른 워커가 먼저 지운 파일
+                continue
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= settings.FDR_CACHE_MAX_BYTES:
+        return total
+
+    target = settings.FDR_CACHE_MAX_BYTES * FDR_CACHE_EVICT_RATIO
+    for _, size, path in sorted(entries):
+        remove_quietly(path)
+        total -= size
+        if total <= target:
+            break
+    return total
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def data_reader(source, ticker, start, end=None, use_cache=True):
+    """
+    fdr.DataReader(f'{source}:{ticker}', start, end) 의 캐시 버전.
+    end 를 생략하면 오늘 날짜로 고정해서 키를 만든다. (날짜가 바뀌면 자연스럽게 새로 받음)
+    """
+    symbol = f'{source}:{ticker}'
+    if not use_cache:
+        return fdr.DataReader(symbol, start, end)
+
+    key = cache_key(source, ticker, start, end or date.today())
+    df = read_cached(key)
+    if df is not None:
+        return df
+
+    df = fdr.DataReader(symbol, start, end)
+    if df is not None:
+        try:
+            write_cached(key, df)
+        except Exception as e:
+            print(f'FDR 캐시 저장 실패 ({symbol}): {e}')
+    return df
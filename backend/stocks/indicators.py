@@ -0,0 +1,336 @@
+import re
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .models import DailyPrice
+
+# 보조지표 계산 (종목 시세를 NumPy 배열로 한 번 읽어서 지표별로 벡터 연산)
+# - sma<N> / ema<N>: 이동평균 / 지수이동평균
+# - rsi<N>: Wilder RSI
+# - macd: MACD(12, 26, 9) → macd / signal / hist
+# - bb<N>: 볼린저 밴드 (N일, 2σ) → middle / upper / lower
+# - atr<N>: Wilder ATR
+# EMA 계열은 첫 값으로 시작하는 재귀식(pandas ewm adjust=False)이라 한 봉씩 이어서 계산해도 같은 값이 나온다.
+# 값이 안정되기 전 구간(워밍업)은 NaN (응답에서는 null)
+
+INDICATOR_RE = re.compile(r'^(sma|ema|rsi|atr|bb)(\d+)$|^(macd)$')
+
+DEFAULT_INDICATOR_SET = 'sma20,rsi14'
+MAX_INDICATORS = 10
+MIN_WINDOW = 2
+MAX_WINDOW = 250
+
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_K = 2
+
+SERIES_FIELDS = ('date', 'open_price', 'high_price', 'low_price', 'close_price')
+
+
+def parse_indicator_set(value):
+    """'sma20,rsi14,macd' → [('sma20', 'sma', 20), ('rsi14', 'rsi', 14), ('macd', 'macd', None)]"""
+    specs = {}
+    for name in (value or DEFAULT_INDICATOR_SET).lower().split(','):
+        name = name.strip()
+        if not name:
+            continue
+        match = INDICATOR_RE.match(name)
+        if match is None:
+            raise ValueError(f'unknown indicator: {name}')
+        if match[3]:
+            specs[name] = (name, 'macd', None)
+            continue
+        window = int(match[2])
+        if not MIN_WINDOW <= window <= MAX_WINDOW:
+            raise ValueError(f'window must be between {MIN_WINDOW} and {MAX_WINDOW}: {name}')
+        specs[name] = (name, match[1], window)
+
+    if not specs:
+        raise ValueError('set is empty')
+    if len(specs) > MAX_INDICATORS:
+        raise ValueError(f'at most {MAX_INDICATORS} indicators per request')
+    return list(specs.values())
+
+
+def series_query(ticker):
+    return DailyPrice.objects.filter(stock_id=ticker).order_by('date').values_list(*SERIES_FIELDS)
+
+
+def load_series(ticker):
+    """종목의 일별 시세 전체를 날짜순 (dates, open, high, low, close) 배열로 읽는다."""
+    rows = list(series_query(ticker))
+    dates = [row[0] for row in rows]
+    prices = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, 4)
+    return dates, prices[:, 0], prices[:, 1], prices[:, 2], prices[:, 3]
+
+
+def load_series_many(tickers):
+    """여러 종목의 시세를 한 쿼리로 읽어 (ticker, load_series 와 같은 튜플) 를 차례로 돌려준다."""
+    rows = list(
+        DailyPrice.objects.filter(stock_id__in=tickers)
+        .order_by('stock_id', 'date')
+        .values_list('stock_id', *SERIES_FIELDS)
+    )
+    for ticker, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        dates = [row[1] for row in group]
+        prices = np.array([row[2:] for row in group], dtype=np.float64)
+        yield ticker, (dates, prices[:, 0], prices[:, 1], prices[:, 2], prices[:, 3])
+
+
+def warmup(values, count):
+    """앞의 count 개를 NaN 으로 가린다."""
+    values[:count] = np.nan
+    return values
+
+
+def sma(close, window):
+    out = np.full(len(close), np.nan)
+    if len(close) >= window:
+        csum = np.cumsum(np.concatenate(([0.0], close)))
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def ewm(values, alpha):
+    """y[0] = x[0], y[t] = alpha * x[t] + (1 - alpha) * y[t-1]"""
+    if not len(values):
+        return np.array([], dtype=np.float64)
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def ema(close, window):
+    return warmup(ewm(close, 2 / (window + 1)), window - 1)
+
+
+def rsi(close, window):
+    # 첫 봉은 변화량이 없으므로 0 으로 두고 Wilder 평활 (alpha = 1/N)
+    delta = np.diff(close, prepend=close[:1])
+    avg_gain = ewm(np.clip(delta, 0, None), 1 / window)
+    avg_loss = ewm(np.clip(-delta, 0, None), 1 / window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + avg_gain / avg_loss)
+    # 하락이 없으면 100, 변화가 전혀 없으면 50
+    out = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), out)
+    return warmup(out, window)
+
+
+def macd(close):
+    line = ewm(close, 2 / (MACD_FAST + 1)) - ewm(close, 2 / (MACD_SLOW + 1))
+    signal = ewm(line, 2 / (MACD_SIGNAL + 1))
+    hist = line - signal
+    settled = MACD_SLOW - 1
+    return {
+        'macd': warmup(line, settled),
+        'signal': warmup(signal, settled + MACD_SIGNAL - 1),
+        'hist': warmup(hist, settled + MACD_SIGNAL - 1),
+    }
+
+
+def bollinger(close, window):
+    middle = sma(close, window)
+    std = np.full(len(close), np.nan)
+    if len(close) >= window:
+        std[window - 1:] = sliding_window_view(close, window).std(axis=1)
+    return {
+        'middle': middle,
+        'upper': middle + BOLLINGER_K * std,
+        'lower': middle - BOLLINGER_K * std,
+    }
+
+
+def true_range(high, low, close):
+    prev_close = np.concatenate((close[:1], close[:-1]))
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, window):
+    return warmup(ewm(true_range(high, low, close), 1 / window), window - 1)
+
+
+def compute_indicators(series, specs):
+    """load_series 결과에 대해 specs 의 지표를 모두 계산 → {이름: 배열 또는 {이름: 배열}}"""
+    _, _, high, low, close = series
+    results = {}
+    for name, kind, window in specs:
+        if kind == 'sma':
+            results[name] = sma(close, window)
+        elif kind == 'ema':
+            results[name] = ema(close, window)
+        elif kind == 'rsi':
+            results[name] = rsi(close, window)
+        elif kind == 'macd':
+            results[name] = macd(close)
+        elif kind == 'bb':
+            results[name] = bollinger(close, window)
+        elif kind == 'atr':
+            results[name] = atr(high, low, close, window)
+    return results
+
+
+def to_json_values(values, start=0):
+    """values[start:] 를 소수 둘째 자리로 반올림한 리스트로 (NaN → None)"""
+    values = np.round(values[start:], 2).astype(object)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def serialize_indicators(dates, results, start_date):
+    """start_date 이후 구간만 열 단위 JSON 으로"""
+    start = int(np.searchsorted(np.array(dates, dtype='datetime64[D]'), np.datetime64(start_date, 'D')))
+    data = {'dates': dates[start:]}
+    for name, values in results.items():
+        if isinstance(values, dict):
+            data[name] = {key: to_json_values(column, start) for key, column in values.items()}
+        else:
+            data[name] = to_json_values(values, start)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# 스트리밍 상태 (IndicatorState)
+# 종목마다 아래 지표의 최신 값과, 다음 봉 하나로 이어서 계산하는 데 필요한 상태를 저장한다.
+# - 이동합: 최근 STATE_WINDOW 개 종가 + 구간 합/제곱합 (정수라 오차 없이 더하고 뺌)
+# - EMA / Wilder 평균: 직전 값
+# 새 봉이 들어오면 advance_state 로 O(1) 갱신, 과거 구간이 바뀌면 state_from_series 로 재계산
+
+STREAM_EMA = 20
+STREAM_RSI = 14
+STREAM_BB = 20
+STREAM_ATR = 14
+# 이동합에 필요한 최근 종가 개수 (sma60)
+STATE_WINDOW = 60
+
+STREAM_COLUMNS = ('sma20', 'sma60', 'ema20', 'rsi14', 'macd', 'macd_signal', 'bb_upper', 'bb_lower', 'atr14')
+
+
+def empty_state():
+    return {
+        'bars': 0, 'closes': [], 'prev_close': None,
+        'sum20': 0, 'sum60': 0, 'sumsq20': 0,
+        'ema20': None, 'ema12': None, 'ema26': None, 'signal': None,
+        'gain': None, 'loss': None, 'atr': None,
+    }
+
+
+def ewm_step(prev, value, alpha):
+    """ewm 과 같은 재귀식 한 단계 (첫 값은 그대로)"""
+    return value if prev is None else alpha * value + (1 - alpha) * prev
+
+
+def advance_state(state, high, low, close):
+    """봉 하나(high, low, close)를 반영한 새 상태를 돌려준다. (state 는 그대로 둠)"""
+    high, low, close = int(high), int(low), int(close)
+    prev_close = state['prev_close']
+    closes = state['closes'] + [close]
+
+    # 구간을 벗어나는 종가를 빼고 새 종가를 더함
+    sums = {}
+    for window, key in ((20, 'sum20'), (60, 'sum60')):
+        sums[key] = state[key] + close - (closes[-window - 1] if len(closes) > window else 0)
+    outgoing = closes[-STREAM_BB - 1] if len(closes) > STREAM_BB else 0
+    sums['sumsq20'] = state['sumsq20'] + close * close - outgoing * outgoing
+
+    delta = 0 if prev_close is None else close - prev_close
+    tr = high - low if prev_close is None else max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+    ema12 = ewm_step(state['ema12'], close, 2 / (MACD_FAST + 1))
+    ema26 = ewm_step(state['ema26'], close, 2 / (MACD_SLOW + 1))
+    return {
+        'bars': state['bars'] + 1,
+        'closes': closes[-STATE_WINDOW:],
+        'prev_close': close,
+        **sums,
+        'ema20': ewm_step(state['ema20'], close, 2 / (STREAM_EMA + 1)),
+        'ema12': ema12,
+        'ema26': ema26,
+        'signal': ewm_step(state['signal'], ema12 - ema26, 2 / (MACD_SIGNAL + 1)),
+        'gain': ewm_step(state['gain'], max(delta, 0), 1 / STREAM_RSI),
+        'loss': ewm_step(state['loss'], max(-delta, 0), 1 / STREAM_RSI),
+        'atr': ewm_step(state['atr'], tr, 1 / STREAM_ATR),
+    }
+
+
+def state_values(state):
+    """상태에서 STREAM_COLUMNS 값을 계산 (워밍업 구간은 None)"""
+    bars = state['bars']
+    values = dict.fromkeys(STREAM_COLUMNS)
+    if bars >= 20:
+        values['sma20'] = state['sum20'] / 20
+        values['ema20'] = state['ema20']
+        # 정수 합/제곱합으로 분산을 계산하고 마지막에만 나눔
+        variance = (STREAM_BB * state['sumsq20'] - state['sum20'] ** 2) / STREAM_BB ** 2
+        std = max(variance, 0) ** 0.5
+        values['bb_upper'] = values['sma20'] + BOLLINGER_K * std
+        values['bb_lower'] = values['sma20'] - BOLLINGER_K * std
+    if bars >= 60:
+        values['sma60'] = state['sum60'] / 60
+    if bars > STREAM_RSI:
+        gain, loss = state['gain'], state['loss']
+        values['rsi14'] = (50.0 if gain == 0 else 100.0) if loss == 0 else 100 - 100 / (1 + gain / loss)
+    if bars >= MACD_SLOW:
+        values['macd'] = state['ema12'] - state['ema26']
+    if bars >= MACD_SLOW + MACD_SIGNAL - 1:
+        values['macd_signal'] = state['signal']
+    if bars >= STREAM_ATR:
+        values['atr14'] = state['atr']
+    return values
+
+
+def state_from_series(series, end=None):
+    """
+    전체 시세 배열로 (마지막 봉까지 반영한) 상태를 한 번에 만든다.
+    end 를 주면 series[:end] 까지만 반영한 상태. 봉이 없으면 None.
+    """
+    _, _, high, low, close = series
+    if end is not None:
+        high, low, close = high[:end], low[:end], close[:end]
+    if not len(close):
+        return None
+
+    closes = close.astype(np.int64)
+    delta = np.diff(close, prepend=close[:1])
+    ema12 = ewm(close, 2 / (MACD_FAST + 1))
+    ema26 = ewm(close, 2 / (MACD_SLOW + 1))
+    last20 = [int(c) for c in closes[-20:]]
+    return {
+        'bars': len(close),
+        'closes': [int(c) for c in closes[-STATE_WINDOW:]],
+        'prev_close': int(closes[-1]),
+        'sum20': sum(last20),
+        'sum60': int(closes[-60:].sum()),
+        'sumsq20': sum(c * c for c in last20),
+        'ema20': float(ewm(close, 2 / (STREAM_EMA + 1))[-1]),
+        'ema12': float(ema12[-1]),
+        'ema26': float(ema26[-1]),
+        'signal': float(ewm(ema12 - ema26, 2 / (MACD_SIGNAL + 1))[-1]),
+        'gain': float(ewm(np.clip(delta, 0, None), 1 / STREAM_RSI)[-1]),
+        'loss': float(ewm(np.clip(-delta, 0, None), 1 / STREAM_RSI)[-1]),
+        'atr': float(ewm(true_range(high, low, close), 1 / STREAM_ATR)[-1]),
+    }
+
+
+def recompute_values(series):
+    """전체 시세를 벡터 연산으로 다시 계산한 마지막 봉의 STREAM_COLUMNS 값 (스트리밍 결과 검증용)"""
+    specs = parse_indicator_set(f'sma20,sma60,ema{STREAM_EMA},rsi{STREAM_RSI},macd,bb{STREAM_BB},atr{STREAM_ATR}')
+    results = compute_indicators(series, specs)
+    columns = {
+        'sma20': results['sma20'],
+        'sma60': results['sma60'],
+        'ema20': results[f'ema{STREAM_EMA}'],
+        'rsi14': results[f'rsi{STREAM_RSI}'],
+        'macd': results['macd']['macd'],
+        'macd_signal': results['macd']['signal'],
+        'bb_upper': results[f'bb{STREAM_BB}']['upper'],
+        'bb_lower': results[f'bb{STREAM_BB}']['lower'],
+        'atr14': results[f'atr{STREAM_ATR}'],
+    }
+    return {
+        name: None if not len(values) or np.isnan(values[-1]) else float(values[-1])
+        for name, values in columns.items()
+    }
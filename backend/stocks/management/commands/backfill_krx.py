@@ -0,0 +1,141 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max
+
+from stocks.constants import last_published_day, trading_days
+from stocks.models import KrxIngestCheckpoint
+from stocks.services import (
+    fetch_krx_markets, rebuild_indicator_states, refresh_market_indexes, save_krx_payloads,
+)
+from stocks.utils import init_worker
+
+
+def _fetch_day(date_str):
+    # 워커 프로세스: 네트워크 조회만 하고 DB 는 건드리지 않음
+    return date_str, fetch_krx_markets(date_str)
+
+
+class Command(BaseCommand):
+    help = 'KRX 일별 시세 기간 백필 (완료된 날짜는 체크포인트로 건너뜀)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, required=True, help='시작일 (YYYYMMDD)')
+        parser.add_argument('--end', type=str, help='종료일 (YYYYMMDD, 기본값: 한국 시간 기준 어제)')
+        parser.add_argument('--workers', type=int, default=4, help='동시에 조회할 날짜 수')
+        parser.add_argument('--force', action='store_true', help='체크포인트를 무시하고 다시 수집')
+
+    def handle(self, *args, **options):
+        start = self.parse_date(options['start'])
+        end = self.parse_date(options['end']) if options['end'] else last_published_day()
+        if start > end:
+            raise CommandError('--start 가 --end 보다 늦습니다.')
+
+        workers = max(1, options['workers'])
+
+        days = trading_days(start, end)
+        if not options['force']:
+            done = set(
+                KrxIngestCheckpoint.objects.filter(date__gte=start, date__lte=end)
+                .values_list('date', flat=True)
+            )
+            days = [day for day in days if day not in done]
+
+        self.stdout.write(f'백필 대상 {len(days)}일 ({start} ~ {end}), 워커 {workers}개')
+        if not days:
+            return
+
+        # 포크된 워커가 부모의 DB 커넥션을 물려받지 않도록 미리 닫아둠
+        connections.close_all()
+
+        pending_dates = [day.strftime('%Y%m%d') for day in days]
+        completed = failed = 0
+        empty_days = []
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            # 결과를 받는 대로 저장하고, 동시에 떠 있는 날짜는 workers * 2 개로 제한
+            in_flight = set()
+            while pending_dates or in_flight:
+                while pending_dates and len(in_flight) < workers * 2:
+                    in_flight.add(executor.submit(_fetch_day, pending_dates.pop(0)))
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        date_str, payloads = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'조회 실패: {e}'))
+                        continue
+
+                    result = self.save_day(date_str, payloads)
+                    if result == 'DONE':
+                        completed += 1
+                    elif result == 'EMPTY':
+                        empty_days.append(datetime.strptime(date_str, '%Y%m%d').date())
+                    else:
+                        failed += 1
+
+        self.record_holidays(empty_days)
+
+        # 날짜 순서가 섞여 저장되므로 보조지표 상태는 마지막에 한 번 재계산
+        if completed:
+            rebuilt = rebuild_indicator_states()
+            self.stdout.write(f'보조지표 상태 재계산: {rebuilt}종목')
+            # 시장 지수는 앞 날짜부터 이어 붙이므로 백필한 첫날부터 끝까지 한 번에 다시 계산
+            written = refresh_market_indexes(days[0])
+            self.stdout.write(f'시장 지수 재계산: {written}건')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'백필 종료: 완료 {completed}일 / 빈 응답 {len(empty_days)}일 / 실패 {failed}일'
+        ))
+        if failed:
+            self.stdout.write('실패한 날짜는 같은 명령을 다시 실행하면 이어서 수집합니다.')
+
+    def save_day(self, date_str, payloads):
+        """
+        한 날짜 저장 + 체크포인트 기록.
+        반환값: 'DONE' (저장 완료), 'EMPTY' (모든 시장이 빈 응답, 체크포인트는 record_holidays 에서), None (일부 실패)
+        """
+        db_date = datetime.strptime(date_str, '%Y%m%d').date()
+
+        if any(items is None for items in payloads.values()):
+            save_krx_payloads(db_date, payloads, advance_indicators=False, refresh_indexes=False)
+            self.stdout.write(self.style.WARNING(f'{date_str}: 일부 시장 조회 실패, 다음 실행 때 재시도'))
+            return None
+
+        row_count = sum(len(items) for items in payloads.values())
+        if row_count == 0:
+            return 'EMPTY'
+
+        save_krx_payloads(db_date, payloads, advance_indicators=False, refresh_indexes=False)
+        KrxIngestCheckpoint.objects.update_or_create(
+            date=db_date,
+            defaults={'status': 'DONE', 'row_count': row_count},
+        )
+        self.stdout.write(f'{date_str}: DONE ({row_count}건)')
+        return 'DONE'
+
+    def record_holidays(self, empty_days):
+        """
+        응답이 비어 있던 날 중 실제 데이터가 있는 가장 최근 날보다 이전인 날만 휴장일(음력 휴장일 등)로 기록한다.
+        그 이후 날짜는 아직 공개 전일 수 있으므로 체크포인트를 남기지 않는다. (다음 실행 때 다시 조회)
+        """
+        latest = KrxIngestCheckpoint.objects.filter(status='DONE').aggregate(latest=Max('date'))['latest']
+        for day in sorted(empty_days):
+            if latest and day < latest:
+                KrxIngestCheckpoint.objects.update_or_create(
+                    date=day,
+                    defaults={'status': 'HOLIDAY', 'row_count': 0},
+                )
+                self.stdout.write(f'{day:%Y%m%d}: HOLIDAY')
+            else:
+                self.stdout.write(self.style.WARNING(f'{day:%Y%m%d}: 빈 응답 (아직 공개 전일 수 있어 체크포인트 없음)'))
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y%m%d').date()
+        except ValueError:
+            raise CommandError(f'날짜 형식이 잘못되었습니다: {value} (YYYYMMDD)')
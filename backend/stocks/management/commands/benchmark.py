@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stocks.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = '이전 구현과 현재 구현의 실행 시간 비교 (합성 데이터, DB 쓰기는 롤백)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'실행할 벤치마크 (기본값: 전체): {", ".join(BENCHMARKS)}')
+        parser.add_argument('--repeat', type=int, default=3, help='반복 횟수 (가장 빠른 값 사용)')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f'알 수 없는 벤치마크: {", ".join(unknown)}')
+
+        for name in names:
+            description, run = BENCHMARKS[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'[{name}] {description}'))
+            for case, before, after, note in run(max(options['repeat'], 1)):
+                line = f'  {case:<24} 이전 {before * 1000:10.2f}ms  현재 {after * 1000:10.2f}ms  {before / after:7.1f}배'
+                self.stdout.write(f'{line}  {note}'.rstrip())
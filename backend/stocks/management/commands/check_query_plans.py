@@ -0,0 +1,152 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max, Subquery, Value
+
+from stocks import views
+from stocks.indicators import series_query
+from stocks.matrix import close_rows_query
+from stocks.models import Stock, Chartprice, MarketBreadth, MarketIndex
+from stocks.screener import snapshot_query, volume_query
+from stocks.search import index_rows_query
+from stocks.services import (
+    etf_window_query,
+    existing_prices_query,
+    index_base_query,
+    index_price_rows_query,
+    latest_price_subquery,
+    mover_rows_query,
+    newer_etf_summaries_query,
+    stale_prices_query,
+)
+
+# 실행 계획에서 전체 스캔을 찾는 패턴 (DB 벤더별)
+FULL_SCAN_PATTERNS = {
+    # SEARCH 가 아닌 SCAN 은 테이블(또는 인덱스) 전체를 훑는 것
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def aggregate_query(queryset, **aggregates):
+    """queryset.aggregate(**aggregates) 와 같은 SQL 을 EXPLAIN 할 수 있는 QuerySet 으로"""
+    return queryset.annotate(all=Value(1)).values('all').annotate(**aggregates).values(*aggregates).order_by()
+
+
+def hot_queries(using):
+    """
+    stocks.views / stocks.services 등에서 자주 실행되는 쿼리 목록
+    실제 코드가 쓰는 쿼리 생성 함수를 그대로 불러서 만들기 때문에, 쿼리가 바뀌면 검사 대상도 같이 바뀐다.
+    """
+    ticker = '005930'
+    today = date.today()
+    year_ago = today - timedelta(days=365)
+    tickers = [f'{i:06d}' for i in range(50)]
+
+    queries = [
+        # views.stock_search (검색 자체는 메모리 인덱스, DB 는 찾은 종목만 in_bulk 로 조회)
+        ('stock_search', views.stock_snapshot_query().filter(pk__in=tickers[:10])),
+        # search.StockSearchIndex.sync: 종목 테이블이 바뀌었을 때 전체 재조회
+        ('search_index_sync', index_rows_query()),
+        # screener.StockScreener.load: 최신 시세 스냅샷 전체 / 최근 20거래일 거래량
+        ('screener_load', snapshot_query()),
+        ('screener_volume', volume_query(today - timedelta(days=30), today)),
+        # views.load_market_movers (캐시 미스일 때만)
+        ('movers_latest_date', aggregate_query(MarketBreadth.objects.all(), latest=Max('date'))),
+        ('movers_breadth', views.breadth_query(today)),
+        ('movers_rankings', views.movers_query(today)),
+        # views.market_indexes / views.market_index_chart
+        ('market_indexes_latest', aggregate_query(MarketIndex.objects.all(), latest=Max('date'))),
+        ('market_indexes', views.market_index_query(today)),
+        ('market_index_chart', views.index_chart_query('KOSPI', year_ago, today)),
+        # views.etf_list (ETF 요약 테이블만 정렬)
+        ('etf_list', views.etf_summary_query('-premium', anomaly=True)[:20]),
+        # views.stock_detail (+ StockSerializer.latest_price 조인)
+        ('stock_detail', views.stock_snapshot_query().filter(ticker=ticker)),
+        # views.watchlist_list
+        ('watchlist_list', views.watchlist_query(1)),
+        # views.stock_chart_data
+        ('stock_chart_data', views.chart_rows_query(ticker, year_ago, today)),
+        # views.stock_candles (일봉 / 주봉·월봉)
+        ('stock_candles_daily', views.candles_query(ticker, '1d', year_ago, today)),
+        ('stock_candles_bars', views.candles_query(ticker, '1w', today - timedelta(days=365 * 5), today)),
+        # indicators.load_series (보조지표 계산용 전체 시세)
+        ('indicator_series', series_query(ticker)),
+        # views.stock_correlated
+        ('stock_correlated', views.correlated_query(ticker)[:10]),
+        # matrix.load_close_frame (상관계수 배치 / 백테스트)
+        ('close_matrix', close_rows_query(year_ago, today)),
+        ('backtest_closes', close_rows_query(today - timedelta(days=365 * 10), today, tickers)),
+        # services.refresh_latest_prices 의 상관 서브쿼리 (UPDATE 대신 같은 서브쿼리를 SELECT 로)
+        ('refresh_latest_prices', Stock.objects.filter(ticker__in=tickers).annotate(
+            latest=Subquery(latest_price_subquery()),
+        )),
+        # services.save_data: 해당 날짜 기존 시세 조회
+        ('save_data_existing', existing_prices_query(today, tickers)),
+        # services.save_krx_payloads: 응답에 없는 시세 정리
+        ('save_krx_stale', stale_prices_query(today, tickers)),
+        # services.refresh_market_movers: 날짜 전체 시세 + 시장 구분
+        ('refresh_market_movers', mover_rows_query(today)),
+        # services.refresh_etf_summaries: 최근 구간 ETF 시세 / 과거 날짜 백필 확인
+        ('refresh_etf_window', etf_window_query(today - timedelta(days=90), today)),
+        ('etf_summary_newer', newer_etf_summaries_query(today)),
+        # services.aggregate_market_indexes: 구간 전 종목 시세 + 시장 구분 / 직전 지수 값
+        ('market_index_prices', index_price_rows_query(year_ago, today)),
+        ('market_index_base', index_base_query('KOSPI', today)[:1]),
+        # services.get_last_chart_date
+        ('last_chart_date', aggregate_query(Chartprice.objects.filter(stock_id=ticker), last=Max('date'))),
+    ]
+    return [(name, queryset.using(using)) for name, queryset in queries]
+
+
+# 전체 스캔이 불가피한 쿼리 {이름: 이유}
+ALLOWED_SCANS = {
+    'search_index_sync': '메모리 검색 인덱스 동기화는 종목 전체를 읽음 (바뀌었을 때만)',
+    'screener_load': '스크리너 테이블은 종목 전체 스냅샷을 읽음 (시세가 바뀌었을 때만)',
+    'etf_list': 'ETF 요약은 ETF 당 한 행이고, 괴리율 인덱스 순서대로 읽다가 한 페이지에서 멈춤',
+}
+
+
+class Command(BaseCommand):
+    help = '주요 쿼리의 실행 계획(EXPLAIN)을 확인하고 전체 스캔이 있으면 실패'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='검사할 DB alias (PostgreSQL alias 를 주면 PostgreSQL 로 확인)')
+        parser.add_argument('--verbose-plan', action='store_true', help='실행 계획 전체 출력')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        vendor = connections[using].vendor
+        pattern = FULL_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f'지원하지 않는 DB 입니다: {vendor}')
+
+        queries = hot_queries(using)
+
+        failures = []
+        with transaction.atomic(using=using):
+            if vendor == 'postgresql':
+                # 빈 테이블에서는 플래너가 seq scan 을 고르므로 인덱스 경로가 있는지만 확인
+                with connections[using].cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in queries:
+                plan = queryset.explain()
+                scanned = pattern.findall(plan)
+
+                if options['verbose_plan']:
+                    self.stdout.write(f'--- {name}\n{plan}')
+
+                if scanned and name in ALLOWED_SCANS:
+                    self.stdout.write(f'[허용] {name}: {", ".join(scanned)} 전체 스캔 ({ALLOWED_SCANS[name]})')
+                elif scanned:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'[실패] {name}: {", ".join(scanned)} 전체 스캔'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'[통과] {name}'))
+
+        if failures:
+            raise CommandError(f'전체 스캔 쿼리 {len(failures)}개: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'{vendor}: 쿼리 {len(queries)}개 실행 계획 확인 완료'))
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from stocks.matrix import daily_returns, load_close_frame, standardize_returns, top_correlated
+from stocks.models import StockCorrelation
+from stocks.services import BULK_BATCH_SIZE
+from stocks.utils import init_worker
+
+
+def _correlate_block(path, start, stop, k):
+    # 워커 프로세스: 디스크의 수익률 행렬을 memmap 으로 열어서 블록 하나만 계산
+    z = np.load(path, mmap_mode='r')
+    picked, values = top_correlated(z, start, stop, k)
+    return start, picked, values
+
+
+class Command(BaseCommand):
+    help = '최근 구간(--days) 전 종목 일간 수익률 상관계수/공분산을 블록 단위로 계산해 종목별 상위 종목 저장'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=252, help='계산 구간 (거래일 수)')
+        parser.add_argument('--end', type=str, help='구간 마지막 날 (YYYYMMDD, 기본값: 오늘)')
+        parser.add_argument('--top', type=int, default=20, help='종목별로 저장할 상위 종목 수')
+        parser.add_argument('--block', type=int, default=256, help='한 번에 계산할 종목 수 (블록 크기)')
+        parser.add_argument('--workers', type=int, default=4, help='계산 프로세스 수')
+        parser.add_argument('--min-coverage', type=float, default=0.9, help='구간 중 시세가 있어야 하는 최소 비율')
+
+    def handle(self, *args, **options):
+        try:
+            end = datetime.strptime(options['end'], '%Y%m%d').date() if options['end'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('날짜 형식이 잘못되었습니다. (YYYYMMDD)')
+        days = options['days']
+        started = time.monotonic()
+
+        # 1. 구간 종가를 (날짜 × 종목) 으로 맞추고 수익률 → 표준화
+        # 빠진 종가를 직전 값으로 채우면 거래정지/상장폐지 종목이 변동 없는 수익률로 남아 상관계수가 왜곡되므로 채우지 않음
+        # - 구간 마지막 날 종가가 없는 종목(거래정지 중 / 상장폐지)은 제외
+        # - 중간에 빠진 날의 수익률은 NaN 으로 두고, 관측 비율이 --min-coverage 미만이면 제외 (standardize_returns)
+        frame = load_close_frame(end - timedelta(days=days * 2), end).iloc[-(days + 1):]
+        if not frame.empty:
+            frame = frame.loc[:, frame.iloc[-1].notna()]
+        z, columns, std = standardize_returns(daily_returns(frame.to_numpy()), options['min_coverage'])
+        tickers = frame.columns[columns]
+        if len(tickers) < 2:
+            raise CommandError('상관계수를 계산할 종목이 부족합니다.')
+        self.stdout.write(f'수익률 행렬 {z.shape[0]}일 × {z.shape[1]}종목 ({frame.index[0]} ~ {frame.index[-1]})')
+
+        # 2. 워커들이 같은 행렬을 읽도록 float32 memmap 파일로 저장 (열 단위 블록을 연속으로 읽도록 Fortran 순서)
+        path = self.write_matrix(z)
+
+        # 3. 블록별 상위 종목 계산 (프로세스 풀)
+        connections.close_all()
+        top, block, n = options['top'], options['block'], len(tickers)
+        results = []
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=init_worker) as executor:
+            futures = [
+                executor.submit(_correlate_block, path, start, min(start + block, n), top)
+                for start in range(0, n, block)
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+        # 4. 상관계수 → 공분산 (cov = corr × σi × σj) 후 전체 교체
+        window_end, window_days = frame.index[-1], z.shape[0]
+        rows = []
+        for start, picked, values in results:
+            for offset, (others, correlations) in enumerate(zip(picked, values)):
+                i = start + offset
+                rows.extend(
+                    StockCorrelation(
+                        stock_id=tickers[i], rank=rank, other_id=tickers[j],
+                        correlation=float(corr), covariance=float(corr * std[i] * std[j]),
+                        window_end=window_end, window_days=window_days,
+                    )
+                    for rank, (j, corr) in enumerate(zip(others, correlations), 1)
+                )
+
+        with transaction.atomic():
+            StockCorrelation.objects.all().delete()
+            StockCorrelation.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'상관계수 계산 완료: {n}종목, {len(rows)}건 저장 ({time.monotonic() - started:.1f}초)'
+        ))
+
+    def write_matrix(self, z):
+        os.makedirs(settings.MATRIX_CACHE_DIR, exist_ok=True)
+        path = os.path.join(settings.MATRIX_CACHE_DIR, 'returns.npy')
+
+        # 임시 파일에 쓴 뒤 교체해서 다른 작업이 반쯤 쓰인 파일을 읽지 않도록 함
+        fd, tmp_path = tempfile.mkstemp(dir=settings.MATRIX_CACHE_DIR, suffix='.npy')
+        os.close(fd)
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=z.shape, fortran_order=True)
+        matrix[:] = z
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, path)
+        return path
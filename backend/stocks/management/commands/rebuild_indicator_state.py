@@ -0,0 +1,76 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stocks.indicators import (
+    STREAM_COLUMNS,
+    advance_state,
+    empty_state,
+    load_series_many,
+    recompute_values,
+    state_values,
+)
+from stocks.models import IndicatorState, Stock
+from stocks.services import rebuild_indicator_states
+
+# 스트리밍 값과 전체 재계산 값의 허용 오차
+REL_TOLERANCE = 1e-9
+ABS_TOLERANCE = 1e-6
+
+
+class Command(BaseCommand):
+    help = '보조지표 스트리밍 상태(IndicatorState) 전체 재계산 / 전체 재계산 결과와 일치하는지 검증'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', nargs='*', help='대상 종목코드 (기본값: 전체)')
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='재계산하지 않고, 봉 단위 스트리밍 결과와 저장된 상태가 전체 재계산과 같은지 확인',
+        )
+
+    def handle(self, *args, **options):
+        tickers = options['tickers'] or list(Stock.objects.order_by('ticker').values_list('ticker', flat=True))
+
+        if options['verify']:
+            self.verify(tickers)
+            return
+
+        written = rebuild_indicator_states(tickers)
+        self.stdout.write(self.style.SUCCESS(f'보조지표 상태 재계산 완료: {written}종목'))
+
+    def verify(self, tickers):
+        stored = IndicatorState.objects.in_bulk(tickers)
+        failures = []
+        checked = 0
+        for ticker, series in load_series_many(tickers):
+            expected = recompute_values(series)
+
+            # 첫 봉부터 한 봉씩 이어서 계산한 결과
+            state = empty_state()
+            _, _, high, low, close = series
+            for bar in zip(high, low, close):
+                state = advance_state(state, *bar)
+
+            candidates = {'streamed': state_values(state)}
+            if ticker in stored:
+                current = stored[ticker]
+                candidates['stored'] = {name: getattr(current, name) for name in STREAM_COLUMNS}
+            else:
+                failures.append(f'{ticker}: 저장된 상태 없음')
+
+            for label, values in candidates.items():
+                for name in STREAM_COLUMNS:
+                    if not self.same(values[name], expected[name]):
+                        failures.append(f'{ticker} {label} {name}: {values[name]} != {expected[name]}')
+            checked += 1
+
+        for failure in failures[:50]:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f'{checked}종목 중 불일치 {len(failures)}건')
+        self.stdout.write(self.style.SUCCESS(f'{checked}종목: 스트리밍 결과가 전체 재계산과 일치'))
+
+    def same(self, value, expected):
+        if value is None or expected is None:
+            return value is None and expected is None
+        return math.isclose(value, expected, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stocks.services import refresh_market_indexes
+
+
+class Command(BaseCommand):
+    help = 'DailyPrice 로 시장별 지수(MarketIndex) 재계산 (최초 적재 또는 복구용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, required=True, help='시작일 (YYYYMMDD, 이 날짜 직전 지수에서 이어 붙임)')
+        parser.add_argument('--end', type=str, help='종료일 (YYYYMMDD, 기본값: 마지막 시세일)')
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['start'], '%Y%m%d').date()
+            end = datetime.strptime(options['end'], '%Y%m%d').date() if options['end'] else None
+        except ValueError:
+            raise CommandError('날짜 형식이 잘못되었습니다. (YYYYMMDD)')
+
+        written = refresh_market_indexes(start, end)
+        self.stdout.write(self.style.SUCCESS(f'시장 지수 재계산 완료: {written}건'))
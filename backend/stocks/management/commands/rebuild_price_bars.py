@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from stocks.services import refresh_price_bars
+
+
+class Command(BaseCommand):
+    help = 'DailyPrice 로 주봉/월봉(PriceBar) 전체 재계산 (최초 적재 또는 복구용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, required=True, help='시작일 (YYYYMMDD)')
+        parser.add_argument('--end', type=str, help='종료일 (YYYYMMDD, 기본값: 오늘)')
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['start'], '%Y%m%d').date()
+            end = datetime.strptime(options['end'], '%Y%m%d').date() if options['end'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('날짜 형식이 잘못되었습니다. (YYYYMMDD)')
+
+        # 메모리를 일정하게 유지하도록 한 달씩 계산
+        total = {'1w': 0, '1m': 0}
+        for month in pd.period_range(start, end, freq='M'):
+            first = max(start, month.start_time.date())
+            last = min(end, month.end_time.date())
+            result = refresh_price_bars(first, last)
+            total['1w'] += result['1w']
+            total['1m'] += result['1m']
+            self.stdout.write(f'{month}: 주봉 {result["1w"]}건 / 월봉 {result["1m"]}건')
+
+        self.stdout.write(self.style.SUCCESS(f'봉 재계산 완료: 주봉 {total["1w"]}건 / 월봉 {total["1m"]}건'))
@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from stocks.models import Stock
+from stocks.services import fetch_chart_rows, update_chart_data
+
+# 재시도 회차 사이 대기 (초): 1회차 RETRY_BACKOFF_BASE, 이후 두 배씩
+RETRY_BACKOFF_BASE = 2
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지고 최대 capacity 개까지 쌓이는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class Command(BaseCommand):
+    help = '전체 종목 차트 데이터 병렬 갱신 (FDR 호출 속도 제한 + 실패 재시도)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', nargs='*', help='갱신할 종목코드 (기본값: 전체)')
+        parser.add_argument('--market', type=str, help='시장 필터 (KOSPI / KOSDAQ / ETF)')
+        parser.add_argument('--workers', type=int, default=8, help='동시 다운로드 수')
+        parser.add_argument('--rate', type=float, default=5.0, help='초당 최대 FDR 호출 수')
+        parser.add_argument('--retries', type=int, default=2, help='실패 종목 재시도 횟수')
+        parser.add_argument('--period', type=int, default=5, help='전체 적재 기간 (년)')
+        parser.add_argument('--full', action='store_true', help='증분 대신 전체 재적재')
+        parser.add_argument('--no-cache', action='store_true', help='로컬 FDR 캐시를 쓰지 않고 새로 받기')
+
+    def handle(self, *args, **options):
+        stocks = Stock.objects.order_by('ticker')
+        if options['tickers']:
+            stocks = stocks.filter(ticker__in=options['tickers'])
+        if options['market']:
+            stocks = stocks.filter(market_type=options['market'])
+        tickers = list(stocks.values_list('ticker', flat=True))
+
+        self.period = options['period']
+        self.incremental = not options['full']
+        self.use_cache = not options['no_cache']
+        self.bucket = TokenBucket(options['rate'])
+        self.latencies = []
+        self.errors = {}
+        self.totals = {'ok': 0, 'fetched': 0, 'written': 0, 'full': 0}
+        self.total = len(tickers)
+
+        self.stdout.write(f'차트 갱신 시작: {self.total}종목, 워커 {options["workers"]}개, 초당 {options["rate"]}회')
+        started = time.monotonic()
+
+        # 1차 실행 후 실패한 종목만 재시도 큐로 다시 돌림
+        queue = tickers
+        for attempt in range(options['retries'] + 1):
+            if not queue:
+                break
+            if attempt:
+                self.stdout.write(self.style.WARNING(f'재시도 {attempt}회차: {len(queue)}종목'))
+                time.sleep(RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+            queue = self.run_round(queue, options['workers'])
+
+        self.print_summary(time.monotonic() - started, queue)
+
+    def fetch(self, ticker, start_date, use_cache):
+        # 모든 FDR 호출(수정주가 재적재 포함)이 같은 토큰 버킷을 거침
+        self.bucket.acquire()
+        started = time.monotonic()
+        rows = fetch_chart_rows(ticker, start_date, use_cache)
+        self.latencies.append(time.monotonic() - started)
+        return rows
+
+    def update(self, ticker):
+        # 워커 스레드: 증분/수정주가 재적재/저장은 update_chart_data 그대로 사용
+        try:
+            return update_chart_data(
+                ticker, self.period, incremental=self.incremental, use_cache=self.use_cache, fetch_rows=self.fetch,
+            )
+        finally:
+            connection.close()
+
+    def run_round(self, queue, workers):
+        failed = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.update, ticker): ticker for ticker in queue}
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    ticker = futures.pop(future)
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        stats = {'error': str(e)}
+
+                    if stats is None:
+                        # 그사이 삭제된 종목
+                        continue
+                    if stats['error']:
+                        self.errors[ticker] = stats['error']
+                        failed.append(ticker)
+                        continue
+
+                    self.errors.pop(ticker, None)
+                    self.totals['ok'] += 1
+                    self.totals['fetched'] += stats['fetched']
+                    self.totals['written'] += stats['written']
+                    self.totals['full'] += stats['mode'] == 'full'
+                    if self.totals['ok'] % 100 == 0:
+                        self.stdout.write(f'[{self.totals["ok"]}/{self.total}] 진행 중...')
+        return failed
+
+    def print_summary(self, elapsed, failed):
+        totals = self.totals
+        self.stdout.write(
+            f'완료 {totals["ok"]}/{self.total}종목 ({elapsed:.1f}초) | '
+            f'수신 {totals["fetched"]}건 / 저장 {totals["written"]}건 | 전체 적재 {totals["full"]}종목'
+        )
+
+        if self.latencies:
+            p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99])
+            self.stdout.write(
+                f'FDR 호출 응답시간 p50 {p50:.2f}초 / p90 {p90:.2f}초 / p99 {p99:.2f}초 / 최대 {max(self.latencies):.2f}초'
+            )
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'최종 실패 {len(failed)}종목'))
+            for ticker in failed:
+                self.stdout.write(f'  {ticker}: {self.errors.get(ticker)}')
+        else:
+            self.stdout.write(self.style.SUCCESS('차트 갱신 완료'))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from .models import Chartprice
+
+# 여러 종목의 종가를 날짜 기준으로 맞춘 행렬 (상관계수 배치 작업 / 포트폴리오 백테스트 공용)
+# - 행: 날짜, 열: 종목, 해당 날짜에 종가가 없으면 NaN
+
+
+def close_rows_query(start, end, tickers=None):
+    prices = Chartprice.objects.filter(date__gte=start, date__lte=end)
+    if tickers is not None:
+        prices = prices.filter(stock_id__in=tickers)
+
+    # 기본 정렬(date)은 임시 B-tree 정렬만 추가하므로 빼고, 피벗 후 날짜로 정렬
+    return prices.order_by().values_list('date', 'stock_id', 'close_price')
+
+
+def load_close_frame(start, end, tickers=None):
+    """start ~ end 의 Chartprice 종가를 (날짜 × 종목) DataFrame 으로 읽는다."""
+    rows = close_rows_query(start, end, tickers)
+    frame = pd.DataFrame.from_records(list(rows), columns=['date', 'ticker', 'close'])
+    if frame.empty:
+        return pd.DataFrame(dtype=np.float64)
+    return frame.pivot(index='date', columns='ticker', values='close').sort_index().astype(np.float64)
+
+
+def fill_gaps(frame):
+    """중간에 빠진 종가(거래정지 등)는 직전 종가로 채운다. (상장 전 구간은 NaN 유지)"""
+    return frame.ffill()
+
+
+def daily_returns(closes):
+    """(날짜 × 종목) 종가 배열 → 일간 수익률 배열 (행이 하나 줄고, 앞뒤 중 하나라도 없으면 NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return closes[1:] / closes[:-1] - 1
+
+
+def standardize_returns(returns, min_coverage):
+    """
+    종목별로 평균 0 / 분산 1 로 맞춘 뒤 sqrt(T) 로 나눈 행렬 z 를 만든다.
+    z.T @ z 가 곧 상관계수 행렬 (빠진 날은 평균값으로 보고 0 을 채움).
+    관측치 비율이 min_coverage 미만이거나 변동이 없는 종목은 제외.
+    반환값: (z float32, 남은 열 위치, 종목별 표준편차)
+    """
+    observed = ~np.isnan(returns)
+    keep = observed.mean(axis=0) >= min_coverage
+    returns = returns[:, keep]
+
+    mean = np.nanmean(returns, axis=0)
+    std = np.nanstd(returns, axis=0)
+    varying = std > 0
+    returns, mean, std = returns[:, varying], mean[varying], std[varying]
+
+    z = np.nan_to_num((returns - mean) / std) / np.sqrt(len(returns))
+    return z.astype(np.float32), np.flatnonzero(keep)[varying], std
+
+
+def top_correlated(z, start, stop, k):
+    """
+    z[:, start:stop] 열(종목)마다 상관계수가 가장 높은 다른 종목 k 개.
+    한 블록씩 (블록 크기 × 전체 종목) 만 계산하고 argpartition 으로 k 개만 골라 정렬한다.
+    반환값: (종목 위치 (B × k), 상관계수 (B × k))
+    """
+    block = np.asarray(z[:, start:stop])
+    corr = block.T @ z
+    rows = np.arange(stop - start)
+    corr[rows, rows + start] = -np.inf   # 자기 자신 제외
+
+    k = min(k, corr.shape[1] - 1)
+    picked = np.argpartition(-corr, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(corr, picked, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return np.take_along_axis(picked, order, axis=1), np.take_along_axis(values, order, axis=1)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0006_chartprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KrxIngestCheckpoint',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('DONE', '수집 완료'), ('HOLIDAY', '휴장일')], default='DONE', max_length=10)),
+                ('row_count', models.IntegerField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
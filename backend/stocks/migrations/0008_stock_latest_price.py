@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_latest_price(apps, schema_editor):
+    Stock = apps.get_model('stocks', 'Stock')
+    DailyPrice = apps.get_model('stocks', 'DailyPrice')
+    latest = DailyPrice.objects.filter(stock=models.OuterRef('pk')).order_by('-date').values('pk')[:1]
+    Stock.objects.update(latest_price=models.Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0007_krxingestcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='latest_price',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stocks.dailyprice'),
+        ),
+        migrations.RunPython(fill_latest_price, migrations.RunPython.noop),
+    ]
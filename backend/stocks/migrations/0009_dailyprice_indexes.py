@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0008_stock_latest_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyprice',
+            index=models.Index(fields=['date', 'stock'], name='dailyprice_date_stock'),
+        ),
+    ]
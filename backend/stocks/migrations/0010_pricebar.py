@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0009_dailyprice_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('1w', '주봉'), ('1m', '월봉')], max_length=2)),
+                ('date', models.DateField()),
+                ('open_price', models.BigIntegerField()),
+                ('high_price', models.BigIntegerField()),
+                ('low_price', models.BigIntegerField()),
+                ('close_price', models.BigIntegerField()),
+                ('volume', models.BigIntegerField()),
+                ('trading_value', models.BigIntegerField(blank=True, null=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_bars', to='stocks.stock')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('stock', 'interval', 'date')},
+            },
+        ),
+    ]
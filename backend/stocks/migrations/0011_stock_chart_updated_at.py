@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0010_pricebar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='chart_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0012_stock_price_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorState',
+            fields=[
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='indicator_state', serialize=False, to='stocks.stock')),
+                ('date', models.DateField()),
+                ('state', models.JSONField()),
+                ('prev_state', models.JSONField(blank=True, null=True)),
+                ('sma20', models.FloatField(blank=True, null=True)),
+                ('sma60', models.FloatField(blank=True, null=True)),
+                ('ema20', models.FloatField(blank=True, null=True)),
+                ('rsi14', models.FloatField(blank=True, null=True)),
+                ('macd', models.FloatField(blank=True, null=True)),
+                ('macd_signal', models.FloatField(blank=True, null=True)),
+                ('bb_upper', models.FloatField(blank=True, null=True)),
+                ('bb_lower', models.FloatField(blank=True, null=True)),
+                ('atr14', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
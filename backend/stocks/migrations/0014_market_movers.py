@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0013_indicatorstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketBreadth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('market_type', models.CharField(max_length=20)),
+                ('advancers', models.IntegerField(default=0)),
+                ('decliners', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('trading_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'market_type'],
+                'unique_together': {('date', 'market_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MarketMover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('market_type', models.CharField(max_length=20)),
+                ('kind', models.CharField(choices=[('gainers', '상승률 상위'), ('losers', '하락률 상위'), ('value', '거래대금 상위')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('close_price', models.BigIntegerField()),
+                ('fluctuation_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('trading_value', models.BigIntegerField(blank=True, null=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stocks.stock')),
+            ],
+            options={
+                'ordering': ['date', 'market_type', 'kind', 'rank'],
+                'unique_together': {('date', 'market_type', 'kind', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0014_market_movers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCorrelation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('correlation', models.FloatField()),
+                ('covariance', models.FloatField()),
+                ('window_end', models.DateField()),
+                ('window_days', models.IntegerField()),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stocks.stock')),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='correlations', to='stocks.stock')),
+            ],
+            options={
+                'ordering': ['stock', 'rank'],
+                'unique_together': {('stock', 'rank')},
+            },
+        ),
+    ]
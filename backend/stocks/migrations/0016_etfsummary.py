@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0015_stockcorrelation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtfSummary',
+            fields=[
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='etf_summary', serialize=False, to='stocks.stock')),
+                ('date', models.DateField(db_index=True)),
+                ('close_price', models.BigIntegerField()),
+                ('nav', models.FloatField(blank=True, null=True)),
+                ('trading_value', models.BigIntegerField(blank=True, null=True)),
+                ('premium', models.FloatField(blank=True, null=True)),
+                ('premium_avg', models.FloatField(blank=True, null=True)),
+                ('premium_z', models.FloatField(blank=True, null=True)),
+                ('tracking_error', models.FloatField(blank=True, null=True)),
+                ('anomaly', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['premium'], name='etfsummary_premium')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0016_etfsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('market_type', models.CharField(max_length=20)),
+                ('cap_index', models.FloatField()),
+                ('equal_index', models.FloatField()),
+                ('cap_return', models.FloatField()),
+                ('equal_return', models.FloatField()),
+                ('market_cap', models.BigIntegerField(default=0)),
+                ('trading_value', models.BigIntegerField(default=0)),
+                ('value_share', models.FloatField(default=0)),
+                ('constituents', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['market_type', 'date'],
+                'indexes': [models.Index(fields=['date'], name='marketindex_date')],
+                'unique_together': {('market_type', 'date')},
+            },
+        ),
+    ]
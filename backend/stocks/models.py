@@ -15,6 +15,15 @@ class Stock(models.Model):
     market_cap = models.BigIntegerField(null=True, blank=True)
     total_shares = models.BigIntegerField(null=True, blank=True)
 
+    # 가장 최근 일별 시세 스냅샷 (수집 시 갱신, 목록 조회에서 조인 한 번으로 읽음)
+    latest_price = models.ForeignKey(
+        'DailyPrice', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    # 차트(Chartprice) 마지막 변경 시각: 차트 응답 캐시/ETag 버전으로 사용
+    chart_updated_at = models.DateTimeField(null=True, blank=True)
+    # 일별 시세(DailyPrice) 마지막 수집 시각: 보조지표 캐시 버전으로 사용
+    price_updated_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f'[{self.asset_type}]: {self.name}({self.ticker})'
 
@@ -38,6 +47,12 @@ class DailyPrice(models.Model):
     class Meta:
         unique_together = ('stock', 'date')
         ordering = ['-date']
+        # 종목별 최근 N일 조회 (최신 시세 스냅샷, 상세/차트) 는 unique_together 의 (stock, date) 인덱스를
+        # 역방향으로 읽으면 되므로 별도 인덱스를 두지 않음
+        indexes = [
+            # 특정 날짜의 전 종목 조회 (일별 수집 upsert/정리)
+            models.Index(fields=['date', 'stock'], name='dailyprice_date_stock'),
+        ]
 
     def __str__(self):
         return f'{self.stock.name} - {self.date}'
@@ -58,4 +73,190 @@ class Chartprice(models.Model):
 
     class Meta:
         ordering = ['date']
-        unique_together = ('stock', 'date')
\ No newline at end of file
+        unique_together = ('stock', 'date')
+
+# 주봉/월봉 (DailyPrice 를 집계해서 저장, 수집 후 해당 주/월만 다시 계산)
+class PriceBar(models.Model):
+    INTERVAL_CHOICES = (
+        ('1w', '주봉'),
+        ('1m', '월봉'),
+    )
+
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='price_bars')
+    interval = models.CharField(max_length=2, choices=INTERVAL_CHOICES)
+    # 구간 시작일 (주봉: 월요일, 월봉: 1일)
+    date = models.DateField()
+
+    open_price = models.BigIntegerField()
+    high_price = models.BigIntegerField()
+    low_price = models.BigIntegerField()
+    close_price = models.BigIntegerField()
+    volume = models.BigIntegerField()
+    trading_value = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('stock', 'interval', 'date')
+        ordering = ['date']
+
+    def __str__(self):
+        return f'{self.stock_id} {self.interval} {self.date}'
+
+# KRX 일별 수집 체크포인트 (backfill_krx 재시작 시 완료된 날짜는 건너뜀)
+class KrxIngestCheckpoint(models.Model):
+    STATUS_CHOICES = (
+        ('DONE', '수집 완료'),
+        ('HOLIDAY', '휴장일'),
+    )
+
+    date = models.DateField(primary_key=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='DONE')
+    row_count = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'{self.date} ({self.status})'
+
+# 종목별 보조지표 스트리밍 상태 (수집 때 새 봉 하나만큼만 이어서 계산, stocks.indicators 참고)
+class IndicatorState(models.Model):
+    stock = models.OneToOneField(Stock, on_delete=models.CASCADE, primary_key=True, related_name='indicator_state')
+    # 마지막으로 반영한 봉 날짜
+    date = models.DateField()
+    # 다음 봉 계산용 상태 / 마지막 봉 반영 전 상태 (같은 날짜 재수집 시 여기서 다시 계산)
+    state = models.JSONField()
+    prev_state = models.JSONField(null=True, blank=True)
+
+    # 마지막 봉 기준 지표 값 (워밍업 중이면 NULL)
+    sma20 = models.FloatField(null=True, blank=True)
+    sma60 = models.FloatField(null=True, blank=True)
+    ema20 = models.FloatField(null=True, blank=True)
+    rsi14 = models.FloatField(null=True, blank=True)
+    macd = models.FloatField(null=True, blank=True)
+    macd_signal = models.FloatField(null=True, blank=True)
+    bb_upper = models.FloatField(null=True, blank=True)
+    bb_lower = models.FloatField(null=True, blank=True)
+    atr14 = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.stock_id} ({self.date})'
+
+# 거래일·시장별 상승률/하락률/거래대금 상위 종목 (수집 후 미리 계산해 두는 홈 화면용 랭킹)
+class MarketMover(models.Model):
+    KIND_CHOICES = (
+        ('gainers', '상승률 상위'),
+        ('losers', '하락률 상위'),
+        ('value', '거래대금 상위'),
+    )
+
+    date = models.DateField()
+    market_type = models.CharField(max_length=20)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='+')
+
+    close_price = models.BigIntegerField()
+    fluctuation_rate = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    trading_value = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('date', 'market_type', 'kind', 'rank')
+        ordering = ['date', 'market_type', 'kind', 'rank']
+
+    def __str__(self):
+        return f'{self.date} {self.market_type} {self.kind} #{self.rank} {self.stock_id}'
+
+# 거래일·시장별 상승/하락/보합 종목 수
+class MarketBreadth(models.Model):
+    date = models.DateField()
+    market_type = models.CharField(max_length=20)
+    advancers = models.IntegerField(default=0)
+    decliners = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    trading_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'market_type')
+        ordering = ['date', 'market_type']
+
+    def __str__(self):
+        return f'{self.date} {self.market_type} +{self.advancers}/-{self.decliners}'
+
+# 종목별 수익률 상관계수 상위 종목 (compute_correlations 배치 작업 결과)
+class StockCorrelation(models.Model):
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='correlations')
+    rank = models.PositiveSmallIntegerField()
+    other = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='+')
+    correlation = models.FloatField()
+    # 일간 수익률 공분산
+    covariance = models.FloatField()
+    # 계산 구간 (마지막 날짜, 거래일 수)
+    window_end = models.DateField()
+    window_days = models.IntegerField()
+
+    class Meta:
+        unique_together = ('stock', 'rank')
+        ordering = ['stock', 'rank']
+
+    def __str__(self):
+        return f'{self.stock_id} #{self.rank} {self.other_id} ({self.correlation:.2f})'
+
+# ETF 별 괴리율 / 추적오차 요약 (수집 후 전 ETF 를 한 번에 계산, stocks.etf 참고)
+class EtfSummary(models.Model):
+    stock = models.OneToOneField(Stock, on_delete=models.CASCADE, primary_key=True, related_name='etf_summary')
+    # 기준일 (마지막으로 반영한 거래일)
+    date = models.DateField(db_index=True)
+
+    close_price = models.BigIntegerField()
+    nav = models.FloatField(null=True, blank=True)
+    trading_value = models.BigIntegerField(null=True, blank=True)
+
+    # 괴리율 (종가 / NAV - 1), 계산 구간 평균 괴리율, 괴리율 z-score, 연율화 추적오차
+    premium = models.FloatField(null=True, blank=True)
+    premium_avg = models.FloatField(null=True, blank=True)
+    premium_z = models.FloatField(null=True, blank=True)
+    tracking_error = models.FloatField(null=True, blank=True)
+    # |z| 가 기준 이상인 이상 괴리
+    anomaly = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ETF 목록 괴리율 정렬
+            models.Index(fields=['premium'], name='etfsummary_premium'),
+        ]
+
+    def __str__(self):
+        return f'{self.stock_id} ({self.date}) {self.premium}'
+
+# 시장별 일간 지수 (수집 후 전 종목 시세를 날짜·시장 단위로 집계해 이어 붙임, 지수 차트용)
+class MarketIndex(models.Model):
+    date = models.DateField()
+    market_type = models.CharField(max_length=20)
+
+    # 시가총액 가중 / 동일 가중 지수 (첫 계산일 = 1000) 와 그날 수익률
+    cap_index = models.FloatField()
+    equal_index = models.FloatField()
+    cap_return = models.FloatField()
+    equal_return = models.FloatField()
+
+    # 시가총액 합계 (상장주식수 × 종가), 거래대금 합계와 전체 시장 거래대금 중 비중
+    market_cap = models.BigIntegerField(default=0)
+    trading_value = models.BigIntegerField(default=0)
+    value_share = models.FloatField(default=0)
+    constituents = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('market_type', 'date')
+        ordering = ['market_type', 'date']
+        indexes = [
+            # 최신 날짜 / 특정 날짜의 전 시장 조회
+            models.Index(fields=['date'], name='marketindex_date'),
+        ]
+
+    def __str__(self):
+        return f'{self.market_type} {self.date} {self.cap_index:.2f}'
@@ -0,0 +1,143 @@
+import html
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+# 네이버 뉴스 검색 API 프록시 캐시
+# - 종목별로(종목코드 키, 검색어는 종목명) 응답을 NEWS_FRESH_TTL 동안은 그대로 사용
+# - 그 뒤 NEWS_STALE_TTL 까지는 지난 응답을 바로 돌려주고 뒤에서 갱신 (stale-while-revalidate)
+# - 같은 종목의 동시 요청은 프로세스 안에서 업스트림 호출 하나를 공유 (single-flight)
+# - 업스트림 호출은 NEWS_TIMEOUT 초를 넘기면 기다리지 않음
+# - 응답을 받을 때 한 번만 정리(normalize)해서 원본과 함께 저장
+
+NEWS_API_URL = 'https://openapi.naver.com/v1/search/news.json'
+NEWS_DISPLAY = 20
+NEWS_PUBLISHER = '네이버뉴스'
+
+TAG_RE = re.compile(r'<[^<]+?>')
+# 네이버 pubDate 고정 형식 'Mon, 13 Oct 2025 09:10:00 +0900' (표시는 기사 시간대 그대로)
+PUB_DATE_RE = re.compile(r'\w{3}, (\d{1,2}) (\w{3}) \d{4} (\d{2}):(\d{2})')
+MONTHS = {
+    name: f'{i:02d}'
+    for i, name in enumerate(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)
+}
+
+# 응답 캐시 신선도 / 최대 보관 시간 (초)
+NEWS_FRESH_TTL = 60
+NEWS_STALE_TTL = 60 * 10
+
+# 업스트림 호출 제한 시간 (초): httpx 의 connect/read 타임아웃 + 전체 대기 상한
+NEWS_CONNECT_TIMEOUT = 2
+NEWS_TIMEOUT = 5
+
+_client = httpx.Client(timeout=httpx.Timeout(NEWS_TIMEOUT, connect=NEWS_CONNECT_TIMEOUT))
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='naver-news')
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class NewsUnavailable(Exception):
+    """업스트림 호출이 실패했고 돌려줄 캐시도 없음"""
+
+
+def cache_key(ticker):
+    # 종목명은 공백/한글이 들어가고 (memcached 키로 못 씀) 같은 이름의 종목도 있으므로 종목코드로
+    return f'news:{ticker}'
+
+
+def fetch_news(query):
+    """네이버 뉴스 검색 API 를 호출해 원본 item 목록을 돌려준다."""
+    res = _client.get(
+        NEWS_API_URL,
+        headers={
+            'X-Naver-Client-Id': settings.NAVER_CLIENT_ID,
+            'X-Naver-Client-Secret': settings.NAVER_CLIENT_SECRET,
+        },
+        params={'query': query, 'display': NEWS_DISPLAY, 'sort': 'date'},
+    )
+    res.raise_for_status()
+    return res.json().get('items', [])
+
+
+def format_pub_date(raw):
+    """RFC 822 pubDate ('Mon, 13 Oct 2025 09:10:00 +0900') → '10.13 09:10', 못 읽으면 원문 그대로"""
+    match = PUB_DATE_RE.match(raw)
+    if match and match[2] in MONTHS:
+        day, month, hour, minute = match.groups()
+        return f'{MONTHS[month]}.{int(day):02d} {hour}:{minute}'
+
+    # 고정 형식이 아니면 email.utils 로 일반 RFC 822 파싱
+    try:
+        return parsedate_to_datetime(raw).strftime('%m.%d %H:%M')
+    except (TypeError, ValueError):
+        return raw
+
+
+def normalize_items(items):
+    """네이버 뉴스 item 목록을 화면용 목록으로 변환 (태그 제거 + HTML 엔티티 복원 + 날짜 포맷)"""
+    strip_tags = TAG_RE.sub
+    unescape = html.unescape
+    news = []
+    for item in items:
+        news.append({
+            'title': unescape(strip_tags('', item.get('title', ''))),
+            'link': item.get('link', ''),
+            'date': format_pub_date(item.get('pubDate', '')),
+            'publisher': NEWS_PUBLISHER,
+        })
+    return news
+
+
+def _refresh(ticker, query):
+    items = fetch_news(query)
+    entry = {'items': items, 'news': normalize_items(items), 'fetched_at': time.time()}
+    cache.set(cache_key(ticker), entry, NEWS_STALE_TTL)
+    return entry
+
+
+def _start_refresh(ticker, query):
+    """종목에 대한 업스트림 호출을 시작하거나, 이미 진행 중이면 그 Future 를 돌려준다."""
+    with _inflight_lock:
+        future = _inflight.get(ticker)
+        if future is not None:
+            return future
+        future = _executor.submit(_refresh, ticker, query)
+        _inflight[ticker] = future
+
+    # 이미 끝난 Future 면 콜백이 이 스레드에서 바로 실행되므로 (_forget 이 같은 락을 잡음) 락 밖에서 등록
+    future.add_done_callback(lambda _: _forget(ticker, future))
+    return future
+
+
+def _forget(ticker, future):
+    with _inflight_lock:
+        if _inflight.get(ticker) is future:
+            del _inflight[ticker]
+
+
+def get_news(ticker, query):
+    """
+    종목의 캐시를 거친 (정리된) 뉴스 목록. query 는 업스트림 검색어 (종목명)
+    캐시가 신선하면 그대로, 오래됐으면 지난 값을 돌려주며 뒤에서 갱신,
+    없으면 (다른 요청과 공유하는) 업스트림 호출을 NEWS_TIMEOUT 초까지 기다린다.
+    """
+    entry = cache.get(cache_key(ticker))
+    # 'news' 가 없는 항목은 정리 전 형식으로 저장된 것 → 새로 받음
+    if entry is not None and 'news' in entry:
+        if time.time() - entry['fetched_at'] > NEWS_FRESH_TTL:
+            _start_refresh(ticker, query)
+        return entry['news']
+
+    future = _start_refresh(ticker, query)
+    try:
+        return future.result(timeout=NEWS_TIMEOUT)['news']
+    except FutureTimeoutError:
+        raise NewsUnavailable('timeout')
+    except (httpx.HTTPError, ValueError) as e:
+        raise NewsUnavailable(str(e))
@@ -0,0 +1,190 @@
+import operator
+import re
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, Max
+
+from .constants import trading_days
+from .models import Stock, DailyPrice
+
+# 종목 스크리너용 메모리 테이블
+# - 종목별 최신 시세 스냅샷 + 파생 컬럼(20일 평균 거래량, 보조지표 등)을 pandas DataFrame 하나로 보관
+# - 필터/정렬은 컬럼 단위 벡터 연산으로 평가 (종목 수천 개 기준 수 ms)
+# - 프로세스마다 하나씩 두고, 수집으로 시세가 바뀌면 (시그니처 비교) 테이블 전체를 다시 읽음
+
+# DB 의 시세가 바뀌었는지 확인하는 주기 (초)
+SYNC_INTERVAL = 60
+
+# 거래량 평균 기간 (거래일)
+VOLUME_AVG_DAYS = 20
+
+# (컬럼명, Stock 기준 조회 경로)
+SOURCE_COLUMNS = [
+    ('ticker', 'ticker'),
+    ('name', 'name'),
+    ('asset_type', 'asset_type'),
+    ('market_type', 'market_type'),
+    ('market_cap', 'market_cap'),
+    ('date', 'latest_price__date'),
+    ('close_price', 'latest_price__close_price'),
+    ('change', 'latest_price__change'),
+    ('fluctuation_rate', 'latest_price__fluctuation_rate'),
+    ('volume', 'latest_price__volume'),
+    ('trading_value', 'latest_price__trading_value'),
+    ('nav', 'latest_price__nav'),
+    ('sma20', 'indicator_state__sma20'),
+    ('sma60', 'indicator_state__sma60'),
+    ('rsi14', 'indicator_state__rsi14'),
+    ('macd', 'indicator_state__macd'),
+    ('macd_signal', 'indicator_state__macd_signal'),
+]
+TEXT_COLUMNS = {'ticker', 'name', 'asset_type', 'market_type'}
+DERIVED_COLUMNS = ['volume_avg20', 'volume_ratio']
+COLUMNS = [name for name, _ in SOURCE_COLUMNS if name != 'date'] + DERIVED_COLUMNS
+
+# 'market_cap>1e12', 'volume>volume_avg20', 'market_type=KOSPI|KOSDAQ'
+CONDITION_RE = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.+?)\s*$')
+OPERATORS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    '=': operator.eq, '!=': operator.ne,
+}
+
+
+class ScreenerError(ValueError):
+    """필터/정렬 식이 잘못됨"""
+
+
+def parse_conditions(expressions):
+    """['market_cap>1e12', 'market_type=KOSDAQ'] → [(컬럼, 연산자, 값 또는 ('column', 컬럼))]"""
+    conditions = []
+    for expression in expressions:
+        match = CONDITION_RE.match(expression)
+        if match is None:
+            raise ScreenerError(f'invalid filter: {expression}')
+        column, op, value = match.groups()
+        if column not in COLUMNS:
+            raise ScreenerError(f'unknown column: {column}')
+
+        if column in TEXT_COLUMNS:
+            if op not in ('=', '!='):
+                raise ScreenerError(f'{column} supports only = and !=')
+            value = value.split('|')
+        elif value in COLUMNS and value not in TEXT_COLUMNS:
+            value = ('column', value)
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ScreenerError(f'invalid number: {value}')
+        conditions.append((column, op, value))
+    return conditions
+
+
+def parse_sort(expression):
+    """'-market_cap,ticker' → (['market_cap', 'ticker'], [False, True])"""
+    columns, ascending = [], []
+    for key in (expression or '').split(','):
+        key = key.strip()
+        if not key:
+            continue
+        column = key.lstrip('-')
+        if column not in COLUMNS:
+            raise ScreenerError(f'unknown sort column: {column}')
+        columns.append(column)
+        ascending.append(not key.startswith('-'))
+    return columns, ascending
+
+
+def snapshot_query():
+    """최신 시세가 있는 종목 전체의 스냅샷 (SOURCE_COLUMNS 순서)"""
+    return Stock.objects.filter(latest_price__isnull=False).values_list(*(path for _, path in SOURCE_COLUMNS))
+
+
+def volume_query(start, end):
+    return DailyPrice.objects.filter(date__gte=start, date__lte=end).values_list('stock_id', 'volume')
+
+
+class StockScreener:
+    def __init__(self):
+        self.table = pd.DataFrame(columns=COLUMNS)
+        self.date = None                  # 스냅샷 기준일 (가장 최근 시세 날짜)
+        self.lock = threading.Lock()
+        self.signature = None
+        self.checked_at = 0.0
+
+    def invalidate(self):
+        """다음 조회 때 바로 DB 와 동기화하도록 표시 (수집 직후 호출)"""
+        self.checked_at = 0.0
+
+    def sync(self, force=False):
+        """시세 시그니처가 바뀌었으면 테이블 전체를 다시 읽는다."""
+        now = time.monotonic()
+        if not force and now - self.checked_at < SYNC_INTERVAL:
+            return
+        self.checked_at = now
+
+        signature = Stock.objects.aggregate(count=Count('ticker'), updated=Max('price_updated_at'))
+        if not force and signature == self.signature:
+            return
+
+        table, snapshot_date = self.load()
+        with self.lock:
+            self.table = table
+            self.date = snapshot_date
+            self.signature = signature
+
+    def load(self):
+        rows = snapshot_query()
+        table = pd.DataFrame.from_records(list(rows), columns=[name for name, _ in SOURCE_COLUMNS])
+        numeric = [name for name, _ in SOURCE_COLUMNS if name not in TEXT_COLUMNS and name != 'date']
+        table[numeric] = table[numeric].astype(np.float64)
+
+        # 최근 VOLUME_AVG_DAYS 거래일의 종목별 평균 거래량
+        # (거래일은 달력으로 계산하므로 음력 휴장일이 끼면 실제 거래일은 조금 적을 수 있음)
+        snapshot_date = table['date'].max() if len(table) else None
+        if snapshot_date:
+            window = trading_days(snapshot_date - timedelta(days=VOLUME_AVG_DAYS * 2), snapshot_date)
+            volumes = pd.DataFrame.from_records(
+                list(volume_query(window[-VOLUME_AVG_DAYS], snapshot_date)),
+                columns=['ticker', 'volume'],
+            )
+            volume_avg = volumes.groupby('ticker')['volume'].mean()
+            table['volume_avg20'] = table['ticker'].map(volume_avg).astype(np.float64)
+        else:
+            table['volume_avg20'] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['volume_ratio'] = table['volume'] / table['volume_avg20'].replace(0, np.nan)
+
+        return table.drop(columns='date').reset_index(drop=True), snapshot_date
+
+    def screen(self, conditions, sort_columns, ascending, offset=0, limit=20):
+        """조건을 모두 만족하는 종목을 정렬해서 (전체 개수, 해당 페이지 행 목록) 으로 돌려준다."""
+        self.sync()
+        table = self.table
+
+        # 조건별 불리언 마스크를 AND (NaN 비교는 False)
+        mask = np.ones(len(table), dtype=bool)
+        for column, op, value in conditions:
+            values = table[column]
+            if column in TEXT_COLUMNS:
+                matched = values.isin(value).to_numpy()
+                mask &= matched if op == '=' else ~matched
+            elif isinstance(value, tuple):
+                mask &= OPERATORS[op](values, table[value[1]]).to_numpy()
+            else:
+                mask &= OPERATORS[op](values, value).to_numpy()
+
+        result = table[mask]
+        if sort_columns:
+            result = result.sort_values(sort_columns, ascending=ascending, na_position='last', kind='stable')
+
+        page = result.iloc[offset:offset + limit]
+        page = page.astype(object).where(page.notna(), None)
+        return len(result), page.to_dict('records')
+
+
+screener = StockScreener()
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.db.models import Count, Max
+
+from .models import Stock
+
+# 종목 검색용 메모리 인덱스
+# - 종목코드 / 종목명 / 종목명 초성(ㅅㅅㅈㅈ)의 1~2글자 n-gram 역색인
+# - 정렬: 종목코드·종목명 일치 → 앞부분 일치 → 부분 일치, 같은 순위는 시가총액 큰 순
+# - 프로세스마다 하나씩 두고, 종목 테이블이 바뀌면 바뀐 종목만 다시 색인
+
+CHOSUNG = [
+    'ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+    'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ',
+]
+CHOSUNG_SET = set(CHOSUNG)
+
+# DB 의 종목 테이블이 바뀌었는지 확인하는 주기 (초)
+SYNC_INTERVAL = 60
+
+
+def to_chosung(text):
+    """한글 음절은 초성으로, 나머지 글자는 그대로 둔다. ('삼성전자' → 'ㅅㅅㅈㅈ')"""
+    chars = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            chars.append(CHOSUNG[code // 588])
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def is_chosung_query(query):
+    return all(ch in CHOSUNG_SET for ch in query)
+
+
+def ngrams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def index_rows_query():
+    """색인 대상 종목 전체 (ticker, name, market_cap)"""
+    return Stock.objects.values_list('ticker', 'name', 'market_cap')
+
+
+class StockSearchIndex:
+    def __init__(self):
+        self.entries = {}                  # ticker -> (ticker, name, chosung, market_cap)
+        self.postings = defaultdict(set)   # n-gram -> {ticker}
+        self.exact = defaultdict(set)      # 종목코드/종목명 -> {ticker}
+        self.lock = threading.Lock()
+        self.ranked = []                   # 시가총액 큰 순으로 정렬된 종목코드
+        self.position = {}                 # ticker -> ranked 내 위치
+        self.signature = None
+        self.checked_at = 0.0
+
+    def index_keys(self, entry):
+        ticker, name, chosung, _ = entry
+        return ngrams(ticker) | ngrams(name) | ngrams(chosung)
+
+    def _remove(self, ticker):
+        entry = self.entries.pop(ticker, None)
+        if entry is None:
+            return
+        for key in self.index_keys(entry):
+            tickers = self.postings.get(key)
+            if tickers is not None:
+                tickers.discard(ticker)
+                if not tickers:
+                    del self.postings[key]
+        for key in entry[:2]:
+            self.exact[key].discard(ticker)
+            if not self.exact[key]:
+                del self.exact[key]
+
+    def _upsert(self, ticker, name, market_cap):
+        name = (name or '').lower()
+        entry = (ticker.lower(), name, to_chosung(name), market_cap or 0)
+        if self.entries.get(ticker) == entry:
+            return False
+        self._remove(ticker)
+        self.entries[ticker] = entry
+        for key in self.index_keys(entry):
+            self.postings[key].add(ticker)
+        for key in entry[:2]:
+            self.exact[key].add(ticker)
+        return True
+
+    def invalidate(self):
+        """다음 검색 때 바로 DB 와 동기화하도록 표시 (수집 직후 호출)"""
+        self.checked_at = 0.0
+
+    def sync(self, force=False):
+        """종목 테이블 시그니처가 바뀌었으면 바뀐 종목만 다시 색인"""
+        now = time.monotonic()
+        if not force and now - self.checked_at < SYNC_INTERVAL:
+            return
+        self.checked_at = now
+
+        # 종목 수 + 최신 시세 id: 신규 상장/폐지나 새 거래일 수집이 있으면 바뀜
+        signature = Stock.objects.aggregate(count=Count('ticker'), latest=Max('latest_price_id'))
+        if not force and signature == self.signature:
+            return
+
+        rows = index_rows_query()
+        with self.lock:
+            seen = set()
+            for ticker, name, market_cap in rows:
+                seen.add(ticker)
+                self._upsert(ticker, name, market_cap)
+            for ticker in set(self.entries) - seen:
+                self._remove(ticker)
+            self.ranked = sorted(self.entries, key=lambda t: (-self.entries[t][3], self.entries[t][1]))
+            self.position = {ticker: i for i, ticker in enumerate(self.ranked)}
+            self.signature = signature
+
+    def match_order(self, entry, query, chosung_query):
+        """0: 완전 일치, 1: 앞부분 일치, 2: 부분 일치, None: 불일치"""
+        code, name, chosung, _ = entry
+        if code == query or name == query:
+            return 0
+        if code.startswith(query) or name.startswith(query) or (chosung_query and chosung.startswith(query)):
+            return 1
+        if query in code or query in name or (chosung_query and query in chosung):
+            return 2
+        return None
+
+    def search(self, query, limit=10):
+        """query 와 일치하는 종목코드 목록 (순위순)"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        self.sync()
+
+        chosung_query = is_chosung_query(query)
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+
+        with self.lock:
+            # 가장 짧은 posting 부터 교집합
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+
+            # 후보가 적으면 시가총액 순위로 정렬,
+            # 많으면 ('00' 같은 짧은 검색어) 시가총액 순으로 훑다가 앞부분 일치가 limit 개 모이면 중단
+            if len(candidates) <= limit * 20:
+                ordered = sorted(candidates, key=self.position.__getitem__)
+            else:
+                ordered = (ticker for ticker in self.ranked if ticker in candidates)
+
+            # 완전 일치는 시가총액과 관계없이 항상 맨 앞
+            exact = sorted(self.exact.get(query, ()), key=self.position.__getitem__)
+            prefix, partial = [], []
+            for ticker in ordered:
+                order = self.match_order(self.entries[ticker], query, chosung_query)
+                if order == 1:
+                    prefix.append(ticker)
+                    if len(exact) + len(prefix) >= limit:
+                        break
+                elif order == 2:
+                    partial.append(ticker)
+
+        return (exact + prefix + partial)[:limit]
+
+
+stock_index = StockSearchIndex()
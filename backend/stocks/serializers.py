@@ -8,19 +8,14 @@ class DailyPriceSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 # 2. 주식 기본 정보 Serializer
+# - latest_price 는 Stock.latest_price 스냅샷을 읽으므로 select_related('latest_price') 와 함께 사용
 class StockSerializer(serializers.ModelSerializer):
-    latest_price = serializers.SerializerMethodField()
+    latest_price = DailyPriceSerializer(read_only=True)
 
     class Meta:
         model = Stock
         fields = ['ticker', 'name', 'market_type', 'market_cap', 'latest_price']
 
-    def get_latest_price(self, obj):
-        price = obj.daily_price.order_by('-date').first()
-        if price:
-            return DailyPriceSerializer(price).data
-        return None
-
 # 3. 관심 종목 Serializer
 class WatchlistSerializer(serializers.ModelSerializer):
     stock = StockSerializer(read_only=True)
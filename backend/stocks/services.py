@@ -1,9 +1,33 @@
-import requests
+import random
+import time
+import httpx
+import numpy as np
 import pandas as pd
-import FinanceDataReader as fdr
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
 from django.conf import settings
-from .models import Stock, DailyPrice, Chartprice
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import FloatField, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+from django.utils import timezone
+from . import fdr_cache
+from .constants import MOVERS_CACHE_KEY, trading_days
+from .etf import ETF_ANOMALY_Z, ETF_WINDOW, etf_analytics
+from .indicators import (
+    STREAM_COLUMNS,
+    advance_state,
+    load_series_many,
+    state_from_series,
+    state_values,
+)
+from .models import (
+    Stock, DailyPrice, Chartprice, PriceBar, IndicatorState, MarketMover, MarketBreadth, EtfSummary, MarketIndex,
+)
+from .screener import screener
+from .search import stock_index
+from .utils import top_k_indices
 
 # 1. API URL 정의 (문서 기반 수정)
 STOCK_API_URL = "https://data-dbg.krx.co.kr/svc/apis/sto/stk_bydd_trd"  
@@ -13,6 +37,31 @@ ETF_API_URL = "https://data-dbg.krx.co.kr/svc/apis/etp/etf_bydd_trd"
 # 2. 인증키
 AUTH_KEY = settings.KRX_API_KEY
 
+# 3. 시장별 수집 설정: (표시명, URL, asset_type, market_type)
+KRX_MARKETS = [
+    ('KOSPI', STOCK_API_URL, 'STOCK', 'KOSPI'),
+    ('KOSDAQ', KOSDAQ_API_URL, 'STOCK', 'KOSDAQ'),
+    ('ETF', ETF_API_URL, 'ETF', None),
+]
+
+# 요청 타임아웃 및 재시도 (지터 포함 지수 백오프)
+KRX_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+KRX_MAX_RETRIES = 3
+KRX_BACKOFF_BASE = 1.0
+
+# 주봉/월봉 구간 (pandas Period 주기, 주는 월요일 시작)
+BAR_PERIODS = {'1w': 'W-SUN', '1m': 'M'}
+BAR_FIELDS = ['open_price', 'high_price', 'low_price', 'close_price', 'volume', 'trading_value']
+
+# 시장별 상승/하락/거래대금 상위 종목 수
+MOVERS_TOP_K = 20
+
+# 시장 지수 기준값 (첫 계산일)
+INDEX_BASE = 1000.0
+
+# 차트 증분 갱신 시 마지막 저장일 이전으로 다시 받아 비교하는 기간 (일)
+CHART_OVERLAP_DAYS = 7
+
 def clean_int(value):
     if not value or value == '-': return 0
     return int(str(value).replace(",", ""))
@@ -21,153 +70,763 @@ def clean_float(value):
     if not value or value == '-': return 0.0
     return float(str(value).replace(",", ""))
 
+# bulk_create 한 번에 보내는 행 수
+BULK_BATCH_SIZE = 500
+
+STOCK_UPDATE_FIELDS = ['name', 'asset_type', 'market_type', 'market_cap', 'total_shares']
+INDICATOR_STATE_UPDATE_FIELDS = ['date', 'state', 'prev_state', *STREAM_COLUMNS, 'updated_at']
+# 보조지표 상태를 전체 시세로 다시 계산할 때 한 번에 읽는 종목 수
+INDICATOR_REBUILD_CHUNK = 200
+ETF_SUMMARY_UPDATE_FIELDS = [
+    'date', 'close_price', 'nav', 'trading_value',
+    'premium', 'premium_avg', 'premium_z', 'tracking_error', 'anomaly', 'updated_at',
+]
+MARKET_INDEX_FIELDS = [
+    'market_type', 'date', 'cap_index', 'equal_index', 'cap_return', 'equal_return',
+    'market_cap', 'trading_value', 'value_share', 'constituents',
+]
+DAILY_PRICE_UPDATE_FIELDS = [
+    'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+    'fluctuation_rate', 'trading_value', 'change', 'nav',
+]
+
+def parse_item(item, asset_type, explicit_market_type=None):
+    """OutBlock_1 한 건을 (Stock 필드, DailyPrice 필드) 딕셔너리 쌍으로 변환"""
+    if asset_type == 'ETF':
+        mkt_nm = "ETF"
+    else:
+        mkt_nm = item.get("MKT_NM", explicit_market_type)
+
+    stock_fields = {
+        'ticker': item.get("ISU_CD"),
+        'name': item.get("ISU_NM"),
+        'asset_type': asset_type,
+        'market_type': mkt_nm,
+        'market_cap': clean_int(item.get("MKTCAP")),
+        'total_shares': clean_int(item.get("LIST_SHRS")),
+    }
+    price_fields = {
+        'close_price': clean_int(item.get("TDD_CLSPRC")), # [cite: 11]
+        'open_price': clean_int(item.get("TDD_OPNPRC")),  # [cite: 11]
+        'high_price': clean_int(item.get("TDD_HGPRC")),   # [cite: 11]
+        'low_price': clean_int(item.get("TDD_LWPRC")),    # [cite: 11]
+        'volume': clean_int(item.get("ACC_TRDVOL")),      # [cite: 11]
+        'fluctuation_rate': clean_float(item.get("FLUC_RT")), # [cite: 11]
+        'trading_value': clean_int(item.get("ACC_TRDVAL")),   # [cite: 11]
+        'change': clean_int(item.get("CMPPREVDD_PRC")),       # [cite: 11]
+        'nav': clean_float(item.get("NAV")) if asset_type == 'ETF' else None,
+    }
+    return stock_fields, price_fields
+
 def save_data(items, date_obj, asset_type, explicit_market_type=None):
-    count = 0
+    """
+    OutBlock_1 전체를 한 번에 파싱한 뒤 Stock / DailyPrice 를 bulk upsert 한다.
+    - 기존 Stock 은 한 번의 쿼리로 읽어와서 값이 바뀐 종목만 다시 쓴다.
+      (그 종목의 최신 시세보다 오래된 날짜면 스냅샷은 건드리지 않음)
+    - 모든 쓰기는 하나의 트랜잭션 안에서 BULK_BATCH_SIZE 단위로 나눠 보낸다.
+    반환값: {'inserted': 신규 시세 수, 'updated': 갱신된 시세 수, 'skipped': 파싱 실패 수}
+    """
+    stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+    # 1. 전체 파싱
+    stock_rows = {}
+    price_rows = {}
     for item in items:
         try:
-            # 1. Stock 정보 파싱 
-            ticker = item.get("ISU_CD") 
-            name = item.get("ISU_NM")   
-            total_shares = clean_int(item.get("LIST_SHRS")) 
-            mkt_cap = clean_int(item.get("MKTCAP"))        
-            
-            if asset_type == 'ETF':
-                mkt_nm = "ETF"
-            else:
-                mkt_nm = item.get("MKT_NM", explicit_market_type) 
-
-            # DB 저장 (Stock)
-            stock, created = Stock.objects.update_or_create(
-                ticker=ticker,
-                defaults={
-                    'name': name,
-                    'asset_type': asset_type,
-                    'market_type': mkt_nm,
-                    'market_cap': mkt_cap,
-                    'total_shares': total_shares,             
-                }
-            )
-
-            # 2. DailyPrice 정보 파싱 
-            trading_value = clean_int(item.get("ACC_TRDVAL")) # [cite: 11]
-            change = clean_int(item.get("CMPPREVDD_PRC"))     # [cite: 11]
-            fluctuation_rate = clean_float(item.get("FLUC_RT")) # [cite: 11]
-            nav = clean_float(item.get("NAV")) if asset_type == 'ETF' else None
-
-            # DB 저장 (DailyPrice)
-            DailyPrice.objects.update_or_create(
-                stock=stock,
-                date=date_obj,
-                defaults={
-                    'close_price': clean_int(item.get("TDD_CLSPRC")), # [cite: 11]
-                    'open_price': clean_int(item.get("TDD_OPNPRC")),  # [cite: 11]
-                    'high_price': clean_int(item.get("TDD_HGPRC")),   # [cite: 11]
-                    'low_price': clean_int(item.get("TDD_LWPRC")),    # [cite: 11]
-                    'volume': clean_int(item.get("ACC_TRDVOL")),      # [cite: 11]
-                    'fluctuation_rate': fluctuation_rate,
-                    'trading_value': trading_value, 
-                    'change': change,               
-                    'nav': nav
-                }
-            )
-            count += 1
+            stock_fields, price_fields = parse_item(item, asset_type, explicit_market_type)
         except Exception as e:
-            print(f"Error saving {ticker}: {e}")
+            print(f"Error parsing {item.get('ISU_CD')}: {e}")
+            stats['skipped'] += 1
             continue
-    return count
 
+        ticker = stock_fields['ticker']
+        if not ticker:
+            stats['skipped'] += 1
+            continue
+        stock_rows[ticker] = stock_fields
+        price_rows[ticker] = price_fields
 
-def fetch_krx_data(date_str):
-    db_date = datetime.strptime(date_str, "%Y%m%d").date()
-    
-    headers = {"AUTH_KEY": AUTH_KEY}
-    params = {"basDd": date_str} # 
+    if not stock_rows:
+        return stats
 
-    print(f"=== {date_str} 데이터 수집 시작 ===")
+    # 2. 기존 데이터와 비교 (종목 1쿼리 + 해당 날짜 시세 1쿼리)
+    tickers = list(stock_rows)
+    existing_stocks = {
+        row.pop('ticker'): row
+        for row in Stock.objects.filter(ticker__in=tickers).values(
+            'ticker', 'latest_price__date', *STOCK_UPDATE_FIELDS
+        )
+    }
+    existing_prices = set(existing_prices_query(date_obj, tickers))
 
-    # 해당 날짜 데이터 초기화
-    deleted_count, _ = DailyPrice.objects.filter(date=db_date).delete()
-    print(f"🔄 기존 데이터 초기화: {db_date} 날짜의 데이터 {deleted_count}건 삭제됨.")
+    # 종목 스냅샷(이름, 시가총액 등)은 최신 시세 날짜 이후의 데이터로만 갱신한다.
+    # 백필처럼 더 오래된 날짜는 없는 종목만 새로 만든다.
+    changed_stocks = []
+    for ticker, fields in stock_rows.items():
+        current = existing_stocks.get(ticker)
+        if current is None:
+            changed_stocks.append(Stock(**fields))
+            continue
+        latest_date = current.pop('latest_price__date')
+        if (latest_date is None or date_obj >= latest_date) and current != {
+            field: fields[field] for field in STOCK_UPDATE_FIELDS
+        }:
+            changed_stocks.append(Stock(**fields))
+    prices = [
+        DailyPrice(stock_id=ticker, date=date_obj, **fields)
+        for ticker, fields in price_rows.items()
+    ]
 
-    # 1. KOSPI 수집
-    try:
-        res = requests.get(STOCK_API_URL, headers=headers, params=params)
-        if res.status_code == 200:
-            data = res.json().get("OutBlock_1", [])
-            cnt = save_data(data, db_date, "STOCK", explicit_market_type="KOSPI")
-            print(f"[KOSPI] {cnt}개 저장 완료")
-        else:
-            print(f"[KOSPI] API 요청 실패: {res.status_code}")
-    except Exception as e:
-        print(f"[KOSPI] 에러: {e}")
+    # 3. bulk upsert
+    with transaction.atomic():
+        if changed_stocks:
+            Stock.objects.bulk_create(
+                changed_stocks,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['ticker'],
+                update_fields=STOCK_UPDATE_FIELDS,
+            )
+        DailyPrice.objects.bulk_create(
+            prices,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['stock', 'date'],
+            update_fields=DAILY_PRICE_UPDATE_FIELDS,
+        )
 
-    # 2. KOSDAQ 수집
-    try:
-        res = requests.get(KOSDAQ_API_URL, headers=headers, params=params) # 
-        if res.status_code == 200:
-            data = res.json().get("OutBlock_1", [])
-            cnt = save_data(data, db_date, "STOCK", explicit_market_type="KOSDAQ")
-            print(f"[KOSDAQ] {cnt}개 저장 완료")
-        else:
-            print(f"[KOSDAQ] API 요청 실패: {res.status_code}")
-    except Exception as e:
-        print(f"[KOSDAQ] 에러: {e}")
+    stats['updated'] = len(existing_prices)
+    stats['inserted'] = len(prices) - stats['updated']
+    return stats
+
+def existing_prices_query(date_obj, tickers):
+    return DailyPrice.objects.filter(date=date_obj, stock_id__in=tickers).values_list('stock_id', flat=True)
+
+def format_stats(stats):
+    return f"신규 {stats['inserted']}건 / 갱신 {stats['updated']}건 / 건너뜀 {stats['skipped']}건"
+
+
+def make_krx_client():
+    """세 시장 요청이 같이 쓰는 커넥션 풀 클라이언트"""
+    return httpx.Client(
+        headers={"AUTH_KEY": AUTH_KEY or ""},
+        timeout=KRX_TIMEOUT,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+
+def fetch_market(client, url, date_str, label):
+    """
+    한 시장의 OutBlock_1 을 가져온다. (DB 접근 없음)
+    타임아웃/5xx/429 는 지터가 들어간 지수 백오프로 재시도하고, 끝내 실패하면 None 반환
+    응답에 OutBlock_1 이 아예 없으면 (오류 응답) 실패로 보고 None, 빈 목록은 그날 데이터 없음
+    """
+    error = None
+    for attempt in range(1, KRX_MAX_RETRIES + 1):
+        try:
+            res = client.get(url, params={"basDd": date_str})
+            if res.status_code == 200:
+                body = res.json()
+                # 오류 페이지 등 dict 가 아닌 본문도 OutBlock_1 이 없는 것으로 취급
+                items = body.get("OutBlock_1") if isinstance(body, dict) else None
+                if items is None:
+                    print(f"[{label}] 응답에 OutBlock_1 이 없음")
+                return items
+            # 인증 오류 등 4xx 는 재시도해도 결과가 같음
+            if res.status_code < 500 and res.status_code != 429:
+                print(f"[{label}] API 요청 실패: {res.status_code}")
+                return None
+            error = f"HTTP {res.status_code}"
+        except (httpx.HTTPError, ValueError) as e:
+            error = e
+
+        if attempt < KRX_MAX_RETRIES:
+            delay = random.uniform(0, KRX_BACKOFF_BASE * 2 ** (attempt - 1))
+            print(f"[{label}] 재시도 {attempt}/{KRX_MAX_RETRIES - 1} ({error}), {delay:.2f}초 후")
+            time.sleep(delay)
+
+    print(f"[{label}] 에러: {error}")
+    return None
+
+def fetch_krx_markets(date_str, client=None):
+    """
+    KOSPI / KOSDAQ / ETF 를 동시에 조회한다.
+    반환값: {'KOSPI': items, 'KOSDAQ': items, 'ETF': items} (실패한 시장은 None)
+    """
+    own_client = client is None
+    if own_client:
+        client = make_krx_client()
 
-    # 3. ETF 수집
     try:
-        res = requests.get(ETF_API_URL, headers=headers, params=params)
-        if res.status_code == 200:
-            data = res.json().get("OutBlock_1", [])
-            cnt = save_data(data, db_date, "ETF")
-            print(f"[ETF] {cnt}개 저장 완료")
-    except Exception as e:
-        print(f"[ETF] 에러: {e}")
-        
+        with ThreadPoolExecutor(max_workers=len(KRX_MARKETS)) as executor:
+            futures = {
+                label: executor.submit(fetch_market, client, url, date_str, label)
+                for label, url, _, _ in KRX_MARKETS
+            }
+            return {label: future.result() for label, future in futures.items()}
+    finally:
+        if own_client:
+            client.close()
+
+def fetch_krx_data(date_str, client=None):
+    db_date = datetime.strptime(date_str, "%Y%m%d").date()
+
+    print(f"=== {date_str} 데이터 수집 시작 ===")
+
+    # 1. 세 시장 동시 조회 (네트워크만)
+    payloads = fetch_krx_markets(date_str, client=client)
+
+    # 2. DB 저장은 한 곳에서
+    results = save_krx_payloads(db_date, payloads)
+
     print("=== 수집 종료 ===")
+    return results
+
+def save_krx_payloads(db_date, payloads, advance_indicators=True, refresh_indexes=True):
+    """
+    fetch_krx_markets 결과를 DB에 저장한다. (일별 수집 / 백필 공통 쓰기 경로)
+    기존 데이터를 먼저 지우지 않고, 하나의 트랜잭션 안에서
+    upsert 후 응답에 없는 종목의 시세만 삭제한다.
+    - 읽는 쪽은 커밋 전까지 이전 데이터를, 커밋 후에는 새 데이터를 온전히 본다.
+    - 조회에 실패한 시장(None)과 빈 응답([])을 받은 시장은 기존 시세를 그대로 둔다.
+      (아직 공개 전이거나 일시 오류인 빈 응답으로 그날 시세를 지우지 않도록)
+    - advance_indicators=False 면 보조지표 상태를 건드리지 않는다.
+      (날짜 순서가 섞이는 백필은 끝난 뒤 rebuild_indicator_states 로 한 번에 계산)
+    - refresh_indexes=False 면 시장 지수를 건드리지 않는다. (백필은 끝난 뒤 refresh_market_indexes)
+    """
+    results = {}
+    # 한 건 이상 받은 시장만 저장 / 정리 대상
+    fetched = [market for market in KRX_MARKETS if payloads.get(market[0])]
+    if not fetched:
+        return results
+
+    with transaction.atomic():
+        fetched_tickers = set()
+        for label, _, asset_type, market_type in fetched:
+            items = payloads[label]
+            stats = save_data(items, db_date, asset_type, explicit_market_type=market_type)
+            results[label] = stats
+            fetched_tickers.update(item.get("ISU_CD") for item in items)
+            print(f"[{label}] {format_stats(stats)}")
+
+        # 응답에서 빠진 종목 정리 (실패했거나 비어 있는 시장의 종목은 건드리지 않음)
+        stale = stale_prices_query(db_date, fetched_tickers)
+        if len(fetched) < len(KRX_MARKETS):
+            market_filter = Q()
+            for _, _, asset_type, market_type in fetched:
+                condition = Q(stock__asset_type=asset_type)
+                if market_type:
+                    condition &= Q(stock__market_type=market_type)
+                market_filter |= condition
+            stale = stale.filter(market_filter)
+
+        stale_tickers = set(stale.values_list('stock_id', flat=True))
+        deleted_count, _ = stale.delete()
+        if deleted_count:
+            print(f"🔄 {db_date} 응답에 없는 시세 {deleted_count}건 삭제")
+
+        touched_tickers = fetched_tickers | stale_tickers
+        refresh_latest_prices(touched_tickers)
+        refresh_price_bars(db_date, db_date, touched_tickers)
+        refresh_market_movers(db_date)
+        refresh_etf_summaries(db_date)
+        if refresh_indexes:
+            refresh_market_indexes(db_date)
+        if advance_indicators:
+            advance_indicator_states(db_date, touched_tickers)
+
+    stock_index.invalidate()
+    screener.invalidate()
+
+    return results
+
+def stale_prices_query(db_date, fetched_tickers):
+    return DailyPrice.objects.filter(date=db_date).exclude(stock_id__in=fetched_tickers)
+
+def latest_price_subquery():
+    """바깥 Stock 행의 가장 최근 DailyPrice id"""
+    return DailyPrice.objects.filter(stock=OuterRef('pk')).order_by('-date').values('pk')[:1]
+
+def refresh_latest_prices(tickers):
+    """
+    Stock.latest_price 스냅샷을 종목별 가장 최근 DailyPrice 로 갱신하고
+    시세 워터마크(price_updated_at)를 올린다. (UPDATE 한 번)
+    """
+    return Stock.objects.filter(ticker__in=tickers).update(
+        latest_price=Subquery(latest_price_subquery()),
+        price_updated_at=timezone.now(),
+    )
+
+def refresh_market_movers(db_date):
+    """
+    db_date 의 시장별 상승률/하락률/거래대금 상위 MOVERS_TOP_K 종목과 상승/하락/보합 종목 수를 계산해 저장한다.
+    날짜 전체 시세를 배열로 한 번 읽고, 순위는 argpartition 으로 상위 k 개만 골라 정렬한다.
+    반환값: 저장한 랭킹 행 수
+    """
+    rows = list(mover_rows_query(db_date))
+    tickers = np.array([row[0] for row in rows], dtype=object)
+    markets = np.array([row[1] for row in rows], dtype=object)
+    closes = np.array([row[2] for row in rows], dtype=np.int64)
+    rates = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=np.float64)
+    values = np.array([row[4] or 0 for row in rows], dtype=np.float64)
+    volumes = np.array([row[5] for row in rows], dtype=np.int64)
 
-def update_chart_data(ticker, period_year=5):
+    movers, breadth = [], []
+    for market in sorted(set(markets)):
+        in_market = markets == market
+        # 거래가 없었던 종목(거래정지 등)은 등락률 순위에서 제외
+        traded = np.flatnonzero(in_market & (volumes > 0))
+        in_market = np.flatnonzero(in_market)
+
+        rankings = {
+            'gainers': traded[top_k_indices(rates[traded], MOVERS_TOP_K)],
+            'losers': traded[top_k_indices(-rates[traded], MOVERS_TOP_K)],
+            'value': in_market[top_k_indices(values[in_market], MOVERS_TOP_K)],
+        }
+        for kind, picked in rankings.items():
+            movers.extend(
+                MarketMover(
+                    date=db_date, market_type=market, kind=kind, rank=rank, stock_id=tickers[i],
+                    close_price=int(closes[i]),
+                    fluctuation_rate=None if np.isnan(rates[i]) else round(float(rates[i]), 2),
+                    trading_value=int(values[i]),
+                )
+                for rank, i in enumerate(picked, 1)
+            )
+
+        market_rates = rates[in_market]
+        breadth.append(MarketBreadth(
+            date=db_date,
+            market_type=market,
+            advancers=int((market_rates > 0).sum()),
+            decliners=int((market_rates < 0).sum()),
+            unchanged=int((market_rates == 0).sum()),
+            trading_value=int(values[in_market].sum()),
+        ))
+
+    with transaction.atomic():
+        MarketMover.objects.filter(date=db_date).delete()
+        MarketBreadth.objects.filter(date=db_date).delete()
+        MarketMover.objects.bulk_create(movers, batch_size=BULK_BATCH_SIZE)
+        MarketBreadth.objects.bulk_create(breadth, batch_size=BULK_BATCH_SIZE)
+        # 커밋된 뒤에 캐시를 지워야 다른 요청이 이전 값을 다시 캐시하지 않음
+        transaction.on_commit(lambda: cache.delete_many([
+            MOVERS_CACHE_KEY.format(date='latest'), MOVERS_CACHE_KEY.format(date=db_date),
+        ]))
+
+    return len(movers)
+
+def mover_rows_query(db_date):
+    return DailyPrice.objects.filter(date=db_date).values_list(
+        'stock_id', 'stock__market_type', 'close_price', 'fluctuation_rate', 'trading_value', 'volume',
+    )
+
+def refresh_etf_summaries(db_date):
+    """
+    db_date 까지 ETF_WINDOW 거래일의 전 ETF 종가/NAV 를 (날짜 × ETF) 행렬로 한 번 읽어
+    괴리율 / 추적오차 / 괴리율 z-score 를 계산하고 ETF 별 요약(EtfSummary)을 갱신한다.
+    이미 db_date 보다 최근 날짜로 계산된 요약이 있으면 (과거 날짜 백필) 건너뛴다.
+    반환값: 갱신한 ETF 수
+    """
+    if newer_etf_summaries_query(db_date).exists():
+        return 0
+
+    window = trading_days(db_date - timedelta(days=ETF_WINDOW * 2), db_date)[-(ETF_WINDOW + 1):]
+    rows = list(etf_window_query(window[0], db_date))
+    frame = pd.DataFrame.from_records(rows, columns=['date', 'ticker', 'close', 'nav', 'trading_value'])
+    # 기준일에 시세가 있는 ETF 만 요약
+    frame = frame[frame['ticker'].isin(frame.loc[frame['date'] == db_date, 'ticker'])]
+    if frame.empty:
+        return 0
+
+    closes = frame.pivot(index='date', columns='ticker', values='close').sort_index().astype(np.float64)
+    navs = frame.pivot(index='date', columns='ticker', values='nav').reindex_like(closes).astype(np.float64)
+    trading_values = frame.pivot(index='date', columns='ticker', values='trading_value').reindex_like(closes)
+    values = etf_analytics(closes.to_numpy(), navs.to_numpy())
+    anomaly = np.abs(values['premium_z']) >= ETF_ANOMALY_Z
+
+    # 행 단위 변환은 파이썬 리스트로 (NaN → NULL)
+    columns = {'nav': navs.iloc[-1].to_numpy(), **values}
+    columns = {name: [None if v != v else v for v in array.tolist()] for name, array in columns.items()}
+    summaries = [
+        EtfSummary(
+            stock_id=ticker,
+            date=db_date,
+            close_price=int(close),
+            trading_value=None if pd.isna(trading_value) else int(trading_value),
+            anomaly=bool(anomaly[i]),
+            **{name: column[i] for name, column in columns.items()},
+        )
+        for i, (ticker, close, trading_value) in enumerate(
+            zip(closes.columns, closes.iloc[-1].tolist(), trading_values.iloc[-1].tolist())
+        )
+    ]
+    EtfSummary.objects.bulk_create(
+        summaries,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['stock'],
+        update_fields=ETF_SUMMARY_UPDATE_FIELDS,
+    )
+    # 기준일 시세가 없는 (상장폐지 등) ETF 요약은 정리
+    EtfSummary.objects.filter(date__lt=db_date).delete()
+    return len(summaries)
+
+def newer_etf_summaries_query(db_date):
+    return EtfSummary.objects.filter(date__gt=db_date)
+
+def etf_window_query(start, end):
+    return DailyPrice.objects.filter(
+        date__gte=start, date__lte=end, stock__asset_type='ETF',
+    # NAV 는 Decimal 변환을 거치지 않도록 DB 에서 실수로 읽음
+    ).order_by().values_list('date', 'stock_id', 'close_price', Cast('nav', FloatField()), 'trading_value')
+
+def refresh_market_indexes(start, end=None):
+    """
+    start ~ end (기본값: 마지막 시세일) 의 시장별 시가총액 가중 / 동일 가중 지수를 다시 계산한다.
+    한 해씩 시세를 한 번에 읽어서 (시장, 날짜) groupby 로 집계하고, 직전 지수 값에서 이어 붙인다.
+    - 종목 수익률은 등락률(FLUC_RT, 권리락 등 기준가 조정 반영)을 사용
+    - 시가총액 가중 수익률 = Σ 전일 시가총액 × 수익률 / Σ 전일 시가총액
+      (전일 시가총액 = 상장주식수 × 종가 / (1 + 수익률), 상장주식수는 최신 값 기준)
+    - 시장 구분은 Stock.market_type (업종 정보가 수집되면 같은 방식으로 그룹 키만 추가)
+    반환값: 저장한 행 수
+    """
+    if end is None:
+        end = DailyPrice.objects.aggregate(latest=Max('date'))['latest']
+        if end is None:
+            return 0
+
+    written = 0
+    for year in pd.period_range(start, end, freq='Y'):
+        first = max(start, year.start_time.date())
+        last = min(end, year.end_time.date())
+        indexes = aggregate_market_indexes(first, last)
+        with transaction.atomic():
+            MarketIndex.objects.filter(date__gte=first, date__lte=last).delete()
+            MarketIndex.objects.bulk_create(indexes, batch_size=BULK_BATCH_SIZE)
+        written += len(indexes)
+    return written
+
+def aggregate_market_indexes(start, end):
+    """start ~ end 시세로 (시장, 날짜) 별 MarketIndex 목록을 만든다. (start 이전 지수는 DB 에서 읽어 이어 붙임)"""
+    rows = list(index_price_rows_query(start, end))
+    if not rows:
+        return []
+
+    frame = pd.DataFrame.from_records(
+        rows, columns=['date', 'market_type', 'close', 'rate', 'trading_value', 'shares'],
+    )
+    returns = frame['rate'].astype(np.float64) / 100
+    cap = frame['shares'].astype(np.float64) * frame['close']
+    prev_cap = (cap / (1 + returns)).where(returns.notna())
+    frame = frame.assign(
+        returns=returns,
+        cap=cap,
+        prev_cap=prev_cap,
+        weighted=prev_cap * returns,
+        trading_value=frame['trading_value'].astype(np.float64),
+    )
+
+    daily = frame.groupby(['market_type', 'date']).agg(
+        market_cap=('cap', 'sum'),
+        prev_cap=('prev_cap', 'sum'),
+        weighted=('weighted', 'sum'),
+        equal_return=('returns', 'mean'),
+        trading_value=('trading_value', 'sum'),
+        constituents=('close', 'size'),
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily['cap_return'] = (daily['weighted'] / daily['prev_cap']).fillna(0.0)
+    daily['equal_return'] = daily['equal_return'].fillna(0.0)
+    total_value = daily['trading_value'].groupby(level='date').transform('sum')
+    daily['value_share'] = (daily['trading_value'] / total_value.where(total_value > 0)).fillna(0.0)
+
+    # 시장별 누적곱을 start 직전 지수 값에 이어 붙임 (처음 계산하는 시장은 INDEX_BASE)
+    markets = daily.index.get_level_values('market_type')
+    bases = {
+        market: index_base_query(market, start).first() or (INDEX_BASE, INDEX_BASE)
+        for market in markets.unique()
+    }
+    growth = (1 + daily[['cap_return', 'equal_return']]).groupby(level='market_type').cumprod()
+    daily['cap_index'] = growth['cap_return'] * markets.map(lambda market: bases[market][0])
+    daily['equal_index'] = growth['equal_return'] * markets.map(lambda market: bases[market][1])
+
+    daily[['market_cap', 'trading_value']] = daily[['market_cap', 'trading_value']].round().astype(np.int64)
+
+    columns = daily.reset_index()[MARKET_INDEX_FIELDS]
+    return [MarketIndex(**row) for row in columns.to_dict('records')]
+
+def index_price_rows_query(start, end):
+    return DailyPrice.objects.filter(date__gte=start, date__lte=end).order_by().values_list(
+        'date', 'stock__market_type', 'close_price', Cast('fluctuation_rate', FloatField()),
+        'trading_value', 'stock__total_shares',
+    )
+
+def index_base_query(market, start):
+    """start 직전 market 지수 값 (cap_index, equal_index)"""
+    return MarketIndex.objects.filter(market_type=market, date__lt=start).order_by('-date').values_list(
+        'cap_index', 'equal_index',
+    )
+
+def make_indicator_state(ticker, date, state, prev_state):
+    return IndicatorState(
+        stock_id=ticker, date=date, state=state, prev_state=prev_state, **state_values(state),
+    )
+
+def save_indicator_states(states):
+    IndicatorState.objects.bulk_create(
+        states,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['stock'],
+        update_fields=INDICATOR_STATE_UPDATE_FIELDS,
+    )
+
+def advance_indicator_states(db_date, tickers):
+    """
+    db_date 의 봉 하나씩을 종목별 보조지표 상태에 이어서 반영한다. (종목당 O(1))
+    - 새 날짜: 저장된 상태에서 한 단계 진행
+    - 같은 날짜 재수집: 마지막 봉 반영 전 상태(prev_state)에서 다시 진행
+    - 상태가 없거나 과거 날짜가 바뀐 경우: 전체 시세로 재계산
+    반환값: {'advanced': 진행한 종목 수, 'rebuilt': 재계산한 종목 수}
+    """
+    tickers = list(tickers)
+    bars = {
+        ticker: (high, low, close)
+        for ticker, high, low, close in DailyPrice.objects.filter(date=db_date, stock_id__in=tickers)
+        .values_list('stock_id', 'high_price', 'low_price', 'close_price')
+    }
+    existing = IndicatorState.objects.in_bulk(tickers)
+
+    advanced, rebuild = [], []
+    for ticker in tickers:
+        current = existing.get(ticker)
+        bar = bars.get(ticker)
+        if current is None or db_date < current.date:
+            rebuild.append(ticker)
+        elif db_date == current.date:
+            if bar is None or current.prev_state is None:
+                rebuild.append(ticker)
+            else:
+                state = advance_state(current.prev_state, *bar)
+                advanced.append(make_indicator_state(ticker, db_date, state, current.prev_state))
+        elif bar is not None:
+            state = advance_state(current.state, *bar)
+            advanced.append(make_indicator_state(ticker, db_date, state, current.state))
+
+    save_indicator_states(advanced)
+    rebuilt = rebuild_indicator_states(rebuild) if rebuild else 0
+    return {'advanced': len(advanced), 'rebuilt': rebuilt}
+
+def rebuild_indicator_states(tickers=None):
+    """
+    보조지표 상태를 종목별 전체 시세로 다시 계산한다. (tickers 생략 시 전체 종목)
+    INDICATOR_REBUILD_CHUNK 종목씩 한 쿼리로 읽어서 벡터 연산. 반환값: 저장한 종목 수
+    """
+    if tickers is None:
+        tickers = Stock.objects.order_by('ticker').values_list('ticker', flat=True)
+    tickers = list(tickers)
+
+    written = 0
+    for i in range(0, len(tickers), INDICATOR_REBUILD_CHUNK):
+        chunk = tickers[i:i + INDICATOR_REBUILD_CHUNK]
+        states = [
+            make_indicator_state(
+                ticker, series[0][-1], state_from_series(series), state_from_series(series, end=-1),
+            )
+            for ticker, series in load_series_many(chunk)
+        ]
+        with transaction.atomic():
+            # 시세가 하나도 없는 종목의 상태는 지움
+            IndicatorState.objects.filter(stock_id__in=chunk).exclude(
+                stock_id__in=[state.stock_id for state in states]
+            ).delete()
+            save_indicator_states(states)
+        written += len(states)
+    return written
+
+def bar_period_bounds(interval, start, end):
+    """start ~ end 가 걸친 주/월 구간 전체의 (첫날, 마지막날)"""
+    freq = BAR_PERIODS[interval]
+    first = pd.Period(start, freq=freq).start_time.date()
+    last = pd.Period(end, freq=freq).end_time.date()
+    return first, last
+
+def refresh_price_bars(start, end, tickers=None):
+    """
+    start ~ end 가 걸친 주/월 구간의 봉(PriceBar)을 DailyPrice 로 다시 계산한다.
+    구간 전체를 한 번에 읽어서 (종목, 구간) 단위 groupby 로 OHLCV 를 집계하고,
+    같은 트랜잭션에서 기존 봉을 교체한다. tickers 를 주면 해당 종목만 계산한다.
+    반환값: {'1w': 저장한 봉 수, '1m': 저장한 봉 수}
+    """
+    results = {}
+    for interval, freq in BAR_PERIODS.items():
+        first, last = bar_period_bounds(interval, start, end)
+
+        prices = DailyPrice.objects.filter(date__gte=first, date__lte=last)
+        bars = PriceBar.objects.filter(interval=interval, date__gte=first, date__lte=last)
+        if tickers is not None:
+            prices = prices.filter(stock_id__in=tickers)
+            bars = bars.filter(stock_id__in=tickers)
+
+        df = pd.DataFrame.from_records(
+            prices.order_by('stock_id', 'date').values_list('stock_id', 'date', *BAR_FIELDS),
+            columns=['stock_id', 'date', *BAR_FIELDS],
+        )
+
+        price_bars = []
+        if not df.empty:
+            df['trading_value'] = df['trading_value'].fillna(0)
+            df['bar_date'] = pd.to_datetime(df['date']).dt.to_period(freq).dt.start_time.dt.date
+            agg = df.groupby(['stock_id', 'bar_date'], sort=False).agg(
+                open_price=('open_price', 'first'),
+                high_price=('high_price', 'max'),
+                low_price=('low_price', 'min'),
+                close_price=('close_price', 'last'),
+                volume=('volume', 'sum'),
+                trading_value=('trading_value', 'sum'),
+            ).reset_index()
+
+            columns = [agg[field].astype(np.int64).tolist() for field in BAR_FIELDS]
+            price_bars = [
+                PriceBar(stock_id=stock_id, interval=interval, date=bar_date, **dict(zip(BAR_FIELDS, values)))
+                for stock_id, bar_date, *values in zip(agg['stock_id'], agg['bar_date'], *columns)
+            ]
+
+        with transaction.atomic():
+            bars.delete()
+            PriceBar.objects.bulk_create(price_bars, batch_size=BULK_BATCH_SIZE)
+        results[interval] = len(price_bars)
+    return results
+
+def get_last_chart_date(stock):
+    """저장된 마지막 차트 날짜 (없으면 None)"""
+    return Chartprice.objects.filter(stock=stock).aggregate(last=Max('date'))['last']
+
+def get_chart_start_date(last_date, period_year=5):
+    """전체 적재면 period_year 전부터, 증분이면 마지막 저장일 - CHART_OVERLAP_DAYS 부터"""
+    full_start = datetime.now().date() - timedelta(days=365 * period_year)
+    if last_date is None:
+        return full_start
+    return max(full_start, last_date - timedelta(days=CHART_OVERLAP_DAYS))
+
+def chart_rows_from_frame(df):
+    """
+    FDR DataFrame 을 (date, close_price) 목록으로 변환한다.
+    NaN/0 제거와 정수 변환을 컬럼 단위 벡터 연산으로 처리한다.
+    """
+    if df is None or df.empty:
+        return []
+
+    close = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=np.float64)
+    mask = np.isfinite(close) & (close != 0)
+    dates = pd.DatetimeIndex(df.index[mask]).date
+    closes = close[mask].astype(np.int64)
+    return list(zip(dates, closes.tolist()))
+
+def fetch_chart_rows(ticker, start_date, use_cache=True):
+    """FDR(NAVER) 종가 시계열을 [(date, close_price), ...] 로 반환 (DB 접근 없음)"""
+    return chart_rows_from_frame(fdr_cache.data_reader('NAVER', ticker, start_date, use_cache=use_cache))
+
+def diff_chart_rows(stock, rows, last_date):
+    """
+    증분 조회 결과를 저장된 값과 비교한다.
+    반환값: (새로 써야 하는 행, 겹치는 구간에서 종가가 달라졌는지 여부)
+    겹치는 구간의 종가가 다르면 액면분할/수정주가 반영으로 보고 전체 재적재가 필요하다.
+    """
+    stored = dict(
+        Chartprice.objects.filter(stock=stock, date__gte=rows[0][0]).values_list('date', 'close_price')
+    )
+    changed = []
+    mismatch = False
+    for date, close_price in rows:
+        stored_close = stored.get(date)
+        if stored_close is None:
+            changed.append((date, close_price))
+        elif stored_close != close_price and date <= last_date:
+            mismatch = True
+    return changed, mismatch
+
+def save_chart_rows(stock, rows, replace=False):
+    """
+    차트 행 upsert. rows 를 BULK_BATCH_SIZE 씩 잘라 Chartprice 객체를 만들어가며 저장한다.
+    replace=True 면 기존 차트를 같은 트랜잭션 안에서 지우고 다시 쓴다.
+    """
+    chart_prices = (
+        Chartprice(stock_id=stock.pk, date=date, close_price=close_price)
+        for date, close_price in rows
+    )
+    written = 0
+    with transaction.atomic():
+        if replace:
+            Chartprice.objects.filter(stock=stock).delete()
+        while batch := list(islice(chart_prices, BULK_BATCH_SIZE)):
+            Chartprice.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=['stock', 'date'],
+                update_fields=['close_price'],
+            )
+            written += len(batch)
+        if written or replace:
+            # 차트 캐시 무효화용 워터마크
+            Stock.objects.filter(pk=stock.pk).update(chart_updated_at=timezone.now())
+    return written
+
+def update_chart_data(ticker, period_year=5, incremental=True, use_cache=True, fetch_rows=fetch_chart_rows):
+    """
+    종목 차트 갱신.
+    incremental=True 이면 마지막 저장일 근처부터만 받아서 새 날짜만 추가하고,
+    겹치는 구간에서 종가가 달라졌을 때만 전체(period_year) 재적재한다.
+    use_cache=False 면 로컬 FDR 캐시를 건너뛰고 항상 새로 받는다. (증분 조회는 항상 캐시 없이)
+    fetch_rows(ticker, start_date, use_cache) 로 조회 함수를 바꿀 수 있다. (refresh_charts 의 호출 속도 제한)
+    반환값: {'mode': 'full' | 'incremental', 'fetched': 받은 행 수, 'written': 저장한 행 수,
+             'error': FDR 호출 / DB 저장 실패 사유 (성공이면 None)}
+    """
     try:
         stock = Stock.objects.get(ticker=ticker)
     except Stock.DoesNotExist:
-        return
+        return None
 
-    Chartprice.objects.filter(stock=stock).delete()
-
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=365 * period_year)
+    last_date = get_last_chart_date(stock) if incremental else None
+    stats = {'mode': 'incremental' if last_date else 'full', 'fetched': 0, 'written': 0, 'error': None}
 
     try:
-        df = fdr.DataReader(f'NAVER:{ticker}', start_date)
-        
+        # 증분 시작일은 저장할 때마다 바뀌어 캐시 키가 다시 맞을 일이 없으므로 캐시는 전체 기간 조회에만 사용
+        # (전체 기간 키는 (period_year 전, 오늘) 이라 그날 안에서는 같음)
+        rows = fetch_rows(ticker, get_chart_start_date(last_date, period_year), use_cache and last_date is None)
     except Exception as e:
         print(f"{stock.name}({ticker}) FDR 호출 실패: {e}")
-        return
+        stats['error'] = str(e)
+        return stats
 
-    if df is None or df.empty:
-        print(f"{stock.name}({ticker}) 데이터 없음 (Empty DataFrame)")
-        return
+    stats['fetched'] = len(rows)
+    if not rows:
+        print(f"{stock.name}({ticker}) 유효한 차트 데이터가 없습니다.")
+        return stats
 
-    df = df.dropna(subset=['Close']) 
+    if last_date:
+        rows, mismatch = diff_chart_rows(stock, rows, last_date)
+        if mismatch:
+            print(f"{stock.name}({ticker}) 수정주가 감지 → 전체 재적재")
+            stats['mode'] = 'full'
+            try:
+                rows = fetch_rows(ticker, get_chart_start_date(None, period_year), use_cache)
+            except Exception as e:
+                print(f"{stock.name}({ticker}) FDR 호출 실패: {e}")
+                stats['error'] = str(e)
+                return stats
+            stats['fetched'] += len(rows)
+            # 빈 응답으로 전체 교체하면 기존 차트가 모두 지워지므로 그대로 둠
+            if not rows:
+                print(f"{stock.name}({ticker}) 재적재 데이터가 비어 있어 기존 차트 유지")
+                return stats
 
-    chart_prices = []
-    
     try:
-        for date, row in df.iterrows():
-            close_val = row['Close']
-            if pd.isna(close_val) or close_val == 0:
-                continue
-
-            chart_prices.append(Chartprice(
-                stock=stock,
-                date=date.date(),
-                close_price=int(float(close_val))
-            ))
-
-        if chart_prices:
-            Chartprice.objects.bulk_create(chart_prices)
-            print(f"{stock.name}({ticker}) 차트 업데이트 완료 ({len(chart_prices)}건)")
-        else:
-            print(f"{stock.name}({ticker}) 유효한 차트 데이터가 없습니다.")
-        
+        stats['written'] = save_chart_rows(stock, rows, replace=stats['mode'] == 'full')
     except Exception as e:
-        print(f"{stock.name}({ticker}) DB 저장 실패: {e}")
\ No newline at end of file
+        print(f"{stock.name}({ticker}) DB 저장 실패: {e}")
+        stats['error'] = str(e)
+        return stats
+
+    print(f"{stock.name}({ticker}) 차트 업데이트 완료 ({stats['mode']}: 수신 {stats['fetched']}건 / 저장 {stats['written']}건)")
+    return stats
@@ -1,3 +1,1079 @@
-from django.test import TestCase
+import contextlib
+import io
+import math
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import numpy as np
+import pandas as pd
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.test import APIClient
+
+from . import fdr_cache, news
+from .indicators import STREAM_COLUMNS, load_series, recompute_values
+from .management.commands import refresh_charts
+from .management.commands.check_query_plans import FULL_SCAN_PATTERNS
+from .models import Stock, DailyPrice, Chartprice, EtfSummary, IndicatorState, MarketIndex, PriceBar, StockCorrelation, Watchlist
+from .search import stock_index
+from .services import (
+    KRX_MARKETS,
+    KRX_MAX_RETRIES,
+    advance_indicator_states,
+    fetch_krx_markets,
+    fetch_market,
+    rebuild_indicator_states,
+    refresh_market_indexes,
+    save_krx_payloads,
+)
+from .backtest import run_backtest
+from .constants import trading_days
+from .etf import etf_analytics
+from .utils import minmax_downsample
+
+DAY = date(2026, 10, 16)
+
+
+def krx_item(ticker, close, market='KOSPI', nav=None):
+    """KRX 일별 시세 OutBlock_1 한 건"""
+    item = {
+        'ISU_CD': ticker, 'ISU_NM': ticker, 'MKT_NM': market,
+        'MKTCAP': str(close * 1000), 'LIST_SHRS': '1000',
+        'TDD_CLSPRC': str(close), 'TDD_OPNPRC': str(close), 'TDD_HGPRC': str(close), 'TDD_LWPRC': str(close),
+        'ACC_TRDVOL': '10', 'FLUC_RT': '0.00', 'ACC_TRDVAL': str(close * 10), 'CMPPREVDD_PRC': '0',
+    }
+    if nav is not None:
+        item['NAV'] = str(nav)
+    return item
+
+
+def krx_payloads(tickers, close):
+    """짝수 번째는 KOSPI, 홀수 번째는 KOSDAQ, 'E' 로 시작하면 ETF"""
+    payloads = {'KOSPI': [], 'KOSDAQ': [], 'ETF': []}
+    for i, ticker in enumerate(tickers):
+        if ticker.startswith('E'):
+            payloads['ETF'].append(krx_item(ticker, close, market=None, nav=close))
+        else:
+            market = 'KOSPI' if i % 2 == 0 else 'KOSDAQ'
+            payloads[market].append(krx_item(ticker, close, market=market))
+    return payloads
+
+
+def ingest(db_date, payloads, **kwargs):
+    # 수집 로그(print)는 테스트 출력에서 숨김
+    with contextlib.redirect_stdout(io.StringIO()):
+        return save_krx_payloads(db_date, payloads, **kwargs)
+
+
+def day_snapshot(db_date):
+    return DailyPrice.objects.filter(date=db_date).aggregate(count=Count('id'), total=Sum('close_price'))
+
+
+class KrxReloadConcurrencyTests(TransactionTestCase):
+    """같은 날짜를 다시 수집하는 동안 다른 커넥션은 이전 시세 또는 새 시세 전체만 본다."""
+
+    def test_reader_never_sees_partial_day(self):
+        old_tickers = [f'S{i:04d}' for i in range(600)] + [f'E{i:03d}' for i in range(50)]
+        new_tickers = old_tickers[100:] + [f'S{i:04d}' for i in range(600, 700)]
+        ingest(DAY, krx_payloads(old_tickers, 1000))
+        old = day_snapshot(DAY)
+        expected_new = {'count': len(new_tickers), 'total': len(new_tickers) * 2000}
+
+        seen, errors = [], []
+        writing, stop, ready = threading.Event(), threading.Event(), threading.Event()
+        reads_during_write = 0
+
+        def reader():
+            nonlocal reads_during_write
+            try:
+                while not stop.is_set():
+                    during = writing.is_set()
+                    seen.append(day_snapshot(DAY))
+                    reads_during_write += during
+                    ready.set()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                ready.set()
+                connection.close()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        ready.wait(5)
+        writing.set()
+        try:
+            ingest(DAY, krx_payloads(new_tickers, 2000))
+        finally:
+            writing.clear()
+            stop.set()
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertGreater(reads_during_write, 0)
+        self.assertEqual(day_snapshot(DAY), expected_new)
+        partial = [snapshot for snapshot in seen if snapshot not in (old, expected_new)]
+        self.assertEqual(partial, [])
+
+
+class KrxEmptyMarketTests(TestCase):
+    """실패(None) 또는 빈 응답([])을 받은 시장은 그날 시세를 지우지 않는다."""
+
+    def setUp(self):
+        self.tickers = [f'S{i:04d}' for i in range(20)] + [f'E{i:03d}' for i in range(4)]
+        ingest(DAY, krx_payloads(self.tickers, 1000))
+        self.before = day_snapshot(DAY)
+
+    def latest_dates(self):
+        return dict(Stock.objects.values_list('ticker', 'latest_price__date'))
+
+    def test_all_markets_empty_keeps_day(self):
+        latest = self.latest_dates()
+        self.assertEqual(ingest(DAY, {'KOSPI': [], 'KOSDAQ': [], 'ETF': []}), {})
+        self.assertEqual(day_snapshot(DAY), self.before)
+        self.assertEqual(self.latest_dates(), latest)
+
+    def test_empty_or_failed_market_keeps_its_rows(self):
+        payloads = krx_payloads(self.tickers, 2000)
+        ingest(DAY, {'KOSPI': payloads['KOSPI'][:5], 'KOSDAQ': [], 'ETF': None})
+
+        closes = dict(DailyPrice.objects.filter(date=DAY).values_list('stock_id', 'close_price'))
+        self.assertEqual(len(closes), len(self.tickers) - (len(payloads['KOSPI']) - 5))
+        kosdaq = [item['ISU_CD'] for item in payloads['KOSDAQ']]
+        etf = [item['ISU_CD'] for item in payloads['ETF']]
+        self.assertTrue(all(closes[ticker] == 1000 for ticker in kosdaq + etf))
+        self.assertTrue(all(closes[item['ISU_CD']] == 2000 for item in payloads['KOSPI'][:5]))
+
+
+class KrxBackfillSnapshotTests(TestCase):
+    """최신 시세보다 오래된 날짜를 백필해도 종목 스냅샷은 바뀌지 않고, 없던 종목만 추가된다."""
+
+    OLD_DAY = date(2020, 3, 2)
+
+    def snapshot(self):
+        return {
+            row['ticker']: row
+            for row in Stock.objects.values('ticker', 'name', 'market_type', 'market_cap', 'total_shares', 'latest_price__date')
+        }
+
+    def test_old_day_keeps_latest_snapshot(self):
+        ingest(DAY, krx_payloads(['S0000', 'S0001'], 50000))
+        before = self.snapshot()
+
+        payloads = krx_payloads(['S0000', 'S0001', 'S0002'], 10000)
+        payloads['KOSPI'][0]['ISU_NM'] = '예전 이름'
+        ingest(self.OLD_DAY, payloads, advance_indicators=False, refresh_indexes=False)
+
+        after = self.snapshot()
+        self.assertEqual({ticker: after[ticker] for ticker in before}, before)
+        self.assertEqual(after['S0000']['market_cap'], 50000 * 1000)
+        # 백필로 처음 들어온 종목은 그날 값으로 생성
+        self.assertEqual(after['S0002']['market_cap'], 10000 * 1000)
+        self.assertEqual(after['S0002']['latest_price__date'], self.OLD_DAY)
+        self.assertEqual(DailyPrice.objects.filter(date=self.OLD_DAY).count(), 3)
+
+    def test_newer_day_updates_snapshot(self):
+        ingest(self.OLD_DAY, krx_payloads(['S0000'], 10000), advance_indicators=False, refresh_indexes=False)
+        ingest(DAY, krx_payloads(['S0000'], 50000))
+        self.assertEqual(self.snapshot()['S0000']['market_cap'], 50000 * 1000)
+
+
+class StockQueryCountTests(TestCase):
+    """목록/검색/상세 응답은 종목 수와 관계없이 고정된 쿼리 수로 끝난다 (N+1 방지)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tickers = [f'S{i:04d}' for i in range(200)]
+        ingest(DAY, krx_payloads(cls.tickers, 1000))
+        cls.user = get_user_model().objects.create_user(username='watcher', password='pw')
+        Watchlist.objects.bulk_create(Watchlist(user=cls.user, stock_id=ticker) for ticker in cls.tickers)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_watchlist_list(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('stocks:watchlist-list'))
+        self.assertEqual(len(response.data), 200)
+        self.assertEqual(response.data[0]['stock']['latest_price']['close_price'], 1000)
+
+    def test_stock_search(self):
+        # 인덱스 동기화(시그니처 + 종목 목록) 2번 + 종목 조회 1번, 이후 검색은 종목 조회 1번
+        stock_index.invalidate()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('stocks:stock-search'), {'q': 's00'})
+        self.assertEqual(len(response.data), 10)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('stocks:stock-search'), {'q': 's01'})
+        self.assertEqual(len(response.data), 10)
+        self.assertIsNotNone(response.data[0]['latest_price'])
+
+    def test_stock_detail(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('stocks:stock-detail', args=['S0007']))
+        self.assertEqual(response.data['latest_price']['close_price'], 1000)
+
+
+class PriceBarTests(TestCase):
+    """수집할 때마다 그 날짜가 걸친 주봉/월봉을 다시 집계하고, 캔들 API 는 interval 별로 돌려준다."""
+
+    # 2026-09-28(월) ~ 2026-10-09(금) 두 주, 9월/10월에 걸침
+    DAYS = [date(2026, 9, 28) + timedelta(days=i) for i in range(12) if (date(2026, 9, 28) + timedelta(days=i)).weekday() < 5]
+
+    def ingest_day(self, day, close):
+        payloads = krx_payloads(['S0000'], close)
+        item = payloads['KOSPI'][0]
+        item.update(TDD_OPNPRC=str(close - 1), TDD_HGPRC=str(close + 5), TDD_LWPRC=str(close - 5))
+        ingest(day, payloads)
+
+    def bars(self, interval):
+        return list(PriceBar.objects.filter(stock_id='S0000', interval=interval).order_by('date').values_list(
+            'date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+        ))
+
+    def setUp(self):
+        for i, day in enumerate(self.DAYS):
+            self.ingest_day(day, 1000 + 10 * i)
+
+    def test_weekly_and_monthly_bars(self):
+        self.assertEqual(self.bars('1w'), [
+            (date(2026, 9, 28), 999, 1045, 995, 1040, 50),
+            (date(2026, 10, 5), 1049, 1095, 1045, 1090, 50),
+        ])
+        # 9월: 9/28 ~ 9/30, 10월: 10/1 ~ 10/9
+        self.assertEqual(self.bars('1m'), [
+            (date(2026, 9, 1), 999, 1025, 995, 1020, 30),
+            (date(2026, 10, 1), 1029, 1095, 1025, 1090, 70),
+        ])
+
+    def test_reingest_updates_bar(self):
+        self.ingest_day(date(2026, 10, 1), 2000)
+        self.assertEqual(self.bars('1w')[0], (date(2026, 9, 28), 999, 2005, 995, 1040, 50))
+        self.assertEqual(self.bars('1m')[1], (date(2026, 10, 1), 1999, 2005, 1035, 1090, 70))
+
+    def test_candles_view(self):
+        url = reverse('stocks:stock-candles', args=['S0000'])
+        weekly = APIClient().get(url, {'interval': '1w', 'period': '5y'}).data
+        self.assertEqual([row['date'] for row in weekly], [date(2026, 9, 28), date(2026, 10, 5)])
+        self.assertEqual(weekly[1]['close_price'], 1090)
+
+        daily = APIClient().get(url, {'interval': '1d', 'period': '5y'}).data
+        self.assertEqual(len(daily), len(self.DAYS))
+
+        response = APIClient().get(url, {'interval': '1h'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ChartCacheHeaderTests(TestCase):
+    """차트 응답의 ETag / Last-Modified 는 차트 워터마크와 기간 끝(오늘) 둘 다 반영한다."""
+
+    def setUp(self):
+        ingest(DAY, krx_payloads(['S0000'], 1000))
+        Chartprice.objects.create(stock_id='S0000', date=DAY, close_price=1000)
+        Stock.objects.filter(ticker='S0000').update(chart_updated_at=timezone.make_aware(datetime(2026, 10, 16, 18)))
+        self.url = reverse('stocks:stock-chart', args=['S0000'])
+
+    def get(self, now, data=None, **headers):
+        with mock.patch.object(timezone, 'now', return_value=timezone.make_aware(now)):
+            return APIClient().get(self.url, data, **headers)
+
+    def test_not_modified_same_day(self):
+        first = self.get(datetime(2026, 10, 16, 20))
+        self.assertEqual(first.status_code, 200)
+        again = self.get(datetime(2026, 10, 16, 23), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_window_end_rolls_over(self):
+        first = self.get(datetime(2026, 10, 16, 20))
+        # 워터마크는 그대로지만 다음 날은 기간이 하루 밀린 다른 응답
+        next_day = self.get(datetime(2026, 10, 17, 9), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(next_day.status_code, 200)
+        self.assertNotEqual(next_day['ETag'], first['ETag'])
+        self.assertGreater(
+            parse_http_date(next_day['Last-Modified']), parse_http_date(first['Last-Modified']),
+        )
+
+    def test_encoding_param(self):
+        now = datetime(2026, 10, 16, 20)
+        binary = self.get(now, data={'encoding': 'binary'})
+        self.assertEqual(binary['Content-Type'], 'application/octet-stream')
+        columnar = self.get(now, data={'encoding': 'columnar'})
+        self.assertEqual(columnar.status_code, 200)
+        self.assertNotEqual(columnar['ETag'], binary['ETag'])
+        self.assertEqual(self.get(now, data={'encoding': 'xml'}).status_code, 400)
+        # ?format= 은 DRF 렌더러 선택 그대로
+        self.assertEqual(self.get(now, data={'format': 'json'}).data, [{'date': DAY, 'close_price': 1000}])
+
+
+class StockScreenerTests(TestCase):
+    """스크리너: 최신 시세 스냅샷 + 20일 평균 거래량에 대한 필터 / 정렬 / 페이지"""
+
+    def setUp(self):
+        tickers = [f'S{i:04d}' for i in range(10)]
+        ingest(DAY - timedelta(days=1), krx_payloads(tickers, 1000))
+        payloads = {'KOSPI': [], 'KOSDAQ': [], 'ETF': []}
+        for i, ticker in enumerate(tickers):
+            market = 'KOSPI' if i % 2 == 0 else 'KOSDAQ'
+            payloads[market].append(krx_item(ticker, 1000 * (i + 1), market=market))
+        # S0003 만 거래량 급증 (10 → 100)
+        payloads['KOSDAQ'][1]['ACC_TRDVOL'] = '100'
+        ingest(DAY, payloads)
+
+    def screen(self, **params):
+        response = APIClient().get(reverse('stocks:stock-screener'), params)
+        return response.status_code, response.data
+
+    def test_filter_sort_page(self):
+        status_code, data = self.screen(filter='market_type=KOSDAQ,market_cap>3e6', sort='-market_cap', page_size=2)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(data['date'], DAY)
+        # KOSDAQ 은 홀수 번째 (시가총액 = 종가 × 1000)
+        self.assertEqual(data['count'], 4)
+        self.assertEqual([row['ticker'] for row in data['results']], ['S0009', 'S0007'])
+
+        _, page2 = self.screen(filter='market_type=KOSDAQ,market_cap>3e6', sort='-market_cap', page_size=2, page=2)
+        self.assertEqual([row['ticker'] for row in page2['results']], ['S0005', 'S0003'])
+
+    def test_volume_against_average(self):
+        _, data = self.screen(filter='volume>volume_avg20')
+        self.assertEqual([row['ticker'] for row in data['results']], ['S0003'])
+        self.assertEqual(data['results'][0]['volume_avg20'], 55)
+        self.assertEqual(data['results'][0]['volume_ratio'], 100 / 55)
+
+    def test_invalid_expressions(self):
+        for params in ({'filter': 'market_cap~1'}, {'filter': 'unknown>1'}, {'filter': 'name>1'}, {'sort': 'unknown'}):
+            self.assertEqual(self.screen(**params)[0], 400, params)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@mock.patch('stocks.services.MOVERS_TOP_K', 2)
+class MarketMoversTests(TestCase):
+    """시장 랭킹: 수집 때 시장별 상위 k 종목과 상승/하락 종목 수를 저장, 다시 수집하면 캐시된 응답도 바뀐다."""
+
+    RATES = ['3.00', '-2.00', '0.00', '5.00', '-4.00', '10.00']
+
+    def payloads(self, rates):
+        payloads = {'KOSPI': [], 'KOSDAQ': [krx_item('Q0000', 500, market='KOSDAQ')], 'ETF': []}
+        for i, rate in enumerate(rates):
+            item = krx_item(f'S{i:04d}', 1000 * (i + 1))
+            item['FLUC_RT'] = rate
+            payloads['KOSPI'].append(item)
+        # S0005 는 거래정지 (거래량 0) → 등락률 순위에서 제외, 거래대금 순위에는 포함
+        payloads['KOSPI'][5]['ACC_TRDVOL'] = '0'
+        return payloads
+
+    def movers(self, **params):
+        return APIClient().get(reverse('stocks:market-movers'), params).data
+
+    def tickers(self, rows):
+        return [row['ticker'] for row in rows]
+
+    def test_rankings_and_breadth(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest(DAY, self.payloads(self.RATES))
+
+        data = self.movers(market='KOSPI')
+        self.assertEqual(data['date'], DAY)
+        self.assertEqual(list(data['markets']), ['KOSPI'])
+        kospi = data['markets']['KOSPI']
+        self.assertEqual(self.tickers(kospi['gainers']), ['S0003', 'S0000'])
+        self.assertEqual(self.tickers(kospi['losers']), ['S0004', 'S0001'])
+        self.assertEqual(self.tickers(kospi['value']), ['S0005', 'S0004'])
+        self.assertEqual(kospi['breadth'], {
+            'advancers': 3, 'decliners': 2, 'unchanged': 1, 'trading_value': 10 * 1000 * (1 + 2 + 3 + 4 + 5 + 6),
+        })
+        self.assertEqual(set(self.movers()['markets']), {'KOSPI', 'KOSDAQ'})
+
+    def test_reingest_replaces_cached_rankings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest(DAY, self.payloads(self.RATES))
+        self.assertEqual(self.tickers(self.movers()['markets']['KOSPI']['gainers']), ['S0003', 'S0000'])
+
+        rates = list(self.RATES)
+        rates[1] = '7.00'
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest(DAY, self.payloads(rates))
+        self.assertEqual(self.tickers(self.movers()['markets']['KOSPI']['gainers']), ['S0001', 'S0003'])
+        self.assertEqual(self.tickers(self.movers(date=str(DAY))['markets']['KOSPI']['gainers']), ['S0001', 'S0003'])
+        self.assertEqual(APIClient().get(reverse('stocks:market-movers'), {'date': '2026/10/16'}).status_code, 400)
+
+
+class IndicatorStateTests(TestCase):
+    """봉 단위로 이어서 계산한 보조지표 상태가 전체 시세 재계산과 같은지 확인"""
+
+    TICKERS = ['S0001', 'S0002']
+
+    def setUp(self):
+        rng = np.random.default_rng(19)
+        self.dates = [day.date() for day in pd.bdate_range('2026-05-01', periods=90)]
+        for ticker in self.TICKERS:
+            Stock.objects.create(ticker=ticker, name=ticker, market_type='KOSPI')
+            closes = np.maximum(10000 + np.cumsum(rng.integers(-300, 301, len(self.dates))), 100)
+            # 마지막 날은 테스트에서 하나씩 추가
+            DailyPrice.objects.bulk_create(
+                self.bar(ticker, day, int(close)) for day, close in zip(self.dates[:-1], closes)
+            )
+        rebuild_indicator_states(self.TICKERS)
+
+    def bar(self, ticker, day, close):
+        return DailyPrice(
+            stock_id=ticker, date=day, open_price=close, high_price=close + 150, low_price=close - 120,
+            close_price=close, volume=1000,
+        )
+
+    def assertMatchesRecompute(self):
+        for ticker in self.TICKERS:
+            expected = recompute_values(load_series(ticker))
+            current = IndicatorState.objects.get(stock_id=ticker)
+            self.assertEqual(current.date, DailyPrice.objects.filter(stock_id=ticker).latest('date').date)
+            for name in STREAM_COLUMNS:
+                value = getattr(current, name)
+                self.assertIsNotNone(value, name)
+                self.assertTrue(
+                    math.isclose(value, expected[name], rel_tol=1e-9, abs_tol=1e-6),
+                    f'{ticker} {name}: {value} != {expected[name]}',
+                )
+
+    def test_advance_new_day(self):
+        day = self.dates[-1]
+        DailyPrice.objects.bulk_create(self.bar(ticker, day, 10500) for ticker in self.TICKERS)
+        self.assertEqual(advance_indicator_states(day, self.TICKERS), {'advanced': 2, 'rebuilt': 0})
+        self.assertMatchesRecompute()
+
+    def test_same_day_reingest(self):
+        day = self.dates[-1]
+        DailyPrice.objects.bulk_create(self.bar(ticker, day, 10500) for ticker in self.TICKERS)
+        advance_indicator_states(day, self.TICKERS)
+
+        # 장중 값으로 수집된 뒤 확정 종가로 다시 수집: 마지막 봉 반영 전 상태에서 다시 진행
+        DailyPrice.objects.filter(date=day).update(close_price=9800, high_price=9900, low_price=9700)
+        self.assertEqual(advance_indicator_states(day, self.TICKERS), {'advanced': 2, 'rebuilt': 0})
+        self.assertMatchesRecompute()
+
+    def test_past_date_revision(self):
+        day = self.dates[-1]
+        DailyPrice.objects.bulk_create(self.bar(ticker, day, 10500) for ticker in self.TICKERS)
+        advance_indicator_states(day, self.TICKERS)
+
+        past = self.dates[-30]
+        DailyPrice.objects.filter(date=past).update(close_price=12000, high_price=12100, low_price=11900)
+        self.assertEqual(advance_indicator_states(past, self.TICKERS), {'advanced': 0, 'rebuilt': 2})
+        self.assertMatchesRecompute()
+
+
+class MinmaxDownsampleTests(SimpleTestCase):
+
+    def assertKeepsShape(self, values, points):
+        values = np.asarray(values)
+        picked = minmax_downsample(values, points)
+        n = len(values)
+        self.assertLessEqual(len(picked), points)
+        self.assertTrue(np.all(np.diff(picked) > 0))
+        self.assertEqual(picked[0], 0)
+        self.assertEqual(picked[-1], n - 1)
+        self.assertEqual(values[picked].min(), values.min())
+        self.assertEqual(values[picked].max(), values.max())
+
+        # 구간마다 최저/최고 값이 남아 있는지 (같은 값이 여러 개면 어느 위치든 상관없음)
+        buckets = max(1, (points - 2) // 2)
+        bucket = (np.arange(1, n - 1) - 1) * buckets // (n - 2)
+        kept = set(picked.tolist())
+        for b in range(buckets):
+            positions = np.flatnonzero(bucket == b) + 1
+            kept_values = [values[i] for i in positions if i in kept]
+            self.assertIn(values[positions].min(), kept_values)
+            self.assertIn(values[positions].max(), kept_values)
+        return picked
+
+    def test_short_series_unchanged(self):
+        for n in (0, 1, 2, 10):
+            np.testing.assert_array_equal(minmax_downsample(np.arange(n), 10), np.arange(n))
+
+    def test_random_walk(self):
+        values = np.cumsum(np.random.default_rng(12).normal(size=5000))
+        for points in (4, 5, 50, 500, 4999):
+            self.assertKeepsShape(values, points)
+
+    def test_ties(self):
+        values = np.tile([3, 1, 3, 1, 2], 200)
+        picked = self.assertKeepsShape(values, 40)
+        self.assertGreater(len(picked), 2)
+
+    def test_constant_series(self):
+        self.assertKeepsShape(np.full(1000, 7), 100)
+
+    def test_four_points_keeps_ends_and_extremes(self):
+        values = np.array([5, 9, 2, 8, 0, 6, 10, 4, 3])
+        np.testing.assert_array_equal(minmax_downsample(values, 4), [0, 4, 6, 8])
+
+
+@mock.patch('stocks.services.KRX_BACKOFF_BASE', 0)
+class KrxFetchTests(SimpleTestCase):
+    """KRX 조회: 세 시장 동시 요청, 5xx/429 만 재시도"""
+
+    def mock_client(self, handler):
+        return httpx.Client(transport=httpx.MockTransport(handler))
+
+    def fetch(self, handler, url='https://krx.test/kospi'):
+        calls = []
+
+        def counting(request):
+            calls.append(request)
+            return handler(request)
+
+        with self.mock_client(counting) as client, contextlib.redirect_stdout(io.StringIO()):
+            items = fetch_market(client, url, '20261016', 'KOSPI')
+        return items, len(calls)
+
+    def test_markets_fetched_concurrently(self):
+        latency = {url: delay for (_, url, _, _), delay in zip(KRX_MARKETS, (0.3, 0.5, 0.8))}
+
+        def handler(request):
+            url = str(request.url.copy_with(query=None))
+            time.sleep(latency[url])
+            return httpx.Response(200, json={'OutBlock_1': [krx_item(url, 1000)]})
+
+        with self.mock_client(handler) as client:
+            started = time.perf_counter()
+            payloads = fetch_krx_markets('20261016', client=client)
+            elapsed = time.perf_counter() - started
+
+        # 가장 느린 시장 하나만큼 걸림 (순차였다면 1.6초)
+        self.assertGreaterEqual(elapsed, 0.8)
+        self.assertLess(elapsed, 1.2)
+        self.assertEqual({label: len(items) for label, items in payloads.items()}, {'KOSPI': 1, 'KOSDAQ': 1, 'ETF': 1})
+
+    def test_retries_server_errors_and_rate_limit(self):
+        for status in (500, 503, 429):
+            responses = iter([httpx.Response(status), httpx.Response(200, json={'OutBlock_1': []})])
+            items, calls = self.fetch(lambda request: next(responses))
+            self.assertEqual((items, calls), ([], 2), status)
+
+    def test_gives_up_after_max_retries(self):
+        items, calls = self.fetch(lambda request: httpx.Response(502))
+        self.assertEqual((items, calls), (None, KRX_MAX_RETRIES))
+
+    def test_retries_timeouts(self):
+        attempts = iter([True, False])
+
+        def handler(request):
+            if next(attempts):
+                raise httpx.ReadTimeout('timeout', request=request)
+            return httpx.Response(200, json={'OutBlock_1': [krx_item('S0001', 1000)]})
+
+        items, calls = self.fetch(handler)
+        self.assertEqual((len(items), calls), (1, 2))
+
+    def test_client_errors_not_retried(self):
+        for status in (400, 401, 403, 404):
+            items, calls = self.fetch(lambda request: httpx.Response(status))
+            self.assertEqual((items, calls), (None, 1), status)
+
+    def test_missing_outblock_is_failure(self):
+        items, calls = self.fetch(lambda request: httpx.Response(200, json={'respMsg': 'error'}))
+        self.assertEqual((items, calls), (None, 1))
+
+    def test_non_object_body_is_failure(self):
+        for body in (['error'], 'Service Unavailable'):
+            items, calls = self.fetch(lambda request: httpx.Response(200, json=body))
+            self.assertEqual((items, calls), (None, 1), body)
+
+
+@mock.patch.object(refresh_charts, 'RETRY_BACKOFF_BASE', 0)
+class RefreshChartsTests(TransactionTestCase):
+    """refresh_charts: 워커가 update_chart_data 로 증분/재적재/저장, 모든 FDR 호출은 속도 제한, 실패 종목은 재시도"""
+
+    def setUp(self):
+        ingest(DAY, krx_payloads(['S0000', 'S0001', 'S0002', 'S0003'], 1000))
+        dates = pd.bdate_range(end=date.today() - timedelta(days=1), periods=30)
+        self.series = pd.DataFrame({'Close': np.arange(1000, 1030)}, index=dates)
+        self.expected = [(day.date(), close) for day, close in zip(dates, range(1000, 1030))]
+        self.calls = []
+        self.failed_once = set()
+
+        stored = self.expected[:20]
+        old_day = stored[0][0] - timedelta(days=30)
+        # S0001: 저장된 값이 그대로 → 증분, S0002: 겹치는 구간 종가가 다름 → 전체 재적재
+        Chartprice.objects.bulk_create(
+            [Chartprice(stock_id='S0001', date=day, close_price=close) for day, close in stored]
+            + [Chartprice(stock_id='S0002', date=day, close_price=close) for day, close in stored[:-1]]
+            + [
+                Chartprice(stock_id='S0002', date=stored[-1][0], close_price=1),
+                Chartprice(stock_id='S0001', date=old_day, close_price=1),
+                Chartprice(stock_id='S0002', date=old_day, close_price=1),
+            ]
+        )
+        self.old_day = old_day
+
+    def data_reader(self, source, ticker, start, end=None, use_cache=True):
+        self.calls.append((ticker, start, use_cache))
+        if ticker == 'S0003' and ticker not in self.failed_once:
+            self.failed_once.add(ticker)
+            raise requests.ConnectionError('connection reset')
+        return self.series[self.series.index >= pd.Timestamp(start)]
+
+    def chart(self, ticker):
+        return list(Chartprice.objects.filter(stock_id=ticker).order_by('date').values_list('date', 'close_price'))
+
+    def test_refresh_all(self):
+        out = io.StringIO()
+        with mock.patch.object(fdr_cache, 'data_reader', side_effect=self.data_reader), \
+                contextlib.redirect_stdout(io.StringIO()):
+            started = time.monotonic()
+            call_command('refresh_charts', workers=4, rate=4, retries=1, stdout=out)
+            elapsed = time.monotonic() - started
+
+        # 새 종목(S0000), 재적재(S0002), 재시도(S0003) 모두 FDR 전체 시세와 같아짐
+        for ticker in ('S0000', 'S0002', 'S0003'):
+            self.assertEqual(self.chart(ticker), self.expected, ticker)
+        # 증분은 기존 행을 지우지 않음
+        self.assertEqual(self.chart('S0001'), [(self.old_day, 1)] + self.expected)
+
+        calls = {}
+        for ticker, start, use_cache in self.calls:
+            calls.setdefault(ticker, []).append(start)
+            # 캐시는 전체 기간 조회에만
+            self.assertEqual(use_cache, start == date.today() - timedelta(days=365 * 5), ticker)
+        full_start = date.today() - timedelta(days=365 * 5)
+        incremental_start = self.expected[19][0] - timedelta(days=7)
+        self.assertEqual(calls['S0001'], [incremental_start])
+        self.assertEqual(calls['S0002'], [incremental_start, full_start])
+        self.assertEqual(calls['S0003'], [full_start, full_start])
+
+        # 토큰 4개를 쓴 뒤 나머지 2번은 0.25초 간격으로 기다림
+        self.assertEqual(len(self.calls), 6)
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertIn('완료 4/4종목', out.getvalue())
+        self.assertIn('재시도 1회차: 1종목', out.getvalue())
+
+
+class CorrelationTests(TransactionTestCase):
+    """상관계수 배치: 빠진 종가는 채우지 않고, 구간 끝에 시세가 없거나 관측이 부족한 종목은 제외"""
+
+    def setUp(self):
+        self.matrix_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.matrix_dir.cleanup)
+
+        dates = pd.bdate_range(end=DAY, periods=31).date
+        rng = np.random.default_rng(0)
+        market = rng.normal(0, 0.01, len(dates))
+        series = {
+            'S0000': market,
+            'S0001': market + rng.normal(0, 0.002, len(dates)),
+            'S0002': rng.normal(0, 0.01, len(dates)),
+            'S0003': market,
+            'S0004': market + rng.normal(0, 0.002, len(dates)),
+            'S0005': market,
+        }
+        ingest(DAY, krx_payloads(list(series), 1000))
+
+        # S0003: 마지막 날 거래정지, S0004: 중간 하루 빠짐, S0005: 구간 절반만 상장
+        missing = {'S0003': {dates[-1]}, 'S0004': {dates[15]}, 'S0005': set(dates[:15])}
+        Chartprice.objects.bulk_create(
+            Chartprice(stock_id=ticker, date=day, close_price=int(close))
+            for ticker, returns in series.items()
+            for day, close in zip(dates, 10000 * np.cumprod(1 + returns))
+            if day not in missing.get(ticker, ())
+        )
+
+    def test_masks_missing_tickers(self):
+        with override_settings(MATRIX_CACHE_DIR=self.matrix_dir.name):
+            call_command('compute_correlations', end=DAY.strftime('%Y%m%d'), days=30, top=3, workers=1, stdout=io.StringIO())
+
+        pairs = {
+            (stock, other): correlation
+            for stock, other, correlation in StockCorrelation.objects.values_list('stock_id', 'other_id', 'correlation')
+        }
+        self.assertEqual({stock for stock, _ in pairs}, {'S0000', 'S0001', 'S0002', 'S0004'})
+        self.assertEqual({other for _, other in pairs}, {'S0000', 'S0001', 'S0002', 'S0004'})
+        top = dict(StockCorrelation.objects.filter(rank=1).values_list('stock_id', 'other_id'))
+        self.assertIn(top['S0000'], ('S0001', 'S0004'))
+        # 빠진 하루를 직전 종가로 채우지 않으므로 S0004 도 시장과 거의 같이 움직임
+        self.assertGreater(pairs['S0000', 'S0004'], 0.9)
+        self.assertLess(abs(pairs.get(('S0000', 'S0002'), 0)), 0.5)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class NewsCacheTests(SimpleTestCase):
+    """뉴스 프록시: single-flight, stale-while-revalidate, 업스트림 타임아웃 (업스트림은 httpx MockTransport)"""
+
+    TICKER = '005930'
+    QUERY = '삼성전자 우'
+
+    def setUp(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.respond = self.news_response
+        self.addCleanup(self.drain)
+        client = httpx.Client(transport=httpx.MockTransport(self.upstream))
+        self.addCleanup(client.close)
+        patcher = mock.patch.object(news, '_client', client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upstream(self, request):
+        self.calls.append(request)
+        self.release.wait(10)
+        return self.respond(request)
+
+    def news_response(self, request):
+        query = request.url.params['query']
+        return httpx.Response(200, json={'items': [{
+            'title': f'<b>{query}</b> 실적 &amp; 전망', 'link': 'https://news.test/1',
+            'pubDate': 'Fri, 16 Oct 2026 09:10:00 +0900',
+        }]})
+
+    def drain(self):
+        # 뒤에서 돌던 갱신을 끝내서 다음 테스트에 in-flight 항목이 남지 않게 함
+        self.release.set()
+        for future in list(news._inflight.values()):
+            future.exception(10)
+        news.cache.clear()
+
+    def test_concurrent_requests_share_one_upstream_call(self):
+        barrier = threading.Barrier(8)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(news.get_news(self.TICKER, self.QUERY))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(len(self.calls), 1)
+        params = self.calls[0].url.params
+        self.assertEqual((params['query'], params['display'], params['sort']), (self.QUERY, str(news.NEWS_DISPLAY), 'date'))
+        self.assertIn('X-Naver-Client-Id', self.calls[0].headers)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0][0]['title'], '삼성전자 우 실적 & 전망')
+        self.assertEqual(results[0][0]['date'], '10.16 09:10')
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_stale_entry_served_while_refreshing(self):
+        stale = [{'title': '지난 기사'}]
+        news.cache.set(news.cache_key(self.TICKER), {
+            'items': [], 'news': stale, 'fetched_at': time.time() - news.NEWS_FRESH_TTL - 1,
+        })
+
+        # 업스트림이 막혀 있어도 지난 값을 바로 돌려줌
+        started = time.perf_counter()
+        self.assertEqual(news.get_news(self.TICKER, self.QUERY), stale)
+        self.assertEqual(news.get_news(self.TICKER, self.QUERY), stale)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        refresh = news._inflight[self.TICKER]
+        self.release.set()
+        refresh.result(10)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(news.get_news(self.TICKER, self.QUERY)[0]['title'], '삼성전자 우 실적 & 전망')
+
+    def test_fresh_entry_not_refreshed(self):
+        self.release.set()
+        news.get_news(self.TICKER, self.QUERY)
+        news.get_news(self.TICKER, self.QUERY)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_cached_per_ticker(self):
+        # 같은 이름의 두 종목은 캐시를 따로 쓰고, 키는 종목명이 아닌 종목코드
+        self.release.set()
+        news.get_news('000001', self.QUERY)
+        news.get_news('000002', self.QUERY)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(news.cache_key(self.TICKER), 'news:005930')
+        self.assertIsNotNone(news.cache.get(news.cache_key('000001')))
+
+    @mock.patch.object(news, 'NEWS_TIMEOUT', 0.2)
+    def test_upstream_timeout(self):
+        started = time.perf_counter()
+        with self.assertRaises(news.NewsUnavailable):
+            news.get_news(self.TICKER, self.QUERY)
+        self.assertLess(time.perf_counter() - started, 1)
+
+    def test_upstream_error(self):
+        self.release.set()
+        self.respond = lambda request: httpx.Response(500)
+        with self.assertRaises(news.NewsUnavailable):
+            news.get_news(self.TICKER, self.QUERY)
+
+        def refuse(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        self.respond = refuse
+        with self.assertRaises(news.NewsUnavailable):
+            news.get_news(self.TICKER, self.QUERY)
+        self.assertIsNone(news.cache.get(news.cache_key(self.TICKER)))
+
+
+class BacktestTests(SimpleTestCase):
+    """run_backtest: 손으로 계산한 작은 종가 행렬과 비교"""
+
+    # 2종목 × 4일, 50:50
+    CLOSES = np.array([[10, 20], [11, 20], [12, 10], [12, 20]], dtype=np.float64)
+    WEIGHTS = np.array([0.5, 0.5])
+
+    def test_buy_and_hold(self):
+        equity, drawdown, metrics = run_backtest(self.CLOSES, self.WEIGHTS, np.array([0]), risk_free=0.02)
+
+        # 0.5 × A/10 + 0.5 × B/20
+        np.testing.assert_allclose(equity, [1.0, 1.05, 0.85, 1.1])
+        np.testing.assert_allclose(drawdown, [0, 0, 0.85 / 1.05 - 1, 0])
+        returns = np.array([0.05, 0.85 / 1.05 - 1, 1.1 / 0.85 - 1])
+        volatility = returns.std() * math.sqrt(252)
+        self.assertAlmostEqual(metrics['total_return'], 0.1)
+        self.assertAlmostEqual(metrics['cagr'], 1.1 ** (252 / 4) - 1)
+        self.assertAlmostEqual(metrics['volatility'], volatility)
+        self.assertAlmostEqual(metrics['sharpe'], (returns.mean() * 252 - 0.02) / volatility)
+        self.assertAlmostEqual(metrics['max_drawdown'], 0.85 / 1.05 - 1)
+        self.assertEqual(metrics['rebalances'], 0)
+
+    def test_rebalance(self):
+        equity, _, metrics = run_backtest(self.CLOSES, self.WEIGHTS, np.array([0, 2]))
+
+        # 3일째 종가(평가액 0.85)로 0.425 씩 다시 나눈 뒤 A 는 그대로, B 는 두 배
+        np.testing.assert_allclose(equity, [1.0, 1.05, 0.85, 0.425 + 0.85])
+        self.assertAlmostEqual(metrics['total_return'], 0.275)
+        self.assertEqual(metrics['rebalances'], 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BacktestViewTests(TestCase):
+    """백테스트 API: 잘못된 파라미터는 400, 종가 행렬은 Chartprice 에서"""
+
+    def setUp(self):
+        ingest(DAY, krx_payloads(['S0000', 'S0001'], 1000))
+        days = pd.bdate_range(end=timezone.now().date(), periods=4).date
+        Chartprice.objects.bulk_create(
+            Chartprice(stock_id=ticker, date=day, close_price=int(close))
+            for day, row in zip(days, BacktestTests.CLOSES)
+            for ticker, close in zip(['S0000', 'S0001'], row)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username='investor', password='pw'))
+
+    def backtest(self, **params):
+        return self.client.get(reverse('stocks:portfolio-backtest'), {'source': 'tickers', 'tickers': 'S0000,S0001', **params})
+
+    def test_buy_and_hold(self):
+        response = self.backtest(rebalance='none', period='1y')
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.data['metrics']['total_return'], 0.1)
+        self.assertEqual(response.data['weights'], {'S0000': 0.5, 'S0001': 0.5})
+
+    def test_invalid_params(self):
+        for params in ({'risk_free': 'nan'}, {'risk_free': 'inf'}, {'risk_free': '-Infinity'}, {'risk_free': 'x'},
+                       {'points': 'x'}, {'rebalance': 'W'}, {'weights': 'S0000:-1'}):
+            response = self.backtest(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.data)
+
+
+class EtfAnalyticsTests(SimpleTestCase):
+    """etf_analytics: 괴리율 / 추적오차 / z-score 를 손으로 계산한 값과 비교"""
+
+    def test_single_etf(self):
+        closes = np.array([[100], [102], [101], [104]], dtype=np.float64)
+        navs = np.array([[100], [101], [101], [100]], dtype=np.float64)
+        values = etf_analytics(closes, navs, min_days=2)
+
+        premiums = [0.0, 102 / 101 - 1, 0.0]
+        gaps = [1.02 - 1.01, 101 / 102 - 1, 104 / 101 - 100 / 101]
+        self.assertAlmostEqual(values['premium'][0], 0.04)
+        self.assertAlmostEqual(values['premium_avg'][0], statistics.mean(premiums))
+        self.assertAlmostEqual(values['premium_z'][0], (0.04 - statistics.mean(premiums)) / statistics.stdev(premiums))
+        self.assertAlmostEqual(values['tracking_error'][0], statistics.stdev(gaps) * math.sqrt(252))
+
+    def test_missing_nav_and_short_history(self):
+        closes = np.array([[100, 100], [102, 101], [101, 102]], dtype=np.float64)
+        navs = np.array([[0, 100], [0, 100], [0, 100]], dtype=np.float64)
+        values = etf_analytics(closes, navs, min_days=5)
+        # NAV 가 없으면 괴리율도 없음, 관측일이 부족하면 추적오차 / z-score 없음
+        self.assertTrue(np.isnan(values['premium'][0]))
+        self.assertAlmostEqual(values['premium'][1], 0.02)
+        self.assertTrue(np.isnan(values['tracking_error']).all())
+        self.assertTrue(np.isnan(values['premium_z']).all())
+
+
+class EtfSummaryTests(TestCase):
+    """수집할 때 ETF 요약을 갱신하고, ETF 목록 API 는 이상 괴리 필터 / 정렬을 제공한다."""
+
+    def setUp(self):
+        self.days = trading_days(DAY - timedelta(days=60), DAY)[-25:]
+        for i, day in enumerate(self.days):
+            swing = 10 if i % 2 else -10
+            closes = {'E000': 10000 + swing, 'E001': 10000 + swing, 'E002': 10000}
+            if day == DAY:
+                # E000 만 기준일에 괴리율 2% 로 튐
+                closes = {'E000': 10200, 'E001': 10005, 'E002': 10000}
+            ingest(day, {'KOSPI': [], 'KOSDAQ': [], 'ETF': [
+                krx_item('E000', closes['E000'], market=None, nav=10000),
+                krx_item('E001', closes['E001'], market=None, nav=10000),
+                # NAV 미제공
+                krx_item('E002', closes['E002'], market=None),
+            ]})
+
+    def etfs(self, **params):
+        response = APIClient().get(reverse('stocks:etf-list'), params)
+        return [row['ticker'] for row in response.data['results']] if response.status_code == 200 else response.status_code
+
+    def test_summaries(self):
+        summaries = {summary.stock_id: summary for summary in EtfSummary.objects.all()}
+        self.assertEqual(set(summaries), {'E000', 'E001', 'E002'})
+        self.assertTrue(all(summary.date == DAY for summary in summaries.values()))
+        self.assertAlmostEqual(summaries['E000'].premium, 0.02)
+        self.assertTrue(summaries['E000'].anomaly)
+        self.assertGreater(summaries['E000'].premium_z, 3)
+        self.assertFalse(summaries['E001'].anomaly)
+        self.assertIsNone(summaries['E002'].premium)
+        self.assertGreater(summaries['E001'].tracking_error, 0)
+
+    def test_list_filter_and_sort(self):
+        self.assertEqual(self.etfs(anomaly=1), ['E000'])
+        # 값이 없는 ETF 는 정렬 방향과 관계없이 뒤로
+        self.assertEqual(self.etfs(sort='-premium'), ['E000', 'E001', 'E002'])
+        self.assertEqual(self.etfs(sort='premium'), ['E001', 'E000', 'E002'])
+        self.assertEqual(self.etfs(sort='name'), 400)
+
+    def test_backfill_keeps_latest_summary(self):
+        ingest(self.days[0] - timedelta(days=7), {'KOSPI': [], 'KOSDAQ': [], 'ETF': [
+            krx_item('E000', 9000, market=None, nav=10000),
+        ]}, advance_indicators=False, refresh_indexes=False)
+        self.assertEqual(set(EtfSummary.objects.values_list('date', flat=True)), {DAY})
+        self.assertAlmostEqual(EtfSummary.objects.get(stock_id='E000').premium, 0.02)
+
+
+class MarketIndexTests(TestCase):
+    """수집할 때 시장별 시가총액 가중 / 동일 가중 지수를 이어서 계산한다."""
+
+    DAYS = [date(2026, 10, 14), date(2026, 10, 15), DAY]
+    # 날짜별 (종가, 등락률): A 는 상장주식수 1000, B 는 3000
+    PRICES = {
+        'A': [(100, '0.00'), (110, '10.00'), (110, '0.00')],
+        'B': [(200, '0.00'), (190, '-5.00'), (209, '10.00')],
+    }
+
+    def payloads(self, i):
+        kospi = []
+        for ticker, shares in (('A', 1000), ('B', 3000)):
+            close, rate = self.PRICES[ticker][i]
+            item = krx_item(ticker, close)
+            item.update(FLUC_RT=rate, LIST_SHRS=str(shares))
+            kospi.append(item)
+        return {'KOSPI': kospi, 'KOSDAQ': [krx_item('C', 1000, market='KOSDAQ')], 'ETF': []}
+
+    def setUp(self):
+        for i, day in enumerate(self.DAYS):
+            ingest(day, self.payloads(i))
+
+    def index(self, day, market='KOSPI'):
+        return MarketIndex.objects.get(market_type=market, date=day)
+
+    def test_cap_and_equal_weighted(self):
+        first, second, third = (self.index(day) for day in self.DAYS)
+        self.assertEqual((first.cap_index, first.equal_index), (1000, 1000))
+
+        # 전일 시가총액 A 100,000 / B 600,000 → (10,000 - 30,000) / 700,000
+        self.assertAlmostEqual(second.cap_return, -2 / 70)
+        self.assertAlmostEqual(second.equal_return, (0.10 - 0.05) / 2)
+        self.assertAlmostEqual(second.cap_index, 1000 * (1 - 2 / 70))
+        self.assertAlmostEqual(second.equal_index, 1025)
+        self.assertEqual(second.market_cap, 110 * 1000 + 190 * 3000)
+        self.assertEqual(second.constituents, 2)
+        # 거래대금 (종가 × 10): KOSPI 1,100 + 1,900 / 전체 13,000
+        self.assertAlmostEqual(second.value_share, 3000 / 13000)
+
+        # 전일 시가총액 A 110,000 / B 570,000 → 57,000 / 680,000
+        self.assertAlmostEqual(third.cap_index, second.cap_index * (1 + 57000 / 680000))
+        self.assertAlmostEqual(third.equal_index, 1025 * 1.05)
+        self.assertAlmostEqual(self.index(DAY, 'KOSDAQ').cap_index, 1000)
+
+    def test_rebuild_continues_from_previous_index(self):
+        fields = ('market_type', 'date', 'cap_index', 'equal_index')
+        expected = list(MarketIndex.objects.values_list(*fields))
+        # 하루씩 이어 붙인 값과 한 번에 다시 계산한 값은 부동소수점 오차 안에서 같음
+        self.assertEqual(refresh_market_indexes(self.DAYS[1]), 4)
+        rebuilt = list(MarketIndex.objects.values_list(*fields))
+        self.assertEqual([row[:2] for row in rebuilt], [row[:2] for row in expected])
+        for row, expected_row in zip(rebuilt, expected):
+            self.assertAlmostEqual(row[2], expected_row[2])
+            self.assertAlmostEqual(row[3], expected_row[3])
+
+    def test_api(self):
+        client = APIClient()
+        response = client.get(reverse('stocks:market-indexes'))
+        self.assertEqual(response.data['date'], DAY)
+        self.assertEqual(sorted(row['market_type'] for row in response.data['markets']), ['KOSDAQ', 'KOSPI'])
+
+        url = reverse('stocks:market-index-chart', args=['KOSPI'])
+        response = client.get(url, {'period': 'all'})
+        self.assertEqual([row['date'] for row in response.data], self.DAYS)
+        self.assertEqual(response.data[1]['equal_index'], 1025)
+        self.assertEqual(client.get(url, {'weighting': 'price'}).status_code, 400)
+
+
+class QueryPlanTests(TestCase):
+    """check_query_plans 를 CI 에서도 돌려서 주요 쿼리에 전체 스캔이 생기면 실패"""
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            self.skipTest(f'실행 계획 검사를 지원하지 않는 DB: {connection.vendor}')
+        out = io.StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('[실패]', out.getvalue())
+
+
+class FdrCacheEvictionTests(SimpleTestCase):
+    """FDR 캐시 저장 시 디렉터리 전체를 훑는 정리는 상한을 넘을 수 있을 때만 실행"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        fdr_cache._estimated_bytes = None
+        self.addCleanup(setattr, fdr_cache, '_estimated_bytes', None)
+        self.frame = pd.DataFrame({'Close': np.arange(200, dtype=np.float64)})
+
+    def cache_size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory))
+
+    def test_scans_only_when_limit_may_be_exceeded(self):
+        with override_settings(FDR_CACHE_DIR=self.directory, FDR_CACHE_MAX_BYTES=10 ** 9), \
+                mock.patch.object(fdr_cache, 'evict', wraps=fdr_cache.evict) as evict:
+            for i in range(100):
+                fdr_cache.write_cached(f'key{i}', self.frame)
+        # 처음 한 번만 실제 크기를 잼
+        self.assertEqual(evict.call_count, 1)
+        self.assertEqual(len(os.listdir(self.directory)), 100)
+
+    def test_keeps_cache_under_limit(self):
+        with override_settings(FDR_CACHE_DIR=self.directory, FDR_CACHE_MAX_BYTES=10 ** 9):
+            fdr_cache.write_cached('probe', self.frame)
+        limit = self.cache_size() * 100
+        fdr_cache._estimated_bytes = None
+
+        with override_settings(FDR_CACHE_DIR=self.directory, FDR_CACHE_MAX_BYTES=limit), \
+                mock.patch.object(fdr_cache, 'evict', wraps=fdr_cache.evict) as evict:
+            for i in range(300):
+                fdr_cache.write_cached(f'key{i}', self.frame)
+                self.assertLessEqual(self.cache_size(), limit)
+            self.assertTrue(os.path.exists(fdr_cache.cache_path('key299')))
+        # 정리할 때 상한의 90% 까지 줄이므로 가득 찬 뒤에도 약 10개 저장마다 한 번만 훑음
+        self.assertLess(evict.call_count, 30)
@@ -5,9 +5,18 @@ app_name = 'stocks'
 
 urlpatterns = [
     path('search/', views.stock_search, name='stock-search'),
+    path('screener/', views.stock_screener, name='stock-screener'),
+    path('movers/', views.market_movers, name='market-movers'),
+    path('indexes/', views.market_indexes, name='market-indexes'),
+    path('indexes/<str:market>/', views.market_index_chart, name='market-index-chart'),
+    path('etfs/', views.etf_list, name='etf-list'),
+    path('backtest/', views.portfolio_backtest, name='portfolio-backtest'),
     path('watchlist/', views.watchlist_list, name='watchlist-list'), 
     path('watchlist/<str:ticker>/', views.watchlist_detail, name='watchlist-delete'),
     path('<str:ticker>/chart/', views.stock_chart_data, name='stock-chart'),
+    path('<str:ticker>/candles/', views.stock_candles, name='stock-candles'),
+    path('<str:ticker>/indicators/', views.stock_indicators, name='stock-indicators'),
+    path('<str:ticker>/correlated/', views.stock_correlated, name='stock-correlated'),
     path('<str:ticker>/news/', views.stock_news, name='stock-news'),
     path('<str:ticker>/', views.stock_detail, name='stock-detail'),
 ]
\ No newline at end of file
@@ -0,0 +1,81 @@
+import django
+import numpy as np
+
+
+def minmax_downsample(values, points):
+    """
+    시계열을 최대 points 개의 점으로 줄일 때 남길 인덱스를 반환한다. (min/max 버킷 방식)
+    - 첫 점과 마지막 점 사이를 (points - 2) // 2 개 구간으로 나누고, 구간마다 최저/최고점을 남긴다.
+    - 첫 점, 마지막 점, 전체 최저/최고점은 항상 포함된다.
+    - 정렬/그룹핑을 NumPy 로 한 번에 처리한다. (구간 수만큼 반복하지 않음)
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if n <= points or n <= 2:
+        return np.arange(n)
+
+    buckets = max(1, (points - 2) // 2)
+    interior = np.arange(1, n - 1)
+    bucket = (interior - 1) * buckets // (n - 2)
+
+    # 구간 번호 → 값 순으로 정렬하면 각 구간의 첫 원소가 최저, 마지막 원소가 최고
+    order = np.lexsort((values[1:-1], bucket))
+    sorted_bucket = bucket[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_bucket)) + 1]
+    ends = np.r_[starts[1:], len(order)] - 1
+
+    picked = np.concatenate(([0], interior[order[starts]], interior[order[ends]], [n - 1]))
+    return np.unique(picked)
+
+
+def encode_columnar(dates, closes):
+    """
+    차트 시계열을 열 단위로 압축한다.
+    - start_date: 첫 날짜
+    - day_offsets: 첫 날짜로부터 지난 일수
+    - close_deltas: 첫 값은 종가 그대로, 이후는 직전 종가와의 차이
+    """
+    if not dates:
+        return {'start_date': None, 'day_offsets': [], 'close_deltas': []}
+
+    ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+    closes = np.asarray(closes, dtype=np.int64)
+    return {
+        'start_date': dates[0].isoformat(),
+        'day_offsets': (ordinals - ordinals[0]).tolist(),
+        'close_deltas': np.diff(closes, prepend=0).tolist(),
+    }
+
+
+def pack_columnar(dates, closes):
+    """
+    encode_columnar 결과를 little-endian Int32 배열 하나로 묶는다.
+    [개수 n, 시작일 ordinal, day_offsets(n), close_deltas(n)]
+    """
+    if not dates:
+        return np.array([0, 0], dtype='<i4').tobytes()
+
+    ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+    closes = np.asarray(closes, dtype=np.int64)
+    packed = np.concatenate((
+        [len(dates), ordinals[0]],
+        ordinals - ordinals[0],
+        np.diff(closes, prepend=0),
+    ))
+    return packed.astype('<i4').tobytes()
+
+
+def top_k_indices(values, k):
+    """
+    values 가 큰 순서대로 상위 k 개의 위치 (NaN 제외).
+    argpartition 으로 k 개만 골라낸 뒤 그 k 개만 정렬한다. (전체 정렬 없이 O(n))
+    """
+    candidates = np.flatnonzero(~np.isnan(values))
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-values[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer: spawn 방식으로 뜬 워커에서도 settings 를 읽을 수 있도록"""
+    django.setup()
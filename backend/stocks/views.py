@@ -1,17 +1,67 @@
-import requests
-import re
-from datetime import timedelta, datetime
+import calendar
+import hashlib
+import numpy as np
+from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import F, Max
 from django.utils import timezone
-from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from .models import Stock, Watchlist, Chartprice
+from ai.models import UserAiRecommendation
+from .models import (
+    Stock, DailyPrice, Watchlist, Chartprice, PriceBar, MarketMover, MarketBreadth, StockCorrelation, EtfSummary,
+    MarketIndex,
+)
 from .serializers import StockSerializer, WatchlistSerializer
+from .backtest import REBALANCE_PERIODS, load_backtest_closes, parse_weights, rebalance_rows, run_backtest
+from .constants import MOVERS_CACHE_KEY
+from .indicators import compute_indicators, load_series, parse_indicator_set, serialize_indicators
+from .news import NewsUnavailable, get_news
+from .screener import ScreenerError, parse_conditions, parse_sort, screener
+from .search import stock_index
+from .utils import encode_columnar, minmax_downsample, pack_columnar
+
+# 차트 다운샘플링 최소 점 개수 (첫/끝 + 최저/최고)
+MIN_CHART_POINTS = 4
+
+CHART_ENCODINGS = ('json', 'columnar', 'binary')
+
+# 차트 응답 캐시 유지 시간 (워터마크가 바뀌면 키가 달라지므로 길게 둬도 됨)
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
+
+SCREENER_PAGE_SIZE = 20
+SCREENER_MAX_PAGE_SIZE = 100
+
+# 시장 랭킹 응답 캐시 (수집 후 해당 날짜/최신 키를 지우므로 길게 둬도 됨)
+MOVERS_CACHE_TIMEOUT = 60 * 60 * 24
+
+CORRELATED_LIMIT = 10
+
+# ETF 목록 정렬 가능 컬럼 (EtfSummary 필드)
+ETF_SORT_FIELDS = ('premium', 'premium_z', 'tracking_error', 'trading_value')
+ETF_FIELDS = (
+    'date', 'close_price', 'nav', 'trading_value', 'premium', 'premium_avg', 'premium_z', 'tracking_error', 'anomaly',
+)
+
+# 백테스트 종목 수 상한 / 평가액 곡선 기본 점 개수
+BACKTEST_MAX_TICKERS = 100
+BACKTEST_POINTS = 500
+
+INDEX_FIELDS = (
+    'market_type', 'date', 'cap_index', 'equal_index', 'cap_return', 'equal_return',
+    'market_cap', 'trading_value', 'value_share', 'constituents',
+)
+INDEX_WEIGHTINGS = ('cap', 'equal')
+
+CANDLE_INTERVALS = ('1d', '1w', '1m')
+CANDLE_FIELDS = ('date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
 
 # 1. 주식 검색
 @api_view(['GET'])
@@ -22,19 +72,212 @@ def stock_search(request):
     if not query:
         return Response([])
 
-    stocks = Stock.objects.filter(
-        Q(name__icontains=query) | Q(ticker__icontains=query)
-    )[:10] # 10개 제한
+    # 메모리 인덱스에서 순위대로 종목코드를 찾고, 해당 종목만 DB 에서 조회
+    tickers = stock_index.search(query, limit=10) # 10개 제한
+    found = stock_snapshot_query().in_bulk(tickers)
+    stocks = [found[ticker] for ticker in tickers if ticker in found]
 
     serializer = StockSerializer(stocks, many=True)
     return Response(serializer.data)
 
 
+def stock_snapshot_query():
+    """StockSerializer 용 종목 + 최신 시세 (검색 / 상세)"""
+    return Stock.objects.select_related('latest_price')
+
+
+# 1-1. 종목 스크리너
+# filter=market_type=KOSDAQ,market_cap>1e12,fluctuation_rate>3,volume>volume_avg20
+# sort=-market_cap,ticker / page=1 / page_size=20
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stock_screener(request):
+    expressions = [
+        expression
+        for value in request.GET.getlist('filter')
+        for expression in value.split(',')
+        if expression.strip()
+    ]
+    try:
+        conditions = parse_conditions(expressions)
+        sort_columns, ascending = parse_sort(request.GET.get('sort', '-market_cap'))
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', SCREENER_PAGE_SIZE)), 1), SCREENER_MAX_PAGE_SIZE)
+    except ScreenerError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    count, results = screener.screen(
+        conditions, sort_columns, ascending, offset=(page - 1) * page_size, limit=page_size,
+    )
+    return Response({
+        'date': screener.date,
+        'count': count,
+        'page': page,
+        'page_size': page_size,
+        'results': results,
+    })
+
+
+# 1-2. 시장 랭킹 (상승률/하락률/거래대금 상위 + 상승/하락 종목 수), 수집 후 미리 계산된 값
+# date=YYYY-MM-DD (기본값: 최신 거래일) / market=KOSPI (기본값: 전체 시장)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def market_movers(request):
+    date = request.GET.get('date')
+    if date:
+        try:
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = MOVERS_CACHE_KEY.format(date=date or 'latest')
+    data = cache.get(cache_key)
+    if data is None:
+        data = load_market_movers(date)
+        cache.set(cache_key, data, MOVERS_CACHE_TIMEOUT)
+
+    market = request.GET.get('market')
+    if market:
+        data = {'date': data['date'], 'markets': {key: value for key, value in data['markets'].items() if key == market}}
+    return Response(data)
+
+
+def load_market_movers(date=None):
+    """MarketBreadth / MarketMover 에서 해당 날짜(기본값: 최신) 랭킹을 시장별로 묶는다."""
+    if date is None:
+        date = MarketBreadth.objects.aggregate(latest=Max('date'))['latest']
+
+    markets = {}
+    for breadth in breadth_query(date):
+        markets[breadth.market_type] = {
+            'breadth': {
+                'advancers': breadth.advancers,
+                'decliners': breadth.decliners,
+                'unchanged': breadth.unchanged,
+                'trading_value': breadth.trading_value,
+            },
+            'gainers': [], 'losers': [], 'value': [],
+        }
+
+    for market, kind, ticker, name, close_price, fluctuation_rate, trading_value in movers_query(date):
+        markets[market][kind].append({
+            'ticker': ticker,
+            'name': name,
+            'close_price': close_price,
+            'fluctuation_rate': fluctuation_rate,
+            'trading_value': trading_value,
+        })
+
+    return {'date': date, 'markets': markets}
+
+
+def breadth_query(date):
+    return MarketBreadth.objects.filter(date=date)
+
+
+def movers_query(date):
+    return MarketMover.objects.filter(date=date).values_list(
+        'market_type', 'kind', 'stock_id', 'stock__name', 'close_price', 'fluctuation_rate', 'trading_value',
+    )
+
+
+# 1-3. ETF 목록 (괴리율 / 추적오차 요약, 수집 후 미리 계산된 값)
+# sort=-premium (premium/premium_z/tracking_error/trading_value, - 는 내림차순) / anomaly=1 / page / page_size
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def etf_list(request):
+    sort = request.GET.get('sort', '-premium')
+    if sort.lstrip('-') not in ETF_SORT_FIELDS:
+        return Response({'error': f'sort must be one of {", ".join(ETF_SORT_FIELDS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', SCREENER_PAGE_SIZE)), 1), SCREENER_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    summaries = etf_summary_query(sort, anomaly=request.GET.get('anomaly') in ('1', 'true'))
+    offset = (page - 1) * page_size
+
+    return Response({
+        'count': summaries.count(),
+        'page': page,
+        'page_size': page_size,
+        'results': summaries[offset:offset + page_size],
+    })
+
+
+def etf_summary_query(sort, anomaly=False):
+    summaries = EtfSummary.objects.all()
+    if anomaly:
+        summaries = summaries.filter(anomaly=True)
+
+    # 값이 없는 (NAV 미제공 등) ETF 는 정렬 방향과 관계없이 뒤로
+    field = F(sort.lstrip('-'))
+    ordering = field.desc(nulls_last=True) if sort.startswith('-') else field.asc(nulls_last=True)
+    return summaries.order_by(ordering, 'stock_id').values(
+        *ETF_FIELDS, ticker=F('stock_id'), name=F('stock__name'),
+    )
+
+
+# 1-4. 시장 지수 (시장별 시가총액 가중 / 동일 가중 지수, 수집 후 미리 계산된 값)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def market_indexes(request):
+    latest = MarketIndex.objects.aggregate(latest=Max('date'))['latest']
+    return Response({'date': latest, 'markets': market_index_query(latest)})
+
+
+def market_index_query(date):
+    return MarketIndex.objects.filter(date=date).values(*INDEX_FIELDS)
+
+
+# 1-5. 시장 지수 차트 (종목 차트와 같은 period / points 파라미터, weighting=cap(기본)/equal 기준으로 다운샘플링)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def market_index_chart(request, market):
+    period = request.GET.get('period', '1y')
+    end_date = timezone.now().date()
+    start_date = get_period_start(period, end_date)
+
+    weighting = request.GET.get('weighting', 'cap')
+    if weighting not in INDEX_WEIGHTINGS:
+        return Response({'error': 'weighting must be one of cap, equal'}, status=status.HTTP_400_BAD_REQUEST)
+
+    points = request.GET.get('points')
+    if points is not None:
+        try:
+            points = max(int(points), MIN_CHART_POINTS)
+        except ValueError:
+            return Response({'error': 'points must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = list(index_chart_query(market, start_date, end_date))
+
+    if points and len(rows) > points:
+        column = 1 if weighting == 'cap' else 2
+        values = np.fromiter((row[column] for row in rows), dtype=np.float64, count=len(rows))
+        rows = [rows[i] for i in minmax_downsample(values, points)]
+
+    return Response([
+        {'date': date, 'cap_index': round(cap_index, 2), 'equal_index': round(equal_index, 2)}
+        for date, cap_index, equal_index in rows
+    ])
+
+
+def index_chart_query(market, start_date, end_date):
+    return MarketIndex.objects.filter(
+        market_type=market,
+        date__gte=start_date,
+        date__lte=end_date,
+    ).values_list('date', 'cap_index', 'equal_index').order_by('date')
+
+
 # 2. 주식 상세 조회
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def stock_detail(request, ticker):
-    stock = get_object_or_404(Stock, ticker=ticker)
+    stock = get_object_or_404(stock_snapshot_query(), ticker=ticker)
     
     serializer = StockSerializer(stock)
     return Response(serializer.data)
@@ -45,7 +288,7 @@ def stock_detail(request, ticker):
 @permission_classes([IsAuthenticated])
 def watchlist_list(request):
     if request.method == 'GET':
-        watchlist = Watchlist.objects.filter(user=request.user)
+        watchlist = watchlist_query(request.user)
         serializer = WatchlistSerializer(watchlist, many=True)
         return Response(serializer.data)
 
@@ -68,6 +311,10 @@ def watchlist_list(request):
             return Response({'status': 'already_exists', 'message': '이미 관심목록에 있습니다.'}, status=status.HTTP_200_OK)
 
 
+def watchlist_query(user):
+    return Watchlist.objects.filter(user=user).select_related('stock__latest_price')
+
+
 # 4. 관심종목 삭제 (DELETE)
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])    
@@ -81,38 +328,181 @@ def watchlist_detail(reqeust, ticker):
             return Response({'error': 'Not found in watchlist'}, status=status.HTTP_404_NOT_FOUND)
 
 
-# 5. 차트데이터용 주식 가격 불러오기        
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def stock_chart_data(request, ticker):
-    period = request.GET.get('period', '1y') # 기본값 1년
-    end_date = timezone.now().date()
-    
-    # 기간에 따른 시작일 계산
+def get_period_start(period, end_date):
+    """기간 파라미터(1w/1m/6m/1y/3y/5y, 그 외는 전체=10년)에 따른 시작일"""
     if period == '1w':
-        start_date = end_date - timedelta(weeks=1)
+        return end_date - timedelta(weeks=1)
     elif period == '1m':
-        start_date = end_date - relativedelta(months=1)
+        return end_date - relativedelta(months=1)
     elif period == '6m':
-        start_date = end_date - relativedelta(months=6)
+        return end_date - relativedelta(months=6)
     elif period == '1y':
-        start_date = end_date - relativedelta(years=1)
+        return end_date - relativedelta(years=1)
     elif period == '3y':
-        start_date = end_date - relativedelta(years=3)
+        return end_date - relativedelta(years=3)
     elif period == '5y':
-        start_date = end_date - relativedelta(years=5)
+        return end_date - relativedelta(years=5)
     else: # 전체
-        start_date = end_date - relativedelta(years=10)
+        return end_date - relativedelta(years=10)
+
+
+# 5. 차트데이터용 주식 가격 불러오기        
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stock_chart_data(request, ticker):
+    period = request.GET.get('period', '1y') # 기본값 1년
+    end_date = timezone.now().date()
+    start_date = get_period_start(period, end_date)
+
+    # points=N: 차트 폭에 맞춰 최대 N개로 줄여서 전송 (최저/최고점 유지)
+    points = request.GET.get('points')
+    if points is not None:
+        try:
+            points = max(int(points), MIN_CHART_POINTS)
+        except ValueError:
+            return Response({'error': 'points must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # encoding=json(기본, 객체 배열) / columnar(열 단위 JSON) / binary(Int32 배열)
+    # (?format= 은 DRF 렌더러 선택에 쓰이므로 다른 이름 사용)
+    encoding = request.GET.get('encoding', 'json')
+    if encoding not in CHART_ENCODINGS:
+        return Response({'error': 'encoding must be one of json, columnar, binary'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # 캐시 키/ETag 는 차트 워터마크(마지막 갱신 시각)로 버전 관리
+    watermark = Stock.objects.filter(ticker=ticker).values_list('chart_updated_at', flat=True).first()
+    version = watermark.isoformat() if watermark else '0'
+    cache_key = f'chart:{ticker}:{period}:{points}:{encoding}:{end_date}:{version}'
+    etag = f'"{hashlib.md5(cache_key.encode()).hexdigest()}"'
+    # 응답은 기간 끝(오늘)에 따라서도 달라지므로, 날짜가 바뀌면 워터마크가 그대로여도 Last-Modified 가 올라가야 함
+    window_end = calendar.timegm(end_date.timetuple())
+    last_modified = max(int(watermark.timestamp()), window_end) if watermark else window_end
+
+    # 브라우저/nginx 가 가진 버전과 같으면 본문 없이 304
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return set_chart_cache_headers(not_modified, etag, last_modified)
 
+    data = cache.get(cache_key)
+    if data is None:
+        # DB에서 해당 기간 데이터만 조회 (최적화)
+        rows = list(chart_rows_query(ticker, start_date, end_date))
+
+        if points and len(rows) > points:
+            closes = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            rows = [rows[i] for i in minmax_downsample(closes, points)]
+
+        if encoding == 'json':
+            data = [{'date': date, 'close_price': close_price} for date, close_price in rows]
+        else:
+            dates = [row[0] for row in rows]
+            closes = [row[1] for row in rows]
+            if encoding == 'columnar':
+                data = encode_columnar(dates, closes)
+            else:
+                data = pack_columnar(dates, closes)
+        cache.set(cache_key, data, CHART_CACHE_TIMEOUT)
+
+    if encoding == 'binary':
+        response = HttpResponse(data, content_type='application/octet-stream')
+    else:
+        response = Response(data)
+    return set_chart_cache_headers(response, etag, last_modified)
+
+
+def chart_rows_query(ticker, start_date, end_date):
     # DB에서 해당 기간 데이터만 조회 (최적화)
-    data = Chartprice.objects.filter(
+    return Chartprice.objects.filter(
         stock__ticker=ticker,
         date__gte=start_date,
         date__lte=end_date
-    ).values('date', 'close_price').order_by('date')
+    ).values_list('date', 'close_price').order_by('date')
+
+
+def set_chart_cache_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # 캐시는 하되 매번 ETag 로 재검증
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
+# 5-1. 캔들(OHLCV) 데이터: interval=1d(일봉) / 1w(주봉) / 1m(월봉)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stock_candles(request, ticker):
+    interval = request.GET.get('interval', '1d')
+    if interval not in CANDLE_INTERVALS:
+        return Response({'error': 'interval must be one of 1d, 1w, 1m'}, status=status.HTTP_400_BAD_REQUEST)
+
+    end_date = timezone.now().date()
+    start_date = get_period_start(request.GET.get('period', '1y'), end_date)
+
+    return Response(candles_query(ticker, interval, start_date, end_date))
+
+
+def candles_query(ticker, interval, start_date, end_date):
+    # 일봉은 DailyPrice, 주봉/월봉은 미리 집계해둔 PriceBar 에서 조회
+    if interval == '1d':
+        bars = DailyPrice.objects.filter(stock_id=ticker)
+    else:
+        bars = PriceBar.objects.filter(stock_id=ticker, interval=interval)
+
+    return bars.filter(
+        date__gte=start_date,
+        date__lte=end_date
+    ).values(*CANDLE_FIELDS).order_by('date')
+
+# 5-2. 보조지표: set=sma20,ema60,rsi14,macd,bb20,atr14 (기본 sma20,rsi14)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stock_indicators(request, ticker):
+    try:
+        specs = parse_indicator_set(request.GET.get('set'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    period = request.GET.get('period', '1y')
+    end_date = timezone.now().date()
+
+    # 시세 워터마크(마지막 수집 시각)가 바뀌면 키가 달라져 다시 계산
+    watermark = Stock.objects.filter(ticker=ticker).values_list('price_updated_at', flat=True).first()
+    version = watermark.isoformat() if watermark else '0'
+    names = ','.join(name for name, _, _ in specs)
+    cache_key = f'indicators:{ticker}:{names}:{period}:{end_date}:{version}'
+
+    data = cache.get(cache_key)
+    if data is None:
+        # 워밍업을 위해 전체 기간으로 계산한 뒤 요청 기간만 잘라서 응답
+        series = load_series(ticker)
+        results = compute_indicators(series, specs)
+        data = serialize_indicators(series[0], results, get_period_start(period, end_date))
+        cache.set(cache_key, data, CHART_CACHE_TIMEOUT)
 
     return Response(data)
 
+# 5-3. 수익률이 비슷하게 움직이는 종목 (compute_correlations 배치 결과)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stock_correlated(request, ticker):
+    try:
+        limit = max(int(request.GET.get('limit', CORRELATED_LIMIT)), 1)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = list(correlated_query(ticker)[:limit])
+    return Response({
+        'window_end': rows[0][4] if rows else None,
+        'window_days': rows[0][5] if rows else None,
+        'results': [
+            {'ticker': other, 'name': name, 'correlation': round(correlation, 4), 'covariance': covariance}
+            for other, name, correlation, covariance, _, _ in rows
+        ],
+    })
+
+def correlated_query(ticker):
+    return StockCorrelation.objects.filter(stock_id=ticker).values_list(
+        'other_id', 'other__name', 'correlation', 'covariance', 'window_end', 'window_days',
+    )
+
 # 6. 주식 관련 뉴스 불러오기
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -123,44 +513,76 @@ def stock_news(request, ticker):
     except Stock.DoesNotExist:
         return Response({'error': 'Stock not found'}, status=404)
     
-    client_id = settings.NAVER_CLIENT_ID
-    client_secret = settings.NAVER_CLIENT_SECRET
-    
-    url = "https://openapi.naver.com/v1/search/news.json"
-    headers = {
-        "X-Naver-Client-Id": client_id,
-        "X-Naver-Client-Secret": client_secret,
-    }
-    params = {
-        "query": query,
-        "display": 20,
-        "sort":"date"
-    }
-
-    res = requests.get(url, headers=headers, params=params)
-
-    if res.status_code != 200:
+    try:
+        news_list = get_news(ticker, query)
+    except NewsUnavailable:
         return Response({'error': 'Naver API Error'}, status=500)
-    
-    items = res.json().get('items', [])
-    news_list = []
 
-    for item in items:
-        title = re.sub('<[^<]+?>', '', item['title'])
-        title = title.replace('&quot;', '"').replace('&amp;', '&')
+    return Response(news_list)
 
-        try:
-            raw_date = item['pubDate']
-            dt = datetime.striptime(raw_date, '%a, %d %b %Y %H:%M:%S +0900')
-            formatted_date = dt.strfttime('%m.%d %H:%M')
-        except:
-            formatted_date = item['pubDate']
-
-        news_list.append({
-            'title': title,
-            'link': item['link'],
-            'date': formatted_date,
-            'publisher': '네이버뉴스'
-        })
-    
-    return Response(news_list)
\ No newline at end of file
+
+# 7. 포트폴리오 백테스트
+# source=watchlist(관심종목) / ai(AI 추천 종목) / tickers(직접 지정, tickers=005930,000660)
+# weights=005930:2,000660:1 (생략하면 동일 비중), rebalance=none/M/Q/Y, period=1y/3y/5y/...
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def portfolio_backtest(request):
+    source = request.GET.get('source', 'watchlist')
+    if source == 'watchlist':
+        tickers = list(Watchlist.objects.filter(user=request.user).values_list('stock_id', flat=True))
+    elif source == 'ai':
+        tickers = UserAiRecommendation.objects.filter(user=request.user).values_list(
+            'recommended_stock_ids', flat=True,
+        ).first() or []
+    elif source == 'tickers':
+        tickers = [ticker.strip() for ticker in request.GET.get('tickers', '').split(',') if ticker.strip()]
+    else:
+        return Response({'error': 'source must be one of watchlist, ai, tickers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return Response({'error': 'No stocks to backtest'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(tickers) > BACKTEST_MAX_TICKERS:
+        return Response({'error': f'At most {BACKTEST_MAX_TICKERS} stocks'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rebalance = request.GET.get('rebalance', 'M')
+    if rebalance not in REBALANCE_PERIODS:
+        return Response({'error': 'rebalance must be one of none, M, Q, Y'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        weights = parse_weights(request.GET.get('weights'), tickers)
+        risk_free = float(request.GET.get('risk_free', 0))
+        # nan / inf 는 float() 를 통과하지만 지표를 JSON 으로 만들 수 없게 함
+        if not np.isfinite(risk_free):
+            raise ValueError('risk_free must be a finite number')
+        points = max(int(request.GET.get('points', BACKTEST_POINTS)), MIN_CHART_POINTS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    end_date = timezone.now().date()
+    frame, missing = load_backtest_closes(tickers, get_period_start(request.GET.get('period', '5y'), end_date), end_date)
+
+    # 시세가 없는 종목은 빼고 남은 종목끼리 비중을 다시 맞춤
+    weights = weights[[tickers.index(ticker) for ticker in frame.columns]]
+    if len(frame) < 2 or weights.sum() <= 0:
+        return Response({'error': 'Not enough price data'}, status=status.HTTP_400_BAD_REQUEST)
+    weights = weights / weights.sum()
+
+    equity, drawdown, metrics = run_backtest(
+        frame.to_numpy(), weights, rebalance_rows(frame.index, REBALANCE_PERIODS[rebalance]), risk_free,
+    )
+
+    picked = minmax_downsample(equity, points)
+    dates = frame.index[picked]
+    return Response({
+        'start': frame.index[0],
+        'end': frame.index[-1],
+        'rebalance': rebalance,
+        'weights': {ticker: round(float(weight), 6) for ticker, weight in zip(frame.columns, weights)},
+        'missing': missing,
+        'metrics': metrics,
+        'curve': [
+            {'date': date, 'equity': round(float(value), 6), 'drawdown': round(float(dd), 6)}
+            for date, value, dd in zip(dates, equity[picked], drawdown[picked])
+        ],
+    })